@@ -1,41 +1,50 @@
 from flask import Flask, redirect, url_for, session, render_template
-from flask_migrate import Migrate
 from config import Config
 from models import db, User
+from static_assets import init_assets
+from db_routing import init_db_routing
+from slow_queries import init_slow_queries
+from sharding import init_sharding
+from profiling import init_profiling
+import logging
 import os
 
-# Importar SocketIO de manera segura
-try:
-    from extensions import socketio
-    SOCKETIO_AVAILABLE = True
-except ImportError:
-    print("⚠️ SocketIO no disponible, continuando sin funcionalidad en tiempo real")
-    SOCKETIO_AVAILABLE = False
-    socketio = None
+logger = logging.getLogger(__name__)
 
-from blueprints.auth.routes import auth_bp
-from blueprints.game.routes import game_bp
-from blueprints.admin.routes import admin_bp
+def init_migrations(app):
+    """Flask-Migrate (que importa Alembic) solo se necesita para los comandos 'flask db'"""
+    import click
+    if click.get_current_context(silent=True) is None:
+        return
+    from flask_migrate import Migrate
+    Migrate().init_app(app, db)
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
-    
-    # Initialize Flask-Migrate
-    migrate = Migrate()
 
     # Inicializar base de datos y migraciones
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_migrations(app)
+    init_db_routing(app)
+    init_slow_queries(app, db)
 
     # Configurar la clave secreta para las sesiones
     app.secret_key = Config.SECRET_KEY
     
+    # Los blueprints (y sus dependencias) se importan aquí y no al importar app.py
+    from blueprints.auth.routes import auth_bp
+    from blueprints.game.routes import game_bp
+    from blueprints.admin.routes import admin_bp
+
     # Registrar blueprints
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(game_bp, url_prefix="/game")
     app.register_blueprint(admin_bp, url_prefix="/admin")
 
+    # Bundles CSS/JS con hash de contenido (ver static_assets.py)
+    init_assets(app)
+
     @app.route("/")
     def index():
         if "user_id" not in session:
@@ -58,14 +67,30 @@ def create_app():
         return render_template("index.html", nickname=user.nickname)
 
     # Configurar Socket.IO solo si está disponible
-    if SOCKETIO_AVAILABLE and socketio:
+    socketio = get_socketio()
+    if socketio:
         socketio.init_app(app, cors_allowed_origins="*", async_mode='threading')
-        print("✅ SocketIO configurado en la aplicación")
+        logger.info("SocketIO configurado en la aplicación")
     else:
-        print("ℹ️ Aplicación ejecutándose sin SocketIO")
+        logger.info("Aplicación ejecutándose sin SocketIO")
+
+    # Reparto de partidas entre procesos por código (ver sharding.py)
+    init_sharding(app, socketio)
+
+    # Registro periódico de memoria (MEMORY_LOG_INTERVAL, ver profiling.py)
+    init_profiling(app, socketio)
 
     return app
 
+def get_socketio():
+    """Instancia de SocketIO, o None si no está disponible"""
+    try:
+        from extensions import socketio
+    except ImportError:
+        logger.warning("SocketIO no disponible, continuando sin funcionalidad en tiempo real")
+        return None
+    return socketio
+
 if __name__ == "__main__":
     app = create_app()
     with app.app_context():
@@ -81,7 +106,8 @@ if __name__ == "__main__":
     print(f"🚀 Iniciando Make It Meme en http://{host}:{port}")
     print(f"🔧 Modo debug: {debug}")
     
-    if SOCKETIO_AVAILABLE and socketio:
+    socketio = get_socketio()
+    if socketio:
         socketio.run(app, host=host, port=port, debug=debug, allow_unsafe_werkzeug=True)
     else:
         app.run(host=host, port=port, debug=debug)
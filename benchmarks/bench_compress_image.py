@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de compress_image: tiempo y memoria pico por subida.
+
+Compara la ruta anterior (decodificación completa + LANCZOS) con la ruta rápida
+actual (draft de JPEG / Image.reduce). Cada medición corre en un proceso nuevo
+para que el pico de RSS corresponda a una sola imagen; tracemalloc no ve las
+reservas de memoria en C de Pillow.
+
+Uso:
+    python benchmarks/bench_compress_image.py                 # corpus sintético
+    python benchmarks/bench_compress_image.py ruta/a/imagenes # corpus propio
+"""
+import base64
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEAT = 3
+
+# (nombre, modo, formato, tamaño)
+SYNTHETIC_CORPUS = [
+    ("photo_6000x4000.jpg", "RGB", "JPEG", (6000, 4000)),
+    ("photo_3000x2000.jpg", "RGB", "JPEG", (3000, 2000)),
+    ("meme_1200x900.jpg", "RGB", "JPEG", (1200, 900)),
+    ("screenshot_2560x1440.png", "RGBA", "PNG", (2560, 1440)),
+    ("sticker_3000x3000.webp", "RGBA", "WEBP", (3000, 3000)),
+    ("animation_2000x1500.gif", "P", "GIF", (2000, 1500)),
+    ("small_640x480.png", "RGB", "PNG", (640, 480)),
+]
+
+def legacy_compress_image(image_data, max_width=800, quality=85):
+    """Implementación anterior: decodifica la imagen completa antes de redimensionar"""
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(image_data))
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        img = background
+    if img.width > max_width:
+        ratio = max_width / img.width
+        img = img.resize((max_width, int(img.height * ratio)), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return base64.b64encode(output.getvalue()).decode('utf-8'), img.width, img.height
+
+def build_synthetic_corpus(directory):
+    """Generar imágenes con ruido y degradados (comprimen como fotos reales)"""
+    from PIL import Image
+
+    paths = []
+    for name, mode, fmt, size in SYNTHETIC_CORPUS:
+        path = os.path.join(directory, name)
+        img = Image.effect_noise(size, 64).convert("RGB")
+        gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+        img = Image.blend(img, gradient, 0.5).convert(mode)
+        img.save(path, fmt)
+        paths.append(path)
+    return paths
+
+def peak_rss_kb():
+    """Pico de RSS del proceso en KB (VmHWM en Linux; ru_maxrss se hereda a través de exec)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure_single(path, variant):
+    """Medir una imagen con una variante (se ejecuta en un proceso hijo)"""
+    from imaging import compress_image
+
+    fn = compress_image if variant == "fast" else legacy_compress_image
+    with open(path, "rb") as f:
+        data = f.read()
+
+    baseline_rss = peak_rss_kb()
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+    peak_rss = peak_rss_kb()
+
+    return {
+        "best_ms": round(min(timings) * 1000, 1),
+        "peak_mb": round(max(peak_rss - baseline_rss, 0) / 1024, 1),
+    }
+
+def run_benchmark(paths):
+    print(f"{'imagen':<28} {'variante':<8} {'mejor (ms)':>11} {'pico (MB)':>10}")
+    for path in paths:
+        for variant in ("legacy", "fast"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--single", path, variant],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{os.path.basename(path):<28} {variant:<8} {result['best_ms']:>11} {result['peak_mb']:>10}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--single":
+        print(json.dumps(measure_single(sys.argv[2], sys.argv[3])))
+    elif len(sys.argv) == 2:
+        corpus_dir = sys.argv[1]
+        run_benchmark(sorted(
+            os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir)
+            if name.lower().endswith((".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"))
+        ))
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            run_benchmark(build_synthetic_corpus(corpus_dir))
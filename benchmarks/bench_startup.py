@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío: tiempo de importar app.py, de create_app() y de
+la primera respuesta (GET /auth/nickname con el cliente de pruebas).
+
+Cada medición corre en un intérprete nuevo para que no haya módulos ya
+importados; se reporta la mediana de varias ejecuciones.
+
+Uso:
+    python benchmarks/bench_startup.py          # 7 ejecuciones
+    python benchmarks/bench_startup.py 15       # número de ejecuciones
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_RUNS = 7
+
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get('/auth/nickname')
+responded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_response_ms": (responded - created) * 1000,
+    "total_ms": (responded - start) * 1000,
+    "status": response.status_code,
+    "modules": len(sys.modules),
+}))
+"""
+
+def measure_once():
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+    # Una ejecución de calentamiento para la caché de bytecode y del sistema de archivos
+    measure_once()
+    results = [measure_once() for _ in range(runs)]
+
+    print(f"Arranque en frío (mediana de {runs} ejecuciones)")
+    for key, label in (("import_ms", "import app"),
+                       ("create_app_ms", "create_app()"),
+                       ("first_response_ms", "primera respuesta"),
+                       ("total_ms", "total")):
+        print(f"  {label:<20} {statistics.median(r[key] for r in results):8.1f} ms")
+    print(f"  {'módulos cargados':<20} {results[-1]['modules']:8d}")
+    print(f"  {'estado HTTP':<20} {results[-1]['status']:8d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Bytes transferidos por jugador en una partida completa (3 rondas), antes y
+después de extraer el CSS/JS de las páginas a bundles estáticos.
+
+Antes: cada carga de página incluía el CSS y el JS en línea, sin comprimir.
+Después: el HTML solo trae el marcado y los datos de la página; cada bundle se
+descarga una vez (precomprimido) y las siguientes cargas lo sirven desde caché.
+El tamaño del HTML se aproxima con el de la plantilla sin renderizar; los datos
+del juego (plantillas, memes) pesan lo mismo en ambos casos y no se cuentan.
+
+Uso:
+    python benchmarks/bench_static_transfer.py
+"""
+import gzip
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from static_assets import BROTLI_AVAILABLE, SOURCE_DIR
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+# (página, plantilla, cargas por partida)
+GAME_PAGES = [
+    ("play", "templates/game/play.html", 3),
+    ("voting", "templates/game/voting.html", 3),
+    ("podium", "templates/game/podium.html", 1),
+]
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def compressed_size(content):
+    """Tamaño de la mejor variante precomprimida disponible"""
+    sizes = [len(gzip.compress(content, compresslevel=9, mtime=0))]
+    if BROTLI_AVAILABLE:
+        sizes.append(len(brotli.compress(content, quality=11)))
+    return min(sizes)
+
+def main():
+    before_total = 0
+    after_first_total = 0
+    after_cached_total = 0
+
+    print(f"{'página':<8} {'cargas':>6} {'HTML':>8} {'CSS+JS':>8} {'bundles':>8} {'antes':>9} {'después':>9}")
+    for name, template, loads in GAME_PAGES:
+        html = len(read_bytes(os.path.join(ROOT, template)))
+        css = read_bytes(os.path.join(SOURCE_DIR, "css", f"{name}.css"))
+        js = read_bytes(os.path.join(SOURCE_DIR, "js", f"{name}.js"))
+        bundles = compressed_size(css) + compressed_size(js)
+
+        before = loads * (html + len(css) + len(js))
+        after_first = loads * html + bundles
+        before_total += before
+        after_first_total += after_first
+        after_cached_total += loads * html
+
+        print(f"{name:<8} {loads:>6} {html:>8} {len(css) + len(js):>8} {bundles:>8} {before:>9} {after_first:>9}")
+
+    print()
+    print(f"Antes (por partida):                 {before_total / 1024:8.1f} KB")
+    print(f"Después, primera partida:            {after_first_total / 1024:8.1f} KB")
+    print(f"Después, con bundles en caché:       {after_cached_total / 1024:8.1f} KB")
+    if not BROTLI_AVAILABLE:
+        print("ℹ️ brotli no instalado: bundles medidos con gzip")
+
+if __name__ == "__main__":
+    main()
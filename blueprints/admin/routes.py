@@ -1,11 +1,32 @@
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session
-from models import db, MemeTemplate
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session, current_app, Response, stream_with_context
+from flask_socketio import join_room
+from sqlalchemy.orm import defer
+from models import db, MemeTemplate, TemplateStats
+from extensions import socketio
+from imaging import compute_dhash, format_phash, prepare_template_image
+from blueprints.admin.uploads import (
+    ADMIN_UPLOADS_ROOM, build_meme_template, extract_upload_items, run_bulk_upload
+)
+from blueprints.admin.search import apply_name_search, install_search_index
+from blueprints.admin.export import EXPORT_FORMATS, EXPORT_KINDS, parse_date, stream_export
+from blueprints.admin.similarity import (
+    DUPLICATE_MAX_DISTANCE, SIMILAR_MAX_DISTANCE, find_similar_templates, template_hash_index
+)
+from rate_limit import rate_limiter
+from slow_queries import slow_query_log
+from profiling import (
+    DEFAULT_TRACE_FRAMES, SNAPSHOT_GROUPS, list_snapshots, memory_stats, orm_object_counts,
+    snapshot_diff, snapshot_top, start_tracing, stop_tracing, take_snapshot
+)
+from db_routing import read_only
 import os
 import base64
-import io
-from PIL import Image
-import imghdr
+import click
+import re
+import shutil
+import sys
+import tempfile
+import uuid
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -40,25 +61,88 @@ def admin_logout():
     session.pop('admin_authenticated', None)
     return redirect(url_for('admin.admin_login'))
 
+# Plantillas por página del panel
+PANEL_PAGE_SIZE = 6
+
+def parse_bool_filter(value):
+    """Convertir un filtro '1'/'0' de la URL en True/False (None si no se filtra)"""
+    if value in ('1', 'true'):
+        return True
+    if value in ('0', 'false'):
+        return False
+    return None
+
 @admin_bp.route("/")
 @require_admin_auth
+@read_only
 def admin_panel():
-    """Panel administrativo principal"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 6
+    """
+    Panel administrativo principal.
+    Paginación por cursor sobre el id (after/before) en lugar de OFFSET + COUNT(*),
+    sin cargar las imágenes en Base64 de cada fila.
+    """
+    after_id = request.args.get('after', type=int)
+    before_id = request.args.get('before', type=int)
+    search = request.args.get('q', '').strip()
+    active = parse_bool_filter(request.args.get('active'))
+    uploaded = parse_bool_filter(request.args.get('uploaded'))
+    
+    query = db.session.query(
+        MemeTemplate,
+        MemeTemplate.image_data.isnot(None).label('has_image_data')
+    ).options(defer(MemeTemplate.image_data))
+    
+    if search:
+        query = apply_name_search(query, search)
+    if active is not None:
+        query = query.filter(MemeTemplate.active == active)
+    if uploaded is not None:
+        query = query.filter(MemeTemplate.uploaded_by_user == uploaded)
+    
+    # Pedir una fila extra para saber si hay más páginas en esa dirección
+    if before_id is not None:
+        rows = query.filter(MemeTemplate.id < before_id).order_by(
+            MemeTemplate.id.desc()
+        ).limit(PANEL_PAGE_SIZE + 1).all()
+        has_more = len(rows) > PANEL_PAGE_SIZE
+        rows = list(reversed(rows[:PANEL_PAGE_SIZE]))
+        has_prev, has_next = has_more, True
+    else:
+        if after_id is not None:
+            query = query.filter(MemeTemplate.id > after_id)
+        rows = query.order_by(MemeTemplate.id).limit(PANEL_PAGE_SIZE + 1).all()
+        has_next = len(rows) > PANEL_PAGE_SIZE
+        rows = rows[:PANEL_PAGE_SIZE]
+        has_prev = after_id is not None
+    
+    templates = [template for template, _ in rows]
+    stored_in_db = {template.id for template, has_image_data in rows if has_image_data}
+    
+    # Popularidad de las plantillas de la página (contadores ya agregados)
+    template_stats = {stats.template_id: stats for stats in TemplateStats.query.filter(
+        TemplateStats.template_id.in_([template.id for template in templates])
+    )} if templates else {}
     
-    # Obtener memes con paginación
-    pagination = MemeTemplate.query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
+    # Filtros actuales para conservarlos en los enlaces de paginación
+    filters = {key: value for key, value in {
+        'q': search,
+        'active': request.args.get('active', ''),
+        'uploaded': request.args.get('uploaded', '')
+    }.items() if value}
     
-    templates = pagination.items
+    pagination = {
+        'has_prev': has_prev and bool(templates),
+        'has_next': has_next and bool(templates),
+        'prev_cursor': templates[0].id if templates else None,
+        'next_cursor': templates[-1].id if templates else None
+    }
     
     return render_template('admin/panel.html', 
                          templates=templates, 
-                         pagination=pagination)
+                         stored_in_db=stored_in_db,
+                         template_stats=template_stats,
+                         pagination=pagination,
+                         filters=filters)
 
 @admin_bp.route("/meme/<int:meme_id>")
 @require_admin_auth
@@ -81,6 +165,7 @@ def delete_meme(meme_id):
         # Eliminar de la base de datos
         db.session.delete(template)
         db.session.commit()
+        template_hash_index.remove(meme_id)
         
         return jsonify({
             "success": True,
@@ -147,39 +232,6 @@ def update_meme_positions(meme_id):
             "error": str(e)
         }), 500
 
-def compress_image(image_data, max_width=800, quality=85):
-    """Comprime una imagen y la convierte a Base64"""
-    try:
-        # Abrir imagen desde bytes
-        img = Image.open(io.BytesIO(image_data))
-        
-        # Convertir a RGB si es necesario (para PNGs con transparencia)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        
-        # Redimensionar si es muy grande
-        if img.width > max_width:
-            ratio = max_width / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Guardar como JPEG comprimido
-        output = io.BytesIO()
-        img.save(output, format='JPEG', quality=quality, optimize=True)
-        compressed_data = output.getvalue()
-        
-        # Convertir a Base64
-        base64_data = base64.b64encode(compressed_data).decode('utf-8')
-        
-        return base64_data, img.width, img.height
-        
-    except Exception as e:
-        raise Exception(f"Error comprimiendo imagen: {str(e)}")
-
 @admin_bp.route("/upload", methods=["POST"])
 @require_admin_auth
 def upload_meme():
@@ -205,58 +257,24 @@ def upload_meme():
         # Leer datos de la imagen
         image_data = file.read()
         
-        # Comprimir imagen
-        base64_data, width, height = compress_image(image_data)
+        # Comprimir imagen y calcular su hash perceptual
+        base64_data, width, height, phash = prepare_template_image(image_data)
+        
+        # Buscar plantillas duplicadas o casi iguales ya subidas
+        duplicates = find_similar_templates(phash, DUPLICATE_MAX_DISTANCE, limit=5)
         
         # Crear plantilla en la base de datos
-        template = MemeTemplate(
-            name=name,
-            image_data=base64_data,
-            image_filename=secure_filename(file.filename),
-            image_mimetype=file.content_type,
-            image_width=width,
-            image_height=height,
-            num_text_boxes=2,  # Por defecto usar 2 cajas
-            text1_label="Texto 1",
-            text1_x=50.0,
-            text1_y=20.0,
-            text1_size=24,
-            text1_width=30.0,
-            text1_height=10.0,
-            text2_label="Texto 2",
-            text2_x=50.0,
-            text2_y=80.0,
-            text2_size=24,
-            text2_width=30.0,
-            text2_height=10.0,
-            text3_label="Texto 3",
-            text3_x=50.0,
-            text3_y=50.0,
-            text3_size=24,
-            text3_width=30.0,
-            text3_height=10.0,
-            text4_label="Texto 4",
-            text4_x=25.0,
-            text4_y=35.0,
-            text4_size=24,
-            text4_width=30.0,
-            text4_height=10.0,
-            text5_label="Texto 5",
-            text5_x=75.0,
-            text5_y=65.0,
-            text5_size=24,
-            text5_width=30.0,
-            text5_height=10.0,
-            active=True
-        )
+        template = build_meme_template(name, base64_data, file.filename, file.content_type, width, height, phash)
         
         db.session.add(template)
         db.session.commit()
+        template_hash_index.add(template.id, phash)
         
         return jsonify({
             "success": True,
             "message": "Meme subido correctamente",
             "id": template.id,
+            "duplicates": duplicates,
             "redirect": f"/admin/dynamic-editor/{template.id}"
         })
         
@@ -267,6 +285,266 @@ def upload_meme():
             "error": str(e)
         }), 500
 
+@admin_bp.route("/upload-bulk", methods=["POST"])
+@require_admin_auth
+def upload_memes_bulk():
+    """Subida masiva de plantillas (varios archivos o un .zip) procesada en segundo plano"""
+    # Las imágenes se copian a disco y el proceso en segundo plano las lee de una en una
+    workdir = tempfile.mkdtemp(prefix='bulk_upload_')
+    try:
+        items, skipped = extract_upload_items(
+            request.files.getlist('images'),
+            request.files.get('archive'),
+            workdir
+        )
+        
+        if not items:
+            shutil.rmtree(workdir, ignore_errors=True)
+            return jsonify({
+                "success": False,
+                "error": "No se encontraron imágenes válidas",
+                "skipped": skipped
+            }), 400
+        
+        # El cliente manda su ID para no perder el progreso que llegue antes de esta respuesta
+        job_id = request.form.get('job_id', '')
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            job_id = uuid.uuid4().hex
+        socketio.start_background_task(
+            run_bulk_upload, current_app._get_current_object(), job_id, items, workdir
+        )
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "total": len(items),
+            "skipped": skipped
+        }), 202
+        
+    except Exception as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@socketio.on('join_admin_uploads')
+def on_join_admin_uploads(data=None):
+    """Suscribir a un administrador al progreso de las subidas masivas"""
+    if session.get('admin_authenticated'):
+        join_room(ADMIN_UPLOADS_ROOM)
+
+@admin_bp.route("/meme/<int:meme_id>/similar")
+@require_admin_auth
+def similar_memes(meme_id):
+    """Buscar plantillas parecidas a una plantilla por distancia de hash perceptual"""
+    template = MemeTemplate.query.get_or_404(meme_id)
+    
+    if not template.phash:
+        return jsonify({"success": False, "error": "La plantilla no tiene hash perceptual"}), 400
+    
+    max_distance = min(request.args.get('max_distance', SIMILAR_MAX_DISTANCE, type=int), 32)
+    similar = find_similar_templates(template.phash, max_distance, exclude_id=template.id)
+    
+    return jsonify({
+        "success": True,
+        "id": template.id,
+        "similar": similar
+    })
+
+@admin_bp.route("/rate-limits")
+@require_admin_auth
+def rate_limit_stats():
+    """Carga descartada por el token bucket de los endpoints de polling"""
+    return jsonify({
+        "success": True,
+        "storage": current_app.config['RATE_LIMIT_STORAGE'],
+        "endpoints": rate_limiter.get_stats()
+    })
+
+@admin_bp.route("/slow-queries")
+@require_admin_auth
+def slow_queries():
+    """Consultas por encima de SLOW_QUERY_MS agrupadas por sentencia, las peores primero"""
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'max_ms', 'avg_ms', 'count'):
+        return jsonify({"success": False, "error": f"Orden inválido: {sort}"}), 400
+    return jsonify({
+        "success": True,
+        "threshold_ms": current_app.config['SLOW_QUERY_MS'],
+        "statements": slow_query_log.summary(sort, request.args.get('limit', 50, type=int))
+    })
+
+@admin_bp.route("/slow-queries/reset", methods=["POST"])
+@require_admin_auth
+def reset_slow_queries():
+    """Vaciar el registro de consultas lentas"""
+    slow_query_log.reset()
+    return jsonify({"success": True})
+
+def profiling_group_by():
+    group_by = request.args.get('group', 'lineno')
+    if group_by not in SNAPSHOT_GROUPS:
+        raise ValueError(f"Agrupación inválida: {group_by}")
+    return group_by
+
+@admin_bp.route("/profiling")
+@require_admin_auth
+def profiling_status():
+    """RSS, GC, estado de tracemalloc y tamaño de las cachés en memoria"""
+    from blueprints.game.voting_cache import voting_page_cache, voting_round_cache
+    from blueprints.game.matchmaking import matchmaking_index
+    return jsonify({
+        "success": True,
+        "memory": memory_stats(),
+        "snapshots": list_snapshots(),
+        "caches": {
+            "voting_page_cache": len(voting_page_cache),
+            "voting_round_cache": len(voting_round_cache),
+            "matchmaking_index": len(matchmaking_index)
+        }
+    })
+
+@admin_bp.route("/profiling/tracemalloc/start", methods=["POST"])
+@require_admin_auth
+def profiling_start():
+    """Arrancar tracemalloc (frames: marcos de pila por reserva)"""
+    frames = request.args.get('frames', DEFAULT_TRACE_FRAMES, type=int)
+    return jsonify({"success": True, "frames": start_tracing(min(frames, 50))})
+
+@admin_bp.route("/profiling/tracemalloc/stop", methods=["POST"])
+@require_admin_auth
+def profiling_stop():
+    """Parar tracemalloc y liberar sus trazas e instantáneas"""
+    stop_tracing()
+    return jsonify({"success": True})
+
+@admin_bp.route("/profiling/snapshot", methods=["POST"])
+@require_admin_auth
+def profiling_snapshot():
+    """Tomar una instantánea de tracemalloc y devolver sus mayores consumidores"""
+    try:
+        group_by = profiling_group_by()
+        name = take_snapshot(request.args.get('name') or None)
+    except (RuntimeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({
+        "success": True,
+        "name": name,
+        "top": snapshot_top(name, group_by, request.args.get('limit', 25, type=int))
+    })
+
+@admin_bp.route("/profiling/snapshot/<name>")
+@require_admin_auth
+def profiling_snapshot_top(name):
+    """Mayores consumidores de una instantánea ya tomada"""
+    try:
+        top = snapshot_top(name, profiling_group_by(), request.args.get('limit', 25, type=int))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except KeyError as e:
+        return jsonify({"success": False, "error": e.args[0]}), 404
+    return jsonify({"success": True, "name": name, "top": top})
+
+@admin_bp.route("/profiling/diff")
+@require_admin_auth
+def profiling_diff():
+    """Crecimiento entre dos instantáneas (from/to; por defecto las dos últimas)"""
+    try:
+        diff = snapshot_diff(
+            request.args.get('from') or None,
+            request.args.get('to') or None,
+            profiling_group_by(),
+            request.args.get('limit', 25, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except KeyError as e:
+        return jsonify({"success": False, "error": e.args[0]}), 404
+    return jsonify({"success": True, "diff": diff})
+
+@admin_bp.route("/profiling/objects")
+@require_admin_auth
+def profiling_objects():
+    """Instancias vivas de cada modelo del ORM en el proceso"""
+    return jsonify({
+        "success": True,
+        "objects": orm_object_counts(db.Model),
+        "session_identity_map": len(db.session.identity_map)
+    })
+
+@admin_bp.route("/export/<kind>")
+@require_admin_auth
+@read_only
+def export_history(kind):
+    """
+    Exportar partidas, memes enviados o votos en NDJSON o CSV, en streaming.
+    Filtros: since/until (fecha de creación, YYYY-MM-DD) y status (de la partida).
+    """
+    if kind not in EXPORT_KINDS:
+        return jsonify({"error": f"Tipo de exportación inválido: {kind}"}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Formato inválido: {fmt}"}), 400
+    try:
+        since = parse_date(request.args.get('since'))
+        until = parse_date(request.args.get('until'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    chunks = stream_export(kind, fmt, since, until, request.args.get('status') or None)
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@admin_bp.cli.command('export')
+@click.argument('kind', type=click.Choice(sorted(EXPORT_KINDS)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='ndjson')
+@click.option('--since', help='Desde esta fecha de creación (YYYY-MM-DD)')
+@click.option('--until', help='Hasta esta fecha de creación, sin incluirla (YYYY-MM-DD)')
+@click.option('--status', help='Solo partidas con este estado (waiting, started, finished, completed)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Archivo de salida (por defecto stdout)')
+def export_history_command(kind, fmt, since, until, status, output):
+    """Exportar el historial de partidas, memes enviados o votos"""
+    try:
+        since, until = parse_date(since), parse_date(until)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    
+    out = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    try:
+        for chunk in stream_export(kind, fmt, since, until, status):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+    if output:
+        print(f"✅ Exportación de {kind} guardada en {output}", file=sys.stderr)
+
+@admin_bp.cli.command('backfill-phash')
+def backfill_phash():
+    """Calcular el hash perceptual de las plantillas que no lo tienen"""
+    missing = MemeTemplate.query.filter(
+        MemeTemplate.phash.is_(None),
+        MemeTemplate.image_data.isnot(None)
+    ).all()
+    
+    for template in missing:
+        try:
+            template.phash = format_phash(compute_dhash(base64.b64decode(template.image_data)))
+        except Exception as e:
+            print(f"⚠️ No se pudo calcular el hash de la plantilla {template.id}: {str(e)}")
+    
+    db.session.commit()
+    print(f"✅ Hash perceptual calculado para {len(missing)} plantillas")
+
+@admin_bp.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Crear o reconstruir el índice de búsqueda por nombre de las plantillas"""
+    dialect = install_search_index()
+    print(f"✅ Índice de búsqueda de plantillas listo ({dialect})")
+
 @admin_bp.route("/editor/<int:meme_id>")
 @require_admin_auth
 def visual_editor(meme_id):
@@ -279,10 +557,36 @@ def visual_editor(meme_id):
 def dynamic_editor(meme_id):
     """Editor dinámico para configurar número variable de cajas de texto"""
     template = MemeTemplate.query.get_or_404(meme_id)
-    return render_template('admin/dynamic_editor.html', template=template)
+    # Valores por defecto (las cajas 3-5 pueden estar vacías en plantillas antiguas)
+    defaults = {
+        1: ('Texto 1', 50.0, 20.0),
+        2: ('Texto 2', 50.0, 80.0),
+        3: ('Texto 3', 50.0, 50.0),
+        4: ('Texto 4', 25.0, 35.0),
+        5: ('Texto 5', 75.0, 65.0),
+    }
+    text_boxes = []
+    for i in range(1, 6):
+        config = {}
+        label, x, y = defaults[i]
+        for field, default in (('label', label), ('x', x), ('y', y), ('size', 24),
+                               ('width', 30.0), ('height', 10.0)):
+            value = getattr(template, f'text{i}_{field}')
+            config[field] = value if value is not None else default
+        text_boxes.append(config)
+    return render_template('admin/dynamic_editor.html',
+                         template=template,
+                         page_data={
+                             'template': {
+                                 'id': template.id,
+                                 'num_text_boxes': template.num_text_boxes,
+                                 'textBoxes': text_boxes
+                             }
+                         })
 
 @admin_bp.route("/image/<int:meme_id>")
 @require_admin_auth
+@read_only
 def serve_meme_image(meme_id):
     """Servir imagen de meme desde la base de datos (solo para admin)"""
     template = MemeTemplate.query.get_or_404(meme_id)
@@ -304,6 +608,7 @@ def serve_meme_image(meme_id):
         return "Imagen no encontrada", 404
 
 @admin_bp.route("/public-image/<int:meme_id>")
+@read_only
 def serve_public_meme_image(meme_id):
     """Servir imagen de meme públicamente (para el juego)"""
     template = MemeTemplate.query.get_or_404(meme_id)
@@ -0,0 +1,76 @@
+"""Búsqueda por nombre de plantillas con índice de texto (FTS5 en SQLite, trigramas en Postgres)"""
+from sqlalchemy import DDL, event, literal_column, select, text
+from models import db, MemeTemplate
+import re
+
+# Bases de datos (por URL) donde ya se comprobó si existe la tabla FTS
+_fts_available = {}
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS meme_template_fts
+       USING fts5(name, content='meme_template', content_rowid='id')""",
+    """CREATE TRIGGER IF NOT EXISTS meme_template_fts_insert AFTER INSERT ON meme_template BEGIN
+         INSERT INTO meme_template_fts(rowid, name) VALUES (new.id, new.name);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS meme_template_fts_delete AFTER DELETE ON meme_template BEGIN
+         INSERT INTO meme_template_fts(meme_template_fts, rowid, name) VALUES ('delete', old.id, old.name);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS meme_template_fts_update AFTER UPDATE OF name ON meme_template BEGIN
+         INSERT INTO meme_template_fts(meme_template_fts, rowid, name) VALUES ('delete', old.id, old.name);
+         INSERT INTO meme_template_fts(rowid, name) VALUES (new.id, new.name);
+       END""",
+]
+
+POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE INDEX IF NOT EXISTS idx_meme_template_name_trgm
+       ON meme_template USING gin (name gin_trgm_ops)""",
+]
+
+# Crear el índice junto con la tabla (db.create_all)
+for statement in SQLITE_FTS_DDL:
+    event.listen(MemeTemplate.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_TRGM_DDL:
+    event.listen(MemeTemplate.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+def install_search_index():
+    """Crear (o reconstruir) el índice de búsqueda en una base de datos existente"""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as connection:
+        if dialect == 'sqlite':
+            for statement in SQLITE_FTS_DDL:
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO meme_template_fts(meme_template_fts) VALUES ('rebuild')"))
+            _fts_available.pop(str(db.engine.url), None)
+        elif dialect == 'postgresql':
+            for statement in POSTGRES_TRGM_DDL:
+                connection.execute(text(statement))
+    return dialect
+
+def _fts_query(search):
+    """Convertir el texto buscado en una consulta FTS5 de prefijos ("dra"* "meme"*)"""
+    words = re.findall(r'\w+', search, flags=re.UNICODE)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def _has_fts_table():
+    url = str(db.engine.url)
+    if url not in _fts_available:
+        _fts_available[url] = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meme_template_fts'")
+        ).first() is not None
+    return _fts_available[url]
+
+def apply_name_search(query, search):
+    """Filtrar una consulta de plantillas por nombre usando el índice disponible"""
+    if db.engine.dialect.name == 'sqlite' and _has_fts_table():
+        fts_query = _fts_query(search)
+        if not fts_query:
+            return query
+        matching_ids = select(literal_column('rowid')).select_from(
+            text('meme_template_fts')
+        ).where(text('meme_template_fts MATCH :fts_query').bindparams(fts_query=fts_query))
+        return query.filter(MemeTemplate.id.in_(matching_ids))
+
+    # Postgres usa el índice de trigramas para ILIKE '%...%'
+    # (SQLite sin tabla FTS: ver 'flask admin rebuild-search-index')
+    return query.filter(MemeTemplate.name.ilike(f"%{search}%"))
@@ -0,0 +1,122 @@
+"""Índice en memoria de hashes perceptuales para detectar plantillas duplicadas"""
+from models import db, MemeTemplate
+import threading
+
+# Distancia de Hamming máxima para considerar dos plantillas como duplicadas
+DUPLICATE_MAX_DISTANCE = 6
+
+# Distancia por defecto para la búsqueda de plantillas similares
+SIMILAR_MAX_DISTANCE = 12
+
+class BKTree:
+    """
+    Árbol BK sobre la distancia de Hamming: cada hijo cuelga de su padre según la
+    distancia entre ambos, y la desigualdad triangular permite descartar ramas
+    completas al buscar, sin comparar contra todo el catálogo.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item_id):
+        node = [value, [item_id], {}]
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return
+
+        current = self.root
+        while True:
+            distance = (current[0] ^ value).bit_count()
+            if distance == 0:
+                # Hash idéntico: se agrupa en el mismo nodo
+                current[1].append(item_id)
+                self.size += 1
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self.size += 1
+                return
+            current = child
+
+    def search(self, value, max_distance):
+        """Devolver [(distancia, id)] de los elementos a distancia <= max_distance"""
+        results = []
+        if self.root is None:
+            return results
+
+        stack = [self.root]
+        while stack:
+            node_value, item_ids, children = stack.pop()
+            distance = (node_value ^ value).bit_count()
+            if distance <= max_distance:
+                results.extend((distance, item_id) for item_id in item_ids)
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        results.sort()
+        return results
+
+class TemplateHashIndex:
+    """Índice de plantillas por hash perceptual, cargado una vez desde la base de datos"""
+
+    # Reconstruir el árbol cuando haya muchas plantillas eliminadas
+    MAX_TOMBSTONES = 256
+
+    def __init__(self):
+        self._tree = None
+        self._removed = set()
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._tree is not None and len(self._removed) < self.MAX_TOMBSTONES:
+            return
+        tree = BKTree()
+        rows = db.session.query(MemeTemplate.id, MemeTemplate.phash).filter(
+            MemeTemplate.phash.isnot(None)
+        ).all()
+        for template_id, phash in rows:
+            tree.add(int(phash, 16), template_id)
+        self._tree = tree
+        self._removed = set()
+        print(f"🔍 Índice de hashes perceptuales cargado: {tree.size} plantillas")
+
+    def add(self, template_id, phash):
+        with self._lock:
+            if self._tree is None:
+                # Se cargará completo (incluyendo esta fila) en la primera búsqueda
+                return
+            self._removed.discard(template_id)
+            self._tree.add(int(phash, 16), template_id)
+
+    def remove(self, template_id):
+        with self._lock:
+            if self._tree is not None:
+                self._removed.add(template_id)
+
+    def search(self, phash, max_distance, exclude_id=None):
+        with self._lock:
+            self._ensure_loaded()
+            matches = self._tree.search(int(phash, 16), max_distance)
+            removed = set(self._removed)
+        return [(distance, template_id) for distance, template_id in matches
+                if template_id not in removed and template_id != exclude_id]
+
+template_hash_index = TemplateHashIndex()
+
+def find_similar_templates(phash, max_distance, exclude_id=None, limit=20):
+    """Plantillas parecidas a un hash, con nombre y distancia, ordenadas por distancia"""
+    matches = template_hash_index.search(phash, max_distance, exclude_id=exclude_id)[:limit]
+    if not matches:
+        return []
+
+    names = dict(db.session.query(MemeTemplate.id, MemeTemplate.name).filter(
+        MemeTemplate.id.in_([template_id for _, template_id in matches])
+    ).all())
+    return [
+        {"id": template_id, "name": names[template_id], "distance": distance}
+        for distance, template_id in matches if template_id in names
+    ]
@@ -0,0 +1,297 @@
+"""Subida de plantillas: creación de filas y pipeline de subida masiva en segundo plano"""
+from concurrent.futures import wait
+from werkzeug.utils import secure_filename
+from models import db, MemeTemplate
+from extensions import socketio
+from imaging import prepare_template_image, submit_image_task
+from blueprints.admin.similarity import (
+    DUPLICATE_MAX_DISTANCE, BKTree, find_similar_templates, template_hash_index
+)
+from config import Config
+import logging
+import os
+import shutil
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Sala de Socket.IO donde los administradores reciben el progreso
+ADMIN_UPLOADS_ROOM = 'admin_uploads'
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
+
+# Filas de MemeTemplate insertadas por commit
+BULK_INSERT_BATCH_SIZE = 25
+
+# Bloque de lectura al copiar los archivos subidos a disco
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def build_meme_template(name, base64_data, filename, mimetype, width, height, phash=None):
+    """Crear una plantilla con la configuración de texto por defecto"""
+    return MemeTemplate(
+        name=name,
+        image_data=base64_data,
+        phash=phash,
+        image_filename=secure_filename(filename),
+        image_mimetype=mimetype,
+        image_width=width,
+        image_height=height,
+        num_text_boxes=2,  # Por defecto usar 2 cajas
+        text1_label="Texto 1",
+        text1_x=50.0,
+        text1_y=20.0,
+        text1_size=24,
+        text1_width=30.0,
+        text1_height=10.0,
+        text2_label="Texto 2",
+        text2_x=50.0,
+        text2_y=80.0,
+        text2_size=24,
+        text2_width=30.0,
+        text2_height=10.0,
+        text3_label="Texto 3",
+        text3_x=50.0,
+        text3_y=50.0,
+        text3_size=24,
+        text3_width=30.0,
+        text3_height=10.0,
+        text4_label="Texto 4",
+        text4_x=25.0,
+        text4_y=35.0,
+        text4_size=24,
+        text4_width=30.0,
+        text4_height=10.0,
+        text5_label="Texto 5",
+        text5_x=75.0,
+        text5_y=65.0,
+        text5_size=24,
+        text5_width=30.0,
+        text5_height=10.0,
+        active=True
+    )
+
+def _is_image_filename(filename):
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+def _save_upload(stream, path, max_bytes):
+    """Copiar un archivo subido a disco por bloques; False si supera max_bytes"""
+    written = 0
+    with open(path, 'wb') as f:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return True
+            written += len(chunk)
+            if written > max_bytes:
+                return False
+            f.write(chunk)
+
+def extract_upload_items(files, archive, workdir):
+    """
+    Reunir las imágenes de una subida masiva (archivos sueltos y/o un .zip).
+    Los archivos se copian a workdir sin cargarlos en memoria y del .zip solo se
+    leen las entradas; los bytes se leen con read_upload_item cuando cada imagen
+    entra en el pool. Devuelve (items, skipped) donde skipped lista los archivos
+    descartados y el motivo.
+    """
+    items = []
+    skipped = []
+    max_files = Config.BULK_UPLOAD_MAX_FILES
+    max_bytes = Config.BULK_UPLOAD_MAX_FILE_BYTES
+
+    def add_item(filename, path, member=None):
+        items.append({
+            "filename": filename,
+            "name": os.path.splitext(os.path.basename(filename))[0],
+            "path": path,
+            "member": member
+        })
+
+    for file in files:
+        if not file or file.filename == '':
+            continue
+        if not (file.content_type or '').startswith('image/') and not _is_image_filename(file.filename):
+            skipped.append({"filename": file.filename, "error": "El archivo debe ser una imagen"})
+            continue
+        if len(items) >= max_files:
+            skipped.append({"filename": file.filename, "error": "Límite de archivos alcanzado"})
+            continue
+        path = os.path.join(workdir, f"{len(items)}.upload")
+        if not _save_upload(file.stream, path, max_bytes):
+            os.remove(path)
+            skipped.append({"filename": file.filename, "error": "Archivo demasiado grande"})
+            continue
+        add_item(file.filename, path)
+
+    if archive and archive.filename:
+        path = os.path.join(workdir, 'archive.zip')
+        archive.save(path)
+        try:
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    filename = info.filename
+                    if info.is_dir() or filename.startswith('__MACOSX/') or os.path.basename(filename).startswith('.'):
+                        continue
+                    if not _is_image_filename(filename):
+                        skipped.append({"filename": filename, "error": "No es una imagen"})
+                        continue
+                    # Revisar el tamaño declarado antes de descomprimir
+                    if info.file_size > max_bytes:
+                        skipped.append({"filename": filename, "error": "Archivo demasiado grande"})
+                        continue
+                    if len(items) >= max_files:
+                        skipped.append({"filename": filename, "error": "Límite de archivos alcanzado"})
+                        continue
+                    add_item(filename, path, info.filename)
+        except zipfile.BadZipFile:
+            skipped.append({"filename": archive.filename, "error": "Archivo .zip inválido"})
+
+    return items, skipped
+
+def read_upload_item(item, archives):
+    """
+    Bytes de una imagen de la subida. archives guarda los .zip ya abiertos
+    (ruta -> ZipFile) para no releer su índice en cada entrada.
+    """
+    max_bytes = Config.BULK_UPLOAD_MAX_FILE_BYTES
+    if item["member"] is None:
+        with open(item["path"], 'rb') as f:
+            data = f.read()
+        os.remove(item["path"])
+        return data
+
+    zf = archives.get(item["path"])
+    if zf is None:
+        zf = archives[item["path"]] = zipfile.ZipFile(item["path"])
+    # El tamaño declarado en el .zip puede mentir: no descomprimir más del límite
+    with zf.open(item["member"]) as member:
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError("Archivo demasiado grande")
+    return data
+
+def _flush_batch(batch):
+    """Insertar un lote de plantillas; devuelve los IDs creados"""
+    if not batch:
+        return []
+    try:
+        db.session.add_all(batch)
+        db.session.commit()
+        for template in batch:
+            template_hash_index.add(template.id, template.phash)
+        return [template.id for template in batch]
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error insertando lote de plantillas: %s", e)
+        return []
+    finally:
+        batch.clear()
+
+def run_bulk_upload(app, job_id, items, workdir):
+    """
+    Procesar una subida masiva en segundo plano: cada imagen se lee del disco al
+    entrar en el pool de procesos (con un número acotado de tareas en vuelo),
+    donde se decodifica, redimensiona, comprime y se le calcula el hash
+    perceptual. Las casi idénticas a otra de la misma subida se descartan, el
+    progreso se emite por Socket.IO y las filas se insertan por lotes. Al
+    terminar se borra workdir.
+    """
+    total = len(items)
+    processed = 0
+    created_ids = []
+    failed = 0
+    duplicated = 0
+    batch = []
+    batch_hashes = BKTree()  # hashes aceptados en esta subida -> índice del item
+    pending = {}
+    archives = {}
+    queue = iter(enumerate(items))
+    max_in_flight = max(Config.IMAGE_WORKERS, 1) * 2
+
+    def emit_progress(index, item, **fields):
+        nonlocal processed
+        processed += 1
+        socketio.emit('bulk_upload_progress', dict({
+            "job_id": job_id,
+            "index": index,
+            "filename": item["filename"],
+            "processed": processed,
+            "total": total
+        }, **fields), room=ADMIN_UPLOADS_ROOM)
+
+    try:
+        with app.app_context():
+            while True:
+                # Mantener el pool ocupado sin cargar todas las imágenes a la vez
+                while len(pending) < max_in_flight:
+                    next_item = next(queue, None)
+                    if next_item is None:
+                        break
+                    index, item = next_item
+                    try:
+                        data = read_upload_item(item, archives)
+                    except Exception as e:
+                        failed += 1
+                        emit_progress(index, item, status="error", error=str(e))
+                        continue
+                    pending[submit_image_task(prepare_template_image, data)] = (index, item)
+
+                if not pending:
+                    break
+
+                done, _ = wait(list(pending), timeout=0)
+                if not done:
+                    # Ceder el control (compatible con eventlet y threading)
+                    socketio.sleep(0.05)
+                    continue
+
+                for future in done:
+                    index, item = pending.pop(future)
+                    try:
+                        base64_data, width, height, phash = future.result()
+                    except Exception as e:
+                        failed += 1
+                        emit_progress(index, item, status="error", error=str(e))
+                        continue
+
+                    # La misma imagen subida dos veces en el mismo lote solo se crea una vez
+                    twins = batch_hashes.search(int(phash, 16), DUPLICATE_MAX_DISTANCE)
+                    if twins:
+                        duplicated += 1
+                        emit_progress(index, item, status="duplicate",
+                                      duplicate_of=items[twins[0][1]]["filename"])
+                        continue
+                    batch_hashes.add(int(phash, 16), index)
+
+                    batch.append(build_meme_template(
+                        item["name"], base64_data, item["filename"], 'image/jpeg', width, height, phash
+                    ))
+                    # Marcar posibles duplicados del catálogo existente
+                    emit_progress(index, item, status="ok",
+                                  duplicates=find_similar_templates(phash, DUPLICATE_MAX_DISTANCE, limit=5))
+
+                if len(batch) >= BULK_INSERT_BATCH_SIZE:
+                    batch_size = len(batch)
+                    ids = _flush_batch(batch)
+                    failed += batch_size - len(ids)
+                    created_ids.extend(ids)
+
+            batch_size = len(batch)
+            ids = _flush_batch(batch)
+            failed += batch_size - len(ids)
+            created_ids.extend(ids)
+    finally:
+        for zf in archives.values():
+            zf.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    socketio.emit('bulk_upload_done', {
+        "job_id": job_id,
+        "total": total,
+        "created": len(created_ids),
+        "failed": failed,
+        "duplicated": duplicated,
+        "ids": created_ids
+    }, room=ADMIN_UPLOADS_ROOM)
+    logger.info("Subida masiva %s: %d creadas, %d repetidas, %d con error",
+                job_id, len(created_ids), duplicated, failed)
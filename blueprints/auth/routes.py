@@ -55,8 +55,12 @@ def logout():
                 # Liberar al usuario de la partida
                 game = Game.query.get(user.game_id)
                 if game and game.status == 'waiting':  # Solo si la partida no ha empezado
+                    from blueprints.game.routes import refresh_matchmaking, release_seat
                     user.game_id = None
+                    release_seat(game.id)
                     db.session.commit()
+                    db.session.refresh(game)
+                    refresh_matchmaking(game)
         except Exception as e:
             print(f"Error al liberar usuario de partida durante logout: {str(e)}")
             db.session.rollback()
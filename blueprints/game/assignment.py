@@ -0,0 +1,48 @@
+"""
+Reparto de memes a votar en las salas grandes.
+
+Con cientos de jugadores no se puede pedir a cada uno que vote todos los memes
+de la ronda: cada votante recibe k memes. Los memes se barajan con la semilla de
+la partida y cada votante toma un tramo consecutivo de k posiciones empezando
+en p*n/m (p = su posición entre los m votantes, n = número de memes). Los tramos
+quedan repartidos de forma uniforme por el círculo, así que cada meme recibe
+m*k/n votos (±1). Si el tramo contiene el meme del propio votante se salta y se
+toma uno más.
+
+El reparto depende solo de los datos de la ronda, así que la página de votación
+y la validación de los votos lo calculan por separado y obtienen el mismo.
+"""
+from bisect import bisect_left
+import hashlib
+from blueprints.game.sampler import SeededPermutation
+
+def assigned_memes(voter_id, voter_ids, meme_ids, author_of, k, seed):
+    """
+    IDs de los memes que voter_id debe votar (como mucho k, nunca el suyo).
+
+    voter_ids y meme_ids van ordenados; author_of: {meme_id: user_id}.
+    """
+    n = len(meme_ids)
+    position = bisect_left(voter_ids, voter_id)
+    if n == 0 or position == len(voter_ids) or voter_ids[position] != voter_id:
+        return []
+    permutation = SeededPermutation(n, seed)
+    start = position * n // len(voter_ids)
+
+    assigned = []
+    for offset in range(n):
+        if len(assigned) == k:
+            break
+        meme_id = meme_ids[permutation[(start + offset) % n]]
+        if author_of.get(meme_id) != voter_id:
+            assigned.append(meme_id)
+    return assigned
+
+def round_seed(game, round_number=None):
+    """
+    Semilla del reparto de una ronda (por defecto la actual). No depende de la
+    semilla de plantillas, que cambia al rebarajar el catálogo a mitad de partida.
+    """
+    round_number = game.current_round if round_number is None else round_number
+    digest = hashlib.blake2b(f"{game.id}:{game.code}:{round_number}".encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') & 0x7fffffff
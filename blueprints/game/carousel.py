@@ -0,0 +1,107 @@
+"""
+Carrusel de votación dirigido por el servidor.
+
+El orden de los memes y el inicio de la votación (Game.voting_started_at) fijan
+el calendario de la ronda: el meme i se muestra de inicio + i*duración a
+inicio + (i+1)*duración. Una tarea en segundo plano por partida publica en la
+sala cada cambio de meme (índice, fin del turno y el meme siguiente para
+precargarlo), así todos los jugadores ven el mismo meme a la vez sin pedir el
+estado por HTTP. Al terminar publica 'voting_finished'.
+
+Las tareas viven en el proceso que sirve la partida; si el servidor se reinicia,
+la siguiente carga de la página de votación retoma el calendario donde iba.
+"""
+from blueprints.game import events
+from extensions import socketio
+from datetime import datetime
+import threading
+import time
+
+_lock = threading.Lock()
+_running = {}  # sala -> (ronda, inicio, duración, memes) del carrusel en marcha
+
+def carousel_position(started_at, seconds_per_meme, now=None):
+    """Índice del meme que toca mostrar y segundos que le quedan"""
+    now = now or datetime.utcnow()
+    elapsed = max(0.0, (now - started_at).total_seconds())
+    index = int(elapsed // seconds_per_meme)
+    return index, seconds_per_meme - (elapsed - index * seconds_per_meme)
+
+def build_state(round_number, started_at, seconds_per_meme, memes, now=None):
+    """Estado del carrusel que se envía a los clientes (meme actual y siguiente)"""
+    index, remaining = carousel_position(started_at, seconds_per_meme, now)
+    server_now = time.time()
+    finished = index >= len(memes)
+    return {
+        'round': round_number,
+        'index': index,
+        'total': len(memes),
+        'finished': finished,
+        'meme': None if finished else memes[index],
+        'next': memes[index + 1] if index + 1 < len(memes) else None,
+        # Reloj del servidor en ms: el cliente corrige su desfase con server_now
+        'deadline': None if finished else int((server_now + remaining) * 1000),
+        'server_now': int(server_now * 1000)
+    }
+
+def _run(room, round_number):
+    last_index = None
+    while True:
+        with _lock:
+            current = _running.get(room)
+            if current is None or current[0] != round_number:
+                return  # Ronda avanzada o partida eliminada
+            _, started_at, seconds_per_meme, memes = current
+
+        index, remaining = carousel_position(started_at, seconds_per_meme)
+        if index == last_index:
+            # Despertamos justo antes del cambio de turno
+            socketio.sleep(remaining)
+            continue
+        last_index = index
+
+        if index >= len(memes):
+            with _lock:
+                if _running.get(room, (None,))[0] == round_number:
+                    del _running[room]
+            events.publish(room, 'voting_finished', {'round': round_number})
+            return
+
+        events.publish(room, 'carousel', build_state(round_number, started_at, seconds_per_meme, memes))
+        socketio.sleep(remaining)
+
+def start_carousel(room, round_number, started_at, seconds_per_meme, load_memes):
+    """
+    Poner en marcha el carrusel de la ronda si no lo está ya y devolver su estado
+    actual. load_memes() solo se llama al arrancar: los memes quedan fijados para
+    toda la ronda.
+    """
+    with _lock:
+        current = _running.get(room)
+        if current is not None and current[0] == round_number:
+            _, started_at, seconds_per_meme, memes = current
+            return build_state(round_number, started_at, seconds_per_meme, memes)
+
+    memes = load_memes()
+    with _lock:
+        current = _running.get(room)
+        if current is not None and current[0] == round_number:
+            # Otro jugador lo arrancó mientras cargábamos los memes
+            _, started_at, seconds_per_meme, memes = current
+        else:
+            _running[room] = (round_number, started_at, seconds_per_meme, memes)
+            socketio.start_background_task(_run, room, round_number)
+    return build_state(round_number, started_at, seconds_per_meme, memes)
+
+def current_state(room):
+    """Estado del carrusel en marcha en la sala, o None"""
+    with _lock:
+        current = _running.get(room)
+    if current is None:
+        return None
+    return build_state(*current)
+
+def stop_carousel(room):
+    """Detener el carrusel de la sala (ronda terminada o partida eliminada)"""
+    with _lock:
+        _running.pop(room, None)
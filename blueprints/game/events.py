@@ -0,0 +1,150 @@
+"""
+Eventos de Socket.IO por sala (una sala por partida).
+
+Cada mensaje lleva el estado que cambió y un número de secuencia creciente por
+sala, así los clientes actualizan la página sin volver a pedir el estado por
+HTTP y descartan mensajes repetidos. Las actualizaciones marcadas como
+agrupables (p. ej. la lista de jugadores del lobby) que llegan en ráfaga dentro
+de COALESCE_WINDOW se fusionan en un único mensaje.
+
+Los últimos EVENT_LOG_SIZE eventos de cada sala se guardan en un buffer circular
+para que un cliente que se reconecta reciba solo lo que se perdió.
+"""
+from collections import OrderedDict, deque
+from extensions import socketio
+import threading
+import time
+import uuid
+
+# Ventana (segundos) en la que se agrupan las actualizaciones de una sala
+COALESCE_WINDOW = 0.15
+
+# Identifica este proceso: si el servidor se reinicia las secuencias vuelven a empezar
+EPOCH = uuid.uuid4().hex[:8]
+
+# Eventos recientes guardados por sala y salas con historial en memoria
+EVENT_LOG_SIZE = 64
+MAX_LOGGED_ROOMS = 1000
+
+# Segundos que se conserva el estado de una sala terminada (reconexiones al podio)
+FINISHED_ROOM_TTL = 300
+
+_lock = threading.Lock()
+_room_seq = {}  # sala -> último número de secuencia emitido
+_pending = {}  # sala -> {evento: estado fusionado} a la espera de la ventana
+_room_log = OrderedDict()  # sala -> deque[(seq, evento, payload)], la más antigua primero
+_emit_locks = {}  # sala -> lock que mantiene el orden de emisión de la sala
+_expiring = deque()  # (hora, sala) de las salas terminadas, por orden de expiración
+
+def _next_seq(room):
+    seq = _room_seq.get(room, 0) + 1
+    _room_seq[room] = seq
+    return seq
+
+def _record_locked(room, event, state):
+    """Asignar el siguiente número de secuencia y guardar el evento (requiere _lock)"""
+    seq = _next_seq(room)
+    payload = dict(state, seq=seq, epoch=EPOCH)
+
+    log = _room_log.get(room)
+    if log is None:
+        log = _room_log[room] = deque(maxlen=EVENT_LOG_SIZE)
+        if len(_room_log) > MAX_LOGGED_ROOMS:
+            _room_log.popitem(last=False)
+    else:
+        _room_log.move_to_end(room)
+    log.append((seq, event, payload))
+    return event, payload
+
+def _take_pending_locked(room):
+    return [_record_locked(room, event, state) for event, state in _pending.pop(room, {}).items()]
+
+def _emit_in_order(room, record):
+    """
+    Numerar los eventos con record() bajo _lock y emitirlos ya sin él: un emit
+    lento no frena al resto de salas. El lock de la sala mantiene el orden de
+    sus mensajes entre hilos.
+    """
+    with _lock:
+        room_lock = _emit_locks.setdefault(room, threading.Lock())
+    with room_lock:
+        with _lock:
+            _forget_expired_locked()
+            messages = record()
+        for event, payload in messages:
+            socketio.emit(event, payload, room=room)
+    return messages
+
+def _flush_after_window(room):
+    socketio.sleep(COALESCE_WINDOW)
+    _emit_in_order(room, lambda: _take_pending_locked(room))
+
+def publish(room, event, state=None, coalesce=False):
+    """
+    Publicar un evento con su estado en la sala.
+
+    Con coalesce=True el estado se fusiona con el pendiente del mismo evento y se
+    emite al cerrarse la ventana; sin él se emite ya, precedido de lo pendiente
+    para conservar el orden de la sala.
+    """
+    state = state or {}
+    if coalesce:
+        with _lock:
+            room_pending = _pending.get(room)
+            if room_pending is None:
+                room_pending = _pending[room] = {}
+                socketio.start_background_task(_flush_after_window, room)
+            room_pending.setdefault(event, {}).update(state)
+        return
+    _emit_in_order(room, lambda: _take_pending_locked(room) + [_record_locked(room, event, state)])
+
+def current_seq(room):
+    """Último número de secuencia emitido en la sala"""
+    with _lock:
+        return _room_seq.get(room, 0)
+
+def events_since(room, last_seq, epoch):
+    """
+    Eventos de la sala posteriores a last_seq como [(evento, payload)], o None si
+    no se pueden reconstruir (servidor reiniciado o eventos ya fuera del buffer).
+    """
+    with _lock:
+        if epoch != EPOCH:
+            return None
+        current = _room_seq.get(room, 0)
+        if last_seq >= current:
+            return [] if last_seq == current else None
+        log = _room_log.get(room)
+        if not log or log[0][0] > last_seq + 1:
+            return None
+        return [(event, payload) for seq, event, payload in log if seq > last_seq]
+
+def known_rooms():
+    """Salas con eventos emitidos en este proceso"""
+    with _lock:
+        return list(_room_seq)
+
+def _forget_room_locked(room):
+    _room_seq.pop(room, None)
+    _pending.pop(room, None)
+    _room_log.pop(room, None)
+    _emit_locks.pop(room, None)
+
+def _forget_expired_locked():
+    now = time.monotonic()
+    while _expiring and _expiring[0][0] <= now:
+        _forget_room_locked(_expiring.popleft()[1])
+
+def forget_room(room):
+    """Liberar el estado de una sala cuando la partida se elimina"""
+    with _lock:
+        _forget_room_locked(room)
+
+def forget_room_later(room):
+    """
+    Liberar el estado de una sala terminada pasados FINISHED_ROOM_TTL segundos (se
+    revisa al publicar en cualquier sala): hasta entonces las reconexiones aún
+    reciben los últimos eventos.
+    """
+    with _lock:
+        _expiring.append((time.monotonic() + FINISHED_ROOM_TTL, room))
@@ -0,0 +1,69 @@
+"""
+Índice en memoria de las partidas públicas en espera, para el emparejamiento
+rápido sin recorrer la tabla game.
+
+Un heap ordena las partidas por ocupación (la más llena primero, para que
+empiecen antes) y antigüedad. Cada cambio (unión, salida, inicio) mete una
+entrada nueva y deja la anterior obsoleta; las obsoletas se descartan al
+llegar a la cima, así que elegir partida y actualizarla es O(log n).
+
+El índice solo orienta: la plaza se reserva con un UPDATE condicional en la
+base de datos (ver reserve_seat en routes.py), que es lo que impide llenar una
+partida de más cuando varios jugadores entran a la vez.
+"""
+import heapq
+import itertools
+import threading
+
+class MatchmakingIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []  # (-ocupación, creada, versión, game_id)
+        self._games = {}  # game_id -> (versión, código, plazas ocupadas, máximo)
+        self._versions = itertools.count()
+        # Serializa la creación de partidas cuando no queda ninguna con plazas
+        self.creation_lock = threading.Lock()
+        self.loaded = False
+
+    def update(self, game_id, code, seats_taken, max_players, created_at):
+        """Añadir o actualizar una partida pública en espera"""
+        with self._lock:
+            if seats_taken >= max_players:
+                self._games.pop(game_id, None)
+                return
+            version = next(self._versions)
+            self._games[game_id] = (version, code, seats_taken, max_players)
+            fill = seats_taken / max_players
+            heapq.heappush(self._heap, (-fill, created_at.timestamp(), version, game_id))
+
+    def remove(self, game_id):
+        """Quitar una partida (empezó, se llenó o se canceló)"""
+        with self._lock:
+            self._games.pop(game_id, None)
+            # Si el heap está lleno de entradas obsoletas, reconstruirlo
+            if len(self._heap) > 2 * len(self._games) + 64:
+                self._heap = [entry for entry in self._heap
+                              if self._games.get(entry[3], (None,))[0] == entry[2]]
+                heapq.heapify(self._heap)
+
+    def best(self):
+        """(game_id, código) de la mejor partida con plazas libres, o None"""
+        with self._lock:
+            while self._heap:
+                _, _, version, game_id = self._heap[0]
+                current = self._games.get(game_id)
+                if current is not None and current[0] == version:
+                    return game_id, current[1]
+                heapq.heappop(self._heap)
+            return None
+
+    def __len__(self):
+        return len(self._games)
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._games.clear()
+            self.loaded = False
+
+matchmaking_index = MatchmakingIndex()
@@ -0,0 +1,147 @@
+"""Memes renderizados en el servidor: un render por envío, cacheado por hash de contenido"""
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db, RenderedMeme
+from imaging import render_meme, submit_image_task
+from collections import OrderedDict
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+
+RENDER_MIMETYPES = {
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp'
+}
+
+# Renders en curso en el pool de procesos (hash -> Future)
+_pending_renders = {}
+_pending_lock = threading.Lock()
+
+# Renders que fallaron (hash -> hora, el más antiguo primero): no se reintentan
+# hasta pasados RENDER_RETRY_DELAY segundos. Pasado ese tiempo la entrada ya no
+# sirve y se descarta; MAX_FAILED_RENDERS acota ráfagas de fallos.
+_failed_renders = OrderedDict()
+RENDER_RETRY_DELAY = 30
+MAX_FAILED_RENDERS = 1000
+
+class RenderPending(Exception):
+    """El meme todavía se está renderizando en el pool"""
+
+class RenderFailed(Exception):
+    """El render falló hace poco; se reintentará más tarde"""
+
+def _prune_failed_renders(now):
+    """Quitar los fallos que ya se pueden reintentar (requiere _pending_lock)"""
+    while _failed_renders:
+        render_hash, failed_at = next(iter(_failed_renders.items()))
+        if now - failed_at < RENDER_RETRY_DELAY and len(_failed_renders) <= MAX_FAILED_RENDERS:
+            break
+        del _failed_renders[render_hash]
+
+def _record_failure(render_hash):
+    """Anotar un render fallido (requiere _pending_lock)"""
+    now = time.time()
+    _failed_renders.pop(render_hash, None)
+    _failed_renders[render_hash] = now
+    _prune_failed_renders(now)
+
+def _recently_failed(render_hash):
+    """Si el render falló hace menos de RENDER_RETRY_DELAY (requiere _pending_lock)"""
+    _prune_failed_renders(time.time())
+    return render_hash in _failed_renders
+
+def get_template_image_bytes(template):
+    """Bytes originales de la imagen de una plantilla, o None si no está disponible"""
+    if template.image_data:
+        return base64.b64decode(template.image_data)
+    if template.image_path:
+        path = os.path.join(current_app.root_path, template.image_path.lstrip('/'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+    return None
+
+def compute_render_hash(template, texts, output_format):
+    """Hash del contenido del meme: imagen de la plantilla, textos con su posición y formato"""
+    image_source = template.image_data or template.image_path or ''
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha1(image_source.encode('utf-8')).digest())
+    digest.update(json.dumps(texts, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    digest.update(output_format.encode('ascii'))
+    return digest.hexdigest()
+
+def schedule_meme_render(meme, texts):
+    """
+    Lanzar el renderizado de un meme enviado en el pool de procesos.
+    Devuelve el hash de contenido (o None si la plantilla no tiene imagen).
+    """
+    output_format = current_app.config['MEME_RENDER_FORMAT']
+    render_hash = compute_render_hash(meme.template, texts, output_format)
+
+    with _pending_lock:
+        if render_hash in _pending_renders or _recently_failed(render_hash):
+            return render_hash
+
+    if db.session.get(RenderedMeme, render_hash):
+        return render_hash
+
+    image_bytes = get_template_image_bytes(meme.template)
+    if image_bytes is None:
+        return None
+
+    with _pending_lock:
+        if render_hash not in _pending_renders:
+            _pending_renders[render_hash] = submit_image_task(render_meme, image_bytes, texts, output_format)
+    return render_hash
+
+def get_rendered_meme(render_hash):
+    """
+    Obtener un meme renderizado sin bloquear la petición: None si no existe ni
+    está en curso, RenderPending si el pool aún no terminó y RenderFailed si
+    falló hace poco. Un render fallido sale de la lista de pendientes para que
+    se pueda volver a programar.
+    """
+    rendered = db.session.get(RenderedMeme, render_hash)
+    if rendered:
+        return rendered
+
+    with _pending_lock:
+        future = _pending_renders.get(render_hash)
+        if future is None:
+            if _recently_failed(render_hash):
+                raise RenderFailed(render_hash)
+            return None
+    if not future.done():
+        raise RenderPending(render_hash)
+
+    try:
+        image_bytes = future.result()
+    except Exception as e:
+        with _pending_lock:
+            _record_failure(render_hash)
+        raise RenderFailed(render_hash) from e
+    finally:
+        with _pending_lock:
+            if _pending_renders.get(render_hash) is future:
+                del _pending_renders[render_hash]
+
+    output_format = current_app.config['MEME_RENDER_FORMAT']
+    try:
+        rendered = RenderedMeme(
+            content_hash=render_hash,
+            image_data=base64.b64encode(image_bytes).decode('utf-8'),
+            image_mimetype=RENDER_MIMETYPES.get(output_format, 'image/jpeg')
+        )
+        db.session.add(rendered)
+        db.session.commit()
+    except IntegrityError:
+        # Otra petición guardó el mismo render primero
+        db.session.rollback()
+        rendered = db.session.get(RenderedMeme, render_hash)
+
+    with _pending_lock:
+        _failed_renders.pop(render_hash, None)
+    return rendered
@@ -1,8 +1,29 @@
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
+from flask import Blueprint, current_app, request, jsonify, render_template, session, redirect, url_for, make_response, Response
 from flask_socketio import emit, join_room, leave_room
-from models import db, Game, User, MemeTemplate, PlayerTemplate, Vote
+from sqlalchemy import bindparam, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from markupsafe import Markup
+from jinja2.utils import htmlsafe_json_dumps
+from models import db, Game, User, MemeTemplate, PlayerTemplate, Vote, GameResult, PlayerStats
 from extensions import socketio
+from blueprints.game.rendering import RenderFailed, RenderPending, schedule_meme_render, get_rendered_meme
+from blueprints.game.sampler import SeededPermutation
+from blueprints.game.assignment import assigned_memes, round_seed
+from blueprints.game.matchmaking import matchmaking_index
+from blueprints.game.template_stats import get_template_weights, increment_template_stats, weighted_sample
+from blueprints.game.voting_cache import USER_DATA_PLACEHOLDER, voting_page_cache, voting_round_cache
+from blueprints.game import carousel, events
+from static_assets import assets_version
+from rate_limit import rate_limiter
+from db_routing import read_only, use_primary
+from sharding import any_node, shard_map, shard_url
+from collections import Counter
 from datetime import datetime
+from functools import wraps
+import base64
+import hashlib
+import json
 import random, string
 
 game_bp = Blueprint("game", __name__)
@@ -15,14 +36,18 @@ VOTE_POINTS = {
 }
 
 def generate_code(length=6):
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+    """Código de sala atendido por este nodo (ver sharding.py)"""
+    while True:
+        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+        if shard_map.is_local(code):
+            return code
 
 # Cache de IDs de plantillas activas (más seguro que objetos completos)
 _active_template_ids = None
 _cache_timestamp = None
 
-def get_active_templates(force_refresh=False):
-    """Obtener plantillas activas de forma segura para SQLAlchemy"""
+def get_active_template_ids(force_refresh=False):
+    """IDs de plantillas activas en orden ascendente (cacheados 5 minutos)"""
     global _active_template_ids, _cache_timestamp
     
     current_time = datetime.utcnow()
@@ -34,16 +59,12 @@ def get_active_templates(force_refresh=False):
         (current_time - _cache_timestamp).total_seconds() > 300):
         
         # Solo cachear los IDs, no los objetos completos
-        template_ids = db.session.query(MemeTemplate.id).filter_by(active=True).all()
+        template_ids = db.session.query(MemeTemplate.id).filter_by(active=True).order_by(MemeTemplate.id).all()
         _active_template_ids = [t[0] for t in template_ids]  # Extraer solo los IDs
         _cache_timestamp = current_time
         print(f"🔄 Cache de plantillas actualizado: {len(_active_template_ids)} plantillas")
     
-    # Siempre obtener objetos frescos de la sesión actual
-    if _active_template_ids:
-        return MemeTemplate.query.filter(MemeTemplate.id.in_(_active_template_ids)).all()
-    else:
-        return []
+    return _active_template_ids
 
 def get_game_players_count(game_id):
     """Obtener conteo de jugadores de forma optimizada"""
@@ -57,54 +78,409 @@ def get_submitted_count(game_id, round_number):
         selected=True
     ).count()
 
-def distribute_templates_optimized(game, templates, round_number):
+def get_template_image_path(template):
+    """Ruta pública de la imagen de una plantilla"""
+    if template.image_data:
+        # Imagen almacenada en Base64 en la DB
+        return f"/admin/public-image/{template.id}"
+    elif template.image_path:
+        # Imagen en archivo local (compatibilidad)
+        return template.image_path
+    return "/static/memes/default.jpg"  # Imagen por defecto
+
+def get_meme_texts(meme):
+    """Textos de un meme enviado con la posición configurada en su plantilla"""
+    texts = []
+    num_boxes = meme.template.num_text_boxes or 2
+    for i in range(1, num_boxes + 1):
+        text_content = getattr(meme, f'text{i}', '') or ''
+        if text_content:
+            texts.append({
+                'content': text_content,
+                'x': getattr(meme.template, f'text{i}_x', 50),
+                'y': getattr(meme.template, f'text{i}_y', 20 if i == 1 else 80),
+                'size': getattr(meme.template, f'text{i}_size', 24),
+                'width': getattr(meme.template, f'text{i}_width', 30),
+                'height': getattr(meme.template, f'text{i}_height', 10)
+            })
+    return texts
+
+def get_rendered_path(meme):
+    """Ruta de la imagen final renderizada en el servidor (None si no existe)"""
+    if meme.render_hash:
+        return f"/game/meme-image/{meme.render_hash}"
+    return None
+
+def meme_score(game, meme):
+    """Puntuación de un meme: sus puntos, o la media por voto recibido en una sala grande"""
+    points = meme.total_points or 0
+    if game.large_room:
+        return round(points / meme.vote_count, 2) if meme.vote_count else 0
+    return points
+
+def build_final_results(game):
+    """
+    Calcular la clasificación final de la partida (ranking de memes y totales por jugador).
+    Se ejecuta una sola vez al terminar la partida; el podio sirve el documento guardado.
+    """
+    all_memes = PlayerTemplate.query.options(
+        joinedload(PlayerTemplate.user),
+        joinedload(PlayerTemplate.template)
+    ).filter_by(
+        game_id=game.id,
+        selected=True
+    ).order_by(PlayerTemplate.total_points.desc(), PlayerTemplate.id).all()
+    
+    memes_data = []
+    player_totals = {}
+    for meme in all_memes:
+        memes_data.append({
+            'id': meme.id,
+            'creator_name': meme.user.nickname,
+            'image_path': get_template_image_path(meme.template),
+            'rendered_path': get_rendered_path(meme),
+            'template_name': meme.template.name,
+            'texts': get_meme_texts(meme),
+            'total_points': meme.total_points or 0,
+            'vote_count': meme.vote_count,
+            'score': meme_score(game, meme),
+            'round_number': meme.round_number
+        })
+        
+        totals = player_totals.setdefault(meme.user_id, {
+            'user_id': meme.user_id,
+            'nickname': meme.user.nickname,
+            'total_points': 0,
+            'score': 0,
+            'memes': 0
+        })
+        totals['total_points'] += meme.total_points or 0
+        totals['score'] = round(totals['score'] + memes_data[-1]['score'], 2)
+        totals['memes'] += 1
+    
+    # En salas grandes cada meme recibe un número distinto de votos: se ordena por la media
+    memes_data.sort(key=lambda m: -m['score'])
+    players_data = sorted(player_totals.values(), key=lambda p: (-p['score'], p['nickname']))
+    
+    return {'memes': memes_data, 'players': players_data}
+
+def store_final_results(game):
+    """Materializar los resultados finales de la partida (sin hacer commit)"""
+    payload = json.dumps(build_final_results(game), separators=(',', ':'), ensure_ascii=False)
+    etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    result = GameResult.query.filter_by(game_id=game.id).first()
+    if result:
+        result.payload = payload
+        result.etag = etag
+    else:
+        result = GameResult(game_id=game.id, payload=payload, etag=etag)
+        db.session.add(result)
+    return result
+
+def update_player_stats(user_id, **increments):
+    """
+    Incrementar de forma atómica los contadores del ranking global de un usuario
+    (sin hacer commit). Crea la fila la primera vez que el usuario puntúa.
+    """
+    values = {getattr(PlayerStats, field): getattr(PlayerStats, field) + amount
+              for field, amount in increments.items()}
+    values[PlayerStats.updated_at] = datetime.utcnow()
+    
+    updated = PlayerStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+    if not updated:
+        db.session.add(PlayerStats(user_id=user_id, **increments))
+        db.session.flush()
+
+def record_votes_in_stats(author_totals):
+    """
+    Actualizar el ranking global de los autores que recibieron votos, con un
+    UPDATE agregado (executemany) para todos los autores.
+    author_totals: {user_id: (puntos, votos me_rei, (id del meme, nuevo total) del mejor meme)}
+    """
+    # Crear las filas que falten (primera vez que el autor puntúa)
+    existing = {user_id for (user_id,) in db.session.query(PlayerStats.user_id).filter(
+        PlayerStats.user_id.in_(author_totals.keys())
+    )}
+    missing = [user_id for user_id in author_totals if user_id not in existing]
+    if missing:
+        db.session.execute(insert(PlayerStats), [{'user_id': user_id} for user_id in missing])
+    
+    stats_table = PlayerStats.__table__
+    now = datetime.utcnow()
+    db.session.execute(
+        stats_table.update()
+        .where(stats_table.c.user_id == bindparam('author_id'))
+        .values(
+            total_points=stats_table.c.total_points + bindparam('points'),
+            me_rei_count=stats_table.c.me_rei_count + bindparam('me_rei'),
+            updated_at=now
+        ),
+        [{'author_id': user_id, 'points': points, 'me_rei': me_rei_count}
+         for user_id, (points, me_rei_count, _) in author_totals.items()]
+    )
+    
+    # Mejor meme: solo se reemplaza si el nuevo total lo supera
+    db.session.execute(
+        stats_table.update()
+        .where(stats_table.c.user_id == bindparam('author_id'),
+               stats_table.c.best_meme_points < bindparam('meme_total'))
+        .values(best_meme_id=bindparam('meme_id'), best_meme_points=bindparam('meme_total')),
+        [{'author_id': user_id, 'meme_id': meme_id, 'meme_total': meme_total}
+         for user_id, (_, _, (meme_id, meme_total)) in author_totals.items()]
+    )
+
+class VoteRejected(ValueError):
+    """Voto o lote de votos inválido (el mensaje se devuelve al cliente)"""
+
+def votable_round(game, round_number):
+    """
+    Ronda a la que van unos votos: la actual o, si el anfitrión ya avanzó
+    mientras el lote estaba en camino, la anterior. None si no se admite.
+    """
+    if round_number is None:
+        return game.current_round if game.status == 'started' else None
+    if type(round_number) is not int:
+        return None
+    if game.status == 'started' and round_number in (game.current_round, game.current_round - 1) and round_number >= 1:
+        return round_number
+    # Partida recién terminada: aún se aceptan los votos de la última ronda
+    if game.status == 'finished' and round_number == game.current_round:
+        return round_number
+    return None
+
+def record_votes(game, voter_id, ballots, round_number=None):
+    """
+    Registrar los votos de un jugador en una ronda (por defecto la actual), sin
+    hacer commit. ballots: lista de (player_template_id, vote_type). Se valida
+    todo en memoria contra los memes de la ronda y se escribe con un único
+    INSERT masivo y un UPDATE agregado por meme.
+    Devuelve {player_template_id: (puntos, nuevo total)}.
+    """
+    round_number = game.current_round if round_number is None else round_number
+    ballots = [(meme_id, vote_type) for meme_id, vote_type in ballots]
+    if not ballots:
+        raise VoteRejected("No hay votos que registrar")
+    if any(vote_type not in VOTE_POINTS for _, vote_type in ballots):
+        raise VoteRejected("Tipo de voto inválido")
+    
+    voted_ids = [meme_id for meme_id, _ in ballots]
+    if any(type(meme_id) is not int for meme_id in voted_ids):
+        raise VoteRejected("Meme no encontrado en esta ronda")
+    voted_set = set(voted_ids)
+    if len(voted_set) != len(voted_ids):
+        raise VoteRejected("Un meme aparece más de una vez en los votos")
+    
+    # Memes de la ronda: {id: (autor, puntos actuales, plantilla)}
+    round_memes = {
+        meme_id: (user_id, total_points or 0, template_id)
+        for meme_id, user_id, total_points, template_id in db.session.query(
+            PlayerTemplate.id, PlayerTemplate.user_id, PlayerTemplate.total_points,
+            PlayerTemplate.template_id
+        ).filter_by(
+            game_id=game.id,
+            round_number=round_number,
+            selected=True
+        )
+    }
+    if voted_set - round_memes.keys():
+        raise VoteRejected("Meme no encontrado en esta ronda")
+    if game.large_room and voted_set - set(get_assigned_meme_ids(game, voter_id, round_number)):
+        raise VoteRejected("Ese meme no está entre los que te tocan votar")
+    if any(round_memes[meme_id][0] == voter_id for meme_id in voted_set):
+        raise VoteRejected("No puedes votar por tu propio meme")
+    
+    already_voted = db.session.query(Vote.player_template_id).filter(
+        Vote.voter_id == voter_id,
+        Vote.player_template_id.in_(voted_set)
+    ).first()
+    if already_voted:
+        raise VoteRejected("Ya votaste por este meme")
+    
+    now = datetime.utcnow()
+    db.session.execute(insert(Vote), [{
+        'voter_id': voter_id,
+        'player_template_id': meme_id,
+        'game_id': game.id,
+        'round_number': round_number,
+        'vote_type': vote_type,
+        'points': VOTE_POINTS[vote_type],
+        'created_at': now
+    } for meme_id, vote_type in ballots])
+    
+    # Un UPDATE por meme en una sola llamada (executemany), sumando en la base de datos
+    meme_table = PlayerTemplate.__table__
+    db.session.execute(
+        meme_table.update()
+        .where(meme_table.c.id == bindparam('meme_id'))
+        .values(total_points=func.coalesce(meme_table.c.total_points, 0) + bindparam('points'),
+                vote_count=meme_table.c.vote_count + 1),
+        [{'meme_id': meme_id, 'points': VOTE_POINTS[vote_type]} for meme_id, vote_type in ballots]
+    )
+    
+    results = {}
+    author_totals = {}
+    template_totals = {}
+    for meme_id, vote_type in ballots:
+        points = VOTE_POINTS[vote_type]
+        author_id, previous_total, template_id = round_memes[meme_id]
+        new_total = previous_total + points
+        results[meme_id] = (points, new_total)
+        
+        template_total = template_totals.setdefault(template_id, {'total_points': 0, 'vote_count': 0})
+        template_total['total_points'] += points
+        template_total['vote_count'] += 1
+        
+        author_points, me_rei_count, best = author_totals.get(author_id, (0, 0, (meme_id, 0)))
+        author_totals[author_id] = (
+            author_points + points,
+            me_rei_count + (1 if vote_type == 'me_rei' else 0),
+            (meme_id, new_total) if new_total > best[1] else best
+        )
+    
+    # Actualizar el ranking global de los autores y la popularidad de las plantillas
+    record_votes_in_stats(author_totals)
+    increment_template_stats(template_totals)
+    bump_game_version(game.id)
+    return results
+
+def record_finished_game_in_stats(game):
+    """Sumar una partida jugada a cada participante de la partida terminada"""
+    participant_ids = db.session.query(PlayerTemplate.user_id).filter_by(
+        game_id=game.id
+    ).distinct().all()
+    
+    for (user_id,) in participant_ids:
+        update_player_stats(user_id, games_played=1)
+
+def init_template_sampler(game):
+    """
+    Fijar una permutación nueva de plantillas para la partida. La permutación es
+    sobre los propios IDs (hasta el mayor ID activo ahora), no sobre posiciones
+    de la lista de activas, así que no cambia aunque se añadan, desactiven o
+    borren plantillas a mitad de partida.
+    """
+    max_id = db.session.query(func.max(MemeTemplate.id)).filter_by(active=True).scalar()
+    game.template_seed = random.getrandbits(31)
+    game.template_pool_size = (max_id + 1) if max_id is not None else 0
+    game.template_offset = 0
+
+def reseed_template_sampler(game):
+    """Catálogo agotado: empezar otra vuelta (época) con una permutación nueva"""
+    game.template_epoch = (game.template_epoch or 0) + 1
+    init_template_sampler(game)
+
+def get_used_template_counts(game):
+    """Veces que se ha repartido cada plantilla en la partida"""
+    return Counter(template_id for (template_id,) in db.session.query(
+        PlayerTemplate.template_id
+    ).filter_by(game_id=game.id))
+
+def draw_from_permutation(game, count, taken):
+    """
+    Siguientes plantillas activas de la permutación de la partida. Cada vuelta
+    recorre la permutación una sola vez, así que nada se repite dentro de una
+    época; los candidatos se comprueban por tramos con un IN sobre la clave
+    primaria, sin mirar el catálogo ni el historial de la partida.
+    """
+    pool_size = game.template_pool_size or 0
+    permutation = SeededPermutation(pool_size, game.template_seed) if pool_size else None
+    offset = game.template_offset or 0
+    drawn = []
+    while len(drawn) < count and offset < pool_size:
+        # Un poco más de lo que falta: algunos IDs estarán inactivos o borrados
+        chunk_end = min(pool_size, offset + max(2 * (count - len(drawn)), 16))
+        candidates = [permutation[i] for i in range(offset, chunk_end)]
+        active = {template_id for (template_id,) in db.session.query(MemeTemplate.id).filter(
+            MemeTemplate.id.in_(candidates),
+            MemeTemplate.active.is_(True)
+        )}
+        for template_id in candidates:
+            offset += 1
+            if template_id in active and template_id not in taken:
+                drawn.append(template_id)
+                taken.add(template_id)
+                if len(drawn) == count:
+                    break
+    game.template_offset = offset
+    return drawn
+
+def sample_permutation_templates(game, needed):
+    """
+    Siguiente tramo de la permutación de la partida: O(k) por ronda (más las
+    plantillas inactivas que se saltan), sin cargar ni barajar el catálogo.
+    Si se agota, se vuelve a barajar y se sigue con la misma cantidad por jugador.
+    """
+    taken = set()
+    selected = draw_from_permutation(game, needed, taken)
+    if len(selected) < needed:
+        reseed_template_sampler(game)
+        selected += draw_from_permutation(game, needed - len(selected), taken)
+    return selected
+
+def sample_weighted_templates(game, template_ids, needed):
+    """
+    Muestreo ponderado por popularidad (TEMPLATE_WEIGHTED_SAMPLING), primero
+    entre las plantillas menos repartidas en la partida. Los pesos salen de
+    template_stats.
+    """
+    used = get_used_template_counts(game)
+    weights = get_template_weights()
+    selected = []
+    # Por niveles de uso: las nunca repartidas, luego las repartidas una vez...
+    for level in sorted({used[template_id] for template_id in template_ids}):
+        if len(selected) >= needed:
+            break
+        candidates = [template_id for template_id in template_ids if used[template_id] == level]
+        selected += weighted_sample(candidates, weights, needed - len(selected))
+    random.shuffle(selected)
+    return selected
+
+def distribute_templates_optimized(game, round_number):
     """
-    Distribución optimizada de plantillas con manejo seguro de sesiones SQLAlchemy
+    Repartir plantillas de la ronda sin repetir ninguna dentro de la partida
+    mientras quede catálogo (por permutación o, si está activado, ponderadas
+    por popularidad).
     """
     num_players = len(game.players)
-    if not templates or num_players == 0:
+    template_ids = get_active_template_ids()
+    if not template_ids or num_players == 0:
         return False
     
-    max_per_round = getattr(game, 'templates_per_round', None) or 5
+    if game.template_seed is None:
+        # Partidas iniciadas antes de existir el muestreador
+        init_template_sampler(game)
     
-    # Optimización: usar el mínimo entre plantillas disponibles y necesarias
-    available_unique = len(templates)
-    max_distributable = available_unique // num_players
-    templates_per_player = min(max_per_round, max_distributable)
+    max_per_round = getattr(game, 'templates_per_round', None) or 5
+    # Siempre las mismas por jugador, salvo que el catálogo entero no llegue
+    templates_per_player = min(max_per_round, max(1, len(template_ids) // num_players))
+    needed = templates_per_player * num_players
     
     try:
-        if templates_per_player >= 1:
-            # Distribución sin repetidos para mejor experiencia
-            shuffled = templates[:]
-            random.shuffle(shuffled)
-            needed = templates_per_player * num_players
-            selected = shuffled[:needed]
-            
-            for idx, player in enumerate(game.players):
-                start_idx = idx * templates_per_player
-                end_idx = start_idx + templates_per_player
-                player_templates = selected[start_idx:end_idx]
-                
-                for template in player_templates:
-                    # Usar add() individual en lugar de bulk_save para mejor compatibilidad
-                    pt = PlayerTemplate(
-                        user_id=player.id,
-                        game_id=game.id,
-                        template_id=template.id,
-                        round_number=round_number
-                    )
-                    db.session.add(pt)
+        if current_app.config['TEMPLATE_WEIGHTED_SAMPLING']:
+            selected = sample_weighted_templates(game, template_ids, needed)
         else:
-            # Fallback: distribución aleatoria cuando hay pocas plantillas
-            for player in game.players:
-                template = random.choice(templates)
-                pt = PlayerTemplate(
+            selected = sample_permutation_templates(game, needed)
+        
+        # Catálogo con menos plantillas que jugadores: se repiten dentro de la ronda
+        while len(selected) < needed:
+            selected.append(random.choice(template_ids))
+        
+        for idx, player in enumerate(game.players):
+            start_idx = idx * templates_per_player
+            end_idx = start_idx + templates_per_player
+            
+            for template_id in selected[start_idx:end_idx]:
+                db.session.add(PlayerTemplate(
                     user_id=player.id,
                     game_id=game.id,
-                    template_id=template.id,
+                    template_id=template_id,
                     round_number=round_number
-                )
-                db.session.add(pt)
+                ))
+        
+        increment_template_stats({
+            template_id: {'times_offered': count} for template_id, count in Counter(selected).items()
+        })
         
         # No hacer commit aquí, dejarlo para la función que llama
         return True
@@ -114,47 +490,227 @@ def distribute_templates_optimized(game, templates, round_number):
         db.session.rollback()
         return False
 
-@game_bp.route("/create", methods=["GET"])
-def show_create_form():
+def reserve_seat(game_id):
+    """
+    Ocupar una plaza de forma atómica (sin commit): el UPDATE solo afecta a la
+    fila si la partida sigue en espera y no está llena, así dos uniones a la vez
+    nunca superan max_players. Devuelve False si no había plaza.
+    """
+    reserved = Game.query.filter(
+        Game.id == game_id,
+        Game.status == 'waiting',
+        Game.seats_taken < Game.max_players
+    ).update({
+        Game.seats_taken: Game.seats_taken + 1,
+        Game.version: Game.version + 1
+    }, synchronize_session=False)
+    return reserved == 1
+
+def release_seat(game_id):
+    """Liberar la plaza de un jugador que sale de una partida (sin commit)"""
+    Game.query.filter(
+        Game.id == game_id,
+        Game.status == 'waiting',
+        Game.seats_taken > 0
+    ).update({Game.seats_taken: Game.seats_taken - 1}, synchronize_session=False)
+    # También en partidas empezadas: cambia el número de jugadores de la ronda
+    bump_game_version(game_id)
+
+def bump_game_version(game_id):
+    """
+    Subir la versión de la partida (sin commit). Se suma en la base de datos, así
+    dos cambios a la vez nunca dejan la misma versión.
+    """
+    Game.query.filter(Game.id == game_id).update(
+        {Game.version: Game.version + 1}, synchronize_session=False
+    )
+
+def game_version_etag(transition_due=None):
+    """
+    Decorador para los endpoints de polling de una partida: responde 304 si el
+    cliente ya tiene la versión actual (If-None-Match), sin cargar jugadores ni
+    contar envíos. Solo lee una fila ligera de game; si transition_due(fila)
+    indica que toca un cambio por tiempo (iniciar, cancelar, fin de ronda) se
+    ejecuta la ruta completa igualmente. El 304 solo se da a jugadores de la
+    partida: al resto le contesta la ruta, con sus propias comprobaciones.
+    """
+    def is_member(game_id):
+        user_id = session.get('user_id')
+        return user_id is not None and db.session.query(User.id).filter_by(
+            id=user_id, game_id=game_id
+        ).first() is not None
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapped(code):
+            row = db.session.query(
+                Game.id, Game.version, Game.status, Game.creator_id, Game.seats_taken,
+                Game.created_at, Game.round_start_time
+            ).filter_by(code=code).first()
+            if row is None:
+                return view(code)
+            
+            # ETag débil: el cuerpo lleva tiempos que avanzan, pero el estado es el mismo
+            is_creator = session.get('user_id') == row.creator_id
+            etag = f"{row.id}-{row.version}-{int(is_creator)}"
+            if (request.if_none_match.contains_weak(etag)
+                    and not (transition_due and transition_due(row))
+                    and is_member(row.id)):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(code))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapped
+    return decorator
+
+def lobby_transition_due(game):
+    """La sala en espera debe iniciarse o cancelarse por tiempo"""
+    if game.status != 'waiting' or not game.created_at:
+        return game.status == 'waiting'
+    elapsed = (datetime.utcnow() - game.created_at).total_seconds()
+    return elapsed >= 150 or (game.seats_taken <= 1 and elapsed > 30)
+
+def round_transition_due(game):
+    """Se agotó el tiempo de la ronda"""
+    if game.status != 'started' or not game.round_start_time:
+        return False
+    return (datetime.utcnow() - game.round_start_time).total_seconds() >= 120
+
+def refresh_matchmaking(game):
+    """
+    Reflejar en el índice de emparejamiento el estado de una partida pública.
+    Cada nodo indexa solo sus partidas: las de otro nodo (p. ej. al unirse por
+    una ruta @any_node) las actualiza su dueño cuando llega el jugador.
+    """
+    if game.is_private:
+        return
+    if not shard_map.is_local(game.code):
+        matchmaking_index.remove(game.id)
+        return
+    if game.status == 'waiting':
+        matchmaking_index.update(game.id, game.code, game.seats_taken, game.max_players, game.created_at)
+    else:
+        matchmaking_index.remove(game.id)
+
+def load_matchmaking_index():
+    """Cargar las partidas públicas en espera de este nodo (una vez por proceso)"""
+    if matchmaking_index.loaded:
+        return
+    for game in Game.query.filter_by(is_private=False, status='waiting'):
+        if shard_map.is_local(game.code):
+            refresh_matchmaking(game)
+    matchmaking_index.loaded = True
+
+def create_waiting_game(user, is_private=True, large_room=False):
+    """Crear una partida en espera con el usuario como creador y primer jugador"""
+    game = Game(
+        code=generate_code(),
+        is_private=is_private,
+        large_room=large_room,
+        max_players=current_app.config['LARGE_ROOM_MAX_PLAYERS'] if large_room else 15,
+        seats_taken=1,
+        creator_id=user.id,
+        created_at=datetime.utcnow(),
+        status='waiting'
+    )
+    
+    db.session.add(game)
+    db.session.commit()
+    
+    user = User.query.get(user.id)
+    user.game_id = game.id
+    db.session.commit()
+    
+    refresh_matchmaking(game)
+    return game
+
+def get_current_user_or_redirect():
+    """Usuario de la sesión, o la redirección que corresponde (nickname o partida en curso)"""
     if "user_id" not in session:
-        return redirect(url_for('auth.show_nickname_form'))
+        return None, redirect(url_for('auth.show_nickname_form'))
     
     user = User.query.get(session["user_id"])
     
     if not user:
         session.clear()
-        return redirect(url_for('auth.show_nickname_form'))
+        return None, redirect(url_for('auth.show_nickname_form'))
     
     if user.game_id:
         game = Game.query.get(user.game_id)
         if game and game.status in ['waiting', 'started']:
-            return redirect(url_for('game.waiting_room', code=game.code))
+            return None, redirect(url_for('game.waiting_room', code=game.code))
         else:
             # Limpiar juego terminado o inexistente
             user.game_id = None
             db.session.commit()
+    return user, None
+
+@game_bp.route("/create", methods=["GET"])
+def show_create_form():
+    user, response = get_current_user_or_redirect()
+    if response:
+        return response
 
     try:
-        code = generate_code()
-        
-        game = Game(
-            code=code,
-            max_players=15,
-            creator_id=user.id,
-            created_at=datetime.utcnow(),
-            status='waiting'
+        # ?public=1: la partida aparece en el emparejamiento rápido; ?large=1: sala grande
+        game = create_waiting_game(
+            user,
+            is_private=request.args.get('public') != '1',
+            large_room=request.args.get('large') == '1'
         )
+        return redirect(url_for('game.waiting_room', code=game.code))
+    except Exception:
+        db.session.rollback()
+        return redirect(url_for('index'))
+
+def seat_in_public_game(user):
+    """Sentar al usuario en la mejor partida pública del índice; devuelve su código o None"""
+    # Normalmente basta un intento; si otro jugador ocupó la última plaza se prueba la siguiente
+    for _ in range(5):
+        candidate = matchmaking_index.best()
+        if candidate is None:
+            return None
+        game_id, code = candidate
         
-        db.session.add(game)
-        db.session.commit()
+        if reserve_seat(game_id):
+            user.game_id = game_id
+            db.session.commit()
+            refresh_matchmaking(Game.query.get(game_id))
+            return code
         
-        user = User.query.get(session["user_id"])
-        user.game_id = game.id
-        db.session.commit()
+        # El índice iba por detrás de la base de datos: actualizarlo con el estado real
+        db.session.rollback()
+        game = Game.query.get(game_id)
+        if game:
+            refresh_matchmaking(game)
+        else:
+            matchmaking_index.remove(game_id)
+    return None
 
-        return redirect(url_for('game.waiting_room', code=game.code))
-    except Exception:
+@game_bp.route("/quick-join")
+def quick_join():
+    """Entrar en la partida pública más llena con plazas libres, o crear una"""
+    user, response = get_current_user_or_redirect()
+    if response:
+        return response
+    
+    try:
+        load_matchmaking_index()
+        code = seat_in_public_game(user)
+        if code is None:
+            # Sin plazas: solo uno crea la partida nueva y el resto entra en ella
+            with matchmaking_index.creation_lock:
+                code = seat_in_public_game(user)
+                if code is None:
+                    code = create_waiting_game(user, is_private=False).code
+        return redirect(url_for('game.waiting_room', code=code))
+    except Exception as e:
         db.session.rollback()
+        print(f"Error en el emparejamiento rápido: {str(e)}")
         return redirect(url_for('index'))
 
 @game_bp.route("/create", methods=["POST"])
@@ -168,6 +724,7 @@ def show_join_form():
     return render_template('game/join.html')
 
 @game_bp.route("/join", methods=["POST"])
+@any_node  # Solo escribe en la base de datos; el lobby se avisa al conectar el socket en el nodo dueño
 def join_game():
     if "user_id" not in session:
         return jsonify({"error": "Debes tener un nickname para unirte"}), 401
@@ -198,13 +755,15 @@ def join_game():
             user.game_id = None
             db.session.commit()
 
-    current_players = User.query.filter_by(game_id=game.id).count()
-    if current_players >= game.max_players:
-        return jsonify({"error": "Partida llena"}), 400
-
     try:
+        if not reserve_seat(game.id):
+            db.session.rollback()
+            return jsonify({"error": "Partida llena"}), 400
+        
         user.game_id = game.id
         db.session.commit()
+        db.session.refresh(game)
+        refresh_matchmaking(game)
         
         return jsonify({
             "message": "Te has unido a la partida",
@@ -219,6 +778,8 @@ def waiting_room(code):
     if "user_id" not in session:
         return redirect(url_for('auth.show_nickname_form'))
     
+    room_resume = get_room_resume_point(code)
+    
     user = User.query.get(session["user_id"])
     if not user:
         session.clear()
@@ -237,15 +798,18 @@ def waiting_room(code):
     
     if user.game_id != game.id:
         if user.id == game.creator_id:
+            # El creador siempre puede volver a su partida
+            reserve_seat(game.id)
+            user.game_id = game.id
+            db.session.commit()
+        elif reserve_seat(game.id):
             user.game_id = game.id
             db.session.commit()
         else:
-            current_players = len(game.players)
-            if current_players < game.max_players and game.status == 'waiting':
-                user.game_id = game.id
-                db.session.commit()
-            else:
-                return redirect(url_for('index'))
+            db.session.rollback()
+            return redirect(url_for('index'))
+        db.session.refresh(game)
+        refresh_matchmaking(game)
     
     players = User.query.filter_by(game_id=game.id).all()
     
@@ -256,17 +820,46 @@ def waiting_room(code):
                          creator_nickname=game.creator.nickname,
                          players=players,
                          current_players=len(players),
-                         is_creator=is_creator)
+                         is_creator=is_creator,
+                         room_resume=room_resume)
+
+def get_room_resume_point(code):
+    """Último evento de la sala al renderizar una página: el cliente se une desde ahí"""
+    return {"seq": events.current_seq(code), "epoch": events.EPOCH}
+
+def build_lobby_state(game, players=None):
+    """Estado de la sala de espera que se envía a todos los jugadores"""
+    if players is None:
+        players = User.query.filter_by(game_id=game.id).all()
+    time_elapsed = datetime.utcnow() - (game.created_at or datetime.utcnow())
+    return {
+        "status": game.status,
+        "timeRemaining": max(0, 150 - int(time_elapsed.total_seconds())),
+        "players": [{"id": p.id, "nickname": p.nickname, "isCreator": p.id == game.creator_id} for p in players],
+        "playerCount": len(players)
+    }
 
 @game_bp.route("/check/<code>")
+@rate_limiter.limit()
+@read_only
+@game_version_etag(lobby_transition_due)
 def check_game_status(code):
+    # Fuera del try: una partida inexistente es un 404 (y con réplica se reintenta en el primario)
+    game = Game.query.filter_by(code=code).first_or_404()
     try:
-        game = Game.query.filter_by(code=code).first_or_404()
         players = User.query.filter_by(game_id=game.id).all()
         
         current_time = datetime.utcnow()
         time_elapsed = current_time - game.created_at
         
+        # Antes de iniciar o cancelar, confirmar con el primario (la réplica puede ir atrasada)
+        if game.status == 'waiting' and (
+                (len(players) >= 2 and time_elapsed.total_seconds() >= 150) or
+                (len(players) <= 1 and time_elapsed.total_seconds() > 30)):
+            use_primary()
+            db.session.refresh(game)
+            players = User.query.filter_by(game_id=game.id).all()
+        
         # Si hay más de 2 jugadores y ha pasado el tiempo, iniciar la partida automáticamente
         if len(players) >= 2 and game.status == 'waiting' and time_elapsed.total_seconds() >= 150:
             try:
@@ -274,13 +867,19 @@ def check_game_status(code):
                 game.status = 'started'
                 game.current_round = 1
                 game.round_start_time = datetime.utcnow()
+                bump_game_version(game.id)
                 
                 # Distribuir plantillas para la primera ronda (optimizado)
-                templates = get_active_templates()
-                distribute_templates_optimized(game, templates, 1)
+                init_template_sampler(game)
+                distribute_templates_optimized(game, 1)
                 
                 db.session.commit()
-                socketio.emit('game_started', room=code)
+                matchmaking_index.remove(game.id)
+                events.publish(code, 'game_started', {
+                    "status": "started",
+                    "round": 1,
+                    "redirect": f"/game/play/{code}"
+                })
                 return jsonify({"status": "started", "redirect": f"/game/play/{code}"})
                 
             except Exception as e:
@@ -294,15 +893,17 @@ def check_game_status(code):
                 player.game_id = None
             db.session.delete(game)
             db.session.commit()
+            matchmaking_index.remove(game.id)
+            events.publish(code, 'game_cancelled', {"status": "cancelled", "redirect": "/"})
+            events.forget_room(code)
+            carousel.stop_carousel(code)
             return jsonify({"status": "cancelled", "message": "Partida cancelada por falta de jugadores"})
         
         if not game.created_at:
             game.created_at = datetime.utcnow()
             db.session.commit()
         
-        current_time = datetime.utcnow()
-        time_elapsed = current_time - game.created_at
-        time_remaining = max(0, 150 - int(time_elapsed.total_seconds()))
+        response = build_lobby_state(game, players)
         
         # Determinar si el usuario actual es el creador
         is_creator = session.get('user_id') == game.creator_id
@@ -311,16 +912,8 @@ def check_game_status(code):
         print(f"Error en check_game_status: {str(e)}")
         return jsonify({"error": "Error al verificar el estado de la partida"}), 500
     
-    response = {
-        "status": game.status,
-        "timeRemaining": time_remaining,
-        "players": [{"id": p.id, "nickname": p.nickname, "isCreator": p.id == game.creator_id} for p in players],
-        "playerCount": len(players),
-        "canStart": is_creator and len(players) >= 2,
-        "isCreator": is_creator
-    }
-    
-    socketio.emit('update', room=code)
+    response["canStart"] = is_creator and len(players) >= 2
+    response["isCreator"] = is_creator
     
     return jsonify(response)
 
@@ -343,13 +936,19 @@ def start_game(code):
         game.status = 'started'
         game.current_round = 1
         game.round_start_time = datetime.utcnow()
+        bump_game_version(game.id)
         
         # Distribuir plantillas para la primera ronda (optimizado)
-        templates = get_active_templates()
-        distribute_templates_optimized(game, templates, 1)
+        init_template_sampler(game)
+        distribute_templates_optimized(game, 1)
         
         db.session.commit()
-        socketio.emit('game_started', room=code)
+        matchmaking_index.remove(game.id)
+        events.publish(code, 'game_started', {
+            "status": "started",
+            "round": 1,
+            "redirect": f"/game/play/{code}"
+        })
         return jsonify({"success": True})
         
     except Exception as e:
@@ -360,7 +959,8 @@ def start_game(code):
 def play_game(code):
     if "user_id" not in session:
         return redirect(url_for('auth.show_nickname_form'))
-        
+    
+    room_resume = get_room_resume_point(code)
     game = Game.query.filter_by(code=code).first_or_404()
     user = User.query.get(session["user_id"])
     
@@ -383,15 +983,7 @@ def play_game(code):
     # Convertir plantillas a diccionarios serializables
     templates_data = []
     for pt in player_templates:
-        # Determinar la ruta de imagen
-        if pt.template.image_data:
-            # Imagen almacenada en Base64 en la DB
-            image_path = f"/admin/public-image/{pt.template.id}"
-        elif pt.template.image_path:
-            # Imagen en archivo local (compatibilidad)
-            image_path = pt.template.image_path
-        else:
-            image_path = "/static/memes/default.jpg"  # Imagen por defecto
+        image_path = get_template_image_path(pt.template)
             
         template_dict = {
             'id': pt.id,
@@ -419,9 +1011,18 @@ def play_game(code):
     return render_template('game/play.html',
                          game=game,
                          templates=templates_data,
-                         round_time_left=time_left)
+                         page_data={
+                             'gameCode': game.code,
+                             'currentRound': game.current_round,
+                             'roundTimeLeft': time_left,
+                             'roomResume': room_resume,
+                             'socketUrl': shard_url(code) or None,
+                             'templates': templates_data
+                         })
 
 @game_bp.route("/check-round/<code>")
+@rate_limiter.limit()
+@game_version_etag(round_transition_due)
 def check_round_status(code):
     """Verificar el estado de la ronda actual y si ha expirado el tiempo"""
     if "user_id" not in session:
@@ -442,7 +1043,12 @@ def check_round_status(code):
     
     # Si el tiempo se agotó o todos enviaron, finalizar ronda
     if time_left <= 0 or all_submitted:
-        socketio.emit('round_ended', room=code)
+        # Varios jugadores lo detectan a la vez: se agrupa en un solo mensaje
+        events.publish(code, 'round_ended', {
+            "round": game.current_round,
+            "allSubmitted": all_submitted,
+            "timeLeft": 0
+        }, coalesce=True)
         return jsonify({
             "roundEnded": True,
             "allSubmitted": all_submitted,
@@ -488,7 +1094,10 @@ def submit_meme():
         ).first()
         
         if template:
+            if not template.selected:
+                increment_template_stats({template.template_id: {'times_selected': 1}})
             template.selected = True
+            bump_game_version(game.id)
             # Mantener compatibilidad con campos antiguos
             template.text_top = text_top
             template.text_bottom = text_bottom
@@ -499,6 +1108,13 @@ def submit_meme():
                 if hasattr(template, field_name):
                     setattr(template, field_name, text_fields[field_name])
             
+            # Renderizar el meme final una sola vez en el pool de procesos
+            try:
+                template.render_hash = schedule_meme_render(template, get_meme_texts(template))
+            except Exception as e:
+                print(f"Error programando renderizado del meme {template.id}: {str(e)}")
+                template.render_hash = None
+            
             db.session.commit()
         
         # Verificar si todos han enviado sus memes (optimizado)
@@ -507,7 +1123,11 @@ def submit_meme():
         
         if all_submitted:
             # Todos han enviado sus memes, redirigir a resultados
-            socketio.emit('all_submitted', room=game_code)
+            events.publish(game_code, 'all_submitted', {
+                "round": game.current_round,
+                "submitted": submitted_count,
+                "redirect": f"/game/results/{game_code}"
+            })
         
         return jsonify({
             "success": True,
@@ -533,66 +1153,208 @@ def round_results(code):
     # El podio solo se mostrará después de completar la votación de la tercera ronda
     return redirect(url_for('game.voting_phase', code=code))
 
-@game_bp.route("/voting/<code>")
-def voting_phase(code):
-    """Fase de votación - mostrar memes uno por uno"""
-    if "user_id" not in session:
-        return redirect(url_for('auth.show_nickname_form'))
-        
-    game = Game.query.filter_by(code=code).first_or_404()
-    user = User.query.get(session["user_id"])
-    
-    if game.status != 'started':
-        return redirect(url_for('game.waiting_room', code=code))
-    
-    # Obtener todos los memes de la ronda actual que fueron seleccionados
-    round_memes = PlayerTemplate.query.filter_by(
+def get_voting_round_version(game, round_number=None):
+    """Versión de los memes de la ronda (cambia si se añade un envío)"""
+    count, last_id = db.session.query(
+        func.count(PlayerTemplate.id), func.max(PlayerTemplate.id)
+    ).filter_by(
         game_id=game.id,
-        round_number=game.current_round,
+        round_number=game.current_round if round_number is None else round_number,
         selected=True
-    ).all()
+    ).one()
+    return (count, last_id)
+
+def get_voting_memes(game, round_number=None):
+    """Memes seleccionados de una ronda (por defecto la actual), en el orden del carrusel"""
+    round_memes = PlayerTemplate.query.options(
+        joinedload(PlayerTemplate.user),
+        joinedload(PlayerTemplate.template)
+    ).filter_by(
+        game_id=game.id,
+        round_number=game.current_round if round_number is None else round_number,
+        selected=True
+    ).order_by(PlayerTemplate.id).all()
     
     # Preparar datos de memes para votación
     memes_data = []
     for meme in round_memes:
-        # Determinar la ruta de imagen
-        if meme.template.image_data:
-            image_path = f"/admin/public-image/{meme.template.id}"
-        elif meme.template.image_path:
-            image_path = meme.template.image_path
-        else:
-            image_path = "/static/memes/default.jpg"
-        
-        # Obtener textos del meme
-        texts = []
-        num_boxes = meme.template.num_text_boxes or 2
-        for i in range(1, num_boxes + 1):
-            text_content = getattr(meme, f'text{i}', '') or ''
-            if text_content:
-                texts.append({
-                    'content': text_content,
-                    'x': getattr(meme.template, f'text{i}_x', 50),
-                    'y': getattr(meme.template, f'text{i}_y', 20 if i == 1 else 80),
-                    'size': getattr(meme.template, f'text{i}_size', 24),
-                    'width': getattr(meme.template, f'text{i}_width', 30),
-                    'height': getattr(meme.template, f'text{i}_height', 10)
-                })
-        
         meme_data = {
             'id': meme.id,
             'creator_name': meme.user.nickname,
             'creator_id': meme.user_id,
-            'image_path': image_path,
+            'image_path': get_template_image_path(meme.template),
+            'rendered_path': get_rendered_path(meme),
             'template_name': meme.template.name,
-            'texts': texts,
-            'total_points': meme.total_points
+            'texts': get_meme_texts(meme)
         }
         memes_data.append(meme_data)
+    return memes_data
+
+def get_voting_cache_key(game, round_number=None):
+    round_number = game.current_round if round_number is None else round_number
+    return (game.id, round_number) + get_voting_round_version(game, round_number)
+
+def get_voting_round_data(game, round_number=None):
+    """Memes de la ronda y votantes (IDs ordenados), compartidos por todos los jugadores"""
+    def build():
+        voter_ids = sorted(user_id for (user_id,) in db.session.query(User.id).filter_by(game_id=game.id))
+        return {'memes': get_voting_memes(game, round_number), 'voter_ids': voter_ids}
+    return voting_round_cache.get_or_build(get_voting_cache_key(game, round_number), build)
+
+def get_voter_assignment(game, voter_id, round_number=None):
+    """Memes (datos completos) que le tocan votar a un jugador de una sala grande"""
+    round_data = get_voting_round_data(game, round_number)
+    memes = round_data['memes']
+    assigned_ids = assigned_memes(
+        voter_id,
+        round_data['voter_ids'],
+        [meme['id'] for meme in memes],
+        {meme['id']: meme['creator_id'] for meme in memes},
+        current_app.config['LARGE_ROOM_MEMES_PER_VOTER'],
+        round_seed(game, round_number)
+    )
+    by_id = {meme['id']: meme for meme in memes}
+    return [by_id[meme_id] for meme_id in assigned_ids]
+
+def get_assigned_meme_ids(game, voter_id, round_number=None):
+    return [meme['id'] for meme in get_voter_assignment(game, voter_id, round_number)]
+
+def build_voting_page(game):
+    """Renderizar la página de votación de la ronda; devuelve el HTML partido en el marcador de usuario"""
+    memes_data = get_voting_memes(game)
+    seconds_per_meme = current_app.config['VOTING_SECONDS_PER_MEME']
     
-    return render_template('game/voting.html',
+    html = render_template('game/voting.html',
                          game=game,
                          memes=memes_data,
-                         current_user_id=user.id)
+                         seconds_per_meme=int(seconds_per_meme),
+                         user_data_placeholder=Markup(USER_DATA_PLACEHOLDER),
+                         page_data={
+                             'gameCode': game.code,
+                             'currentRound': game.current_round,
+                             'socketUrl': shard_url(game.code) or None,
+                             'votePoints': VOTE_POINTS,
+                             'secondsPerMeme': seconds_per_meme
+                         })
+    head, tail = html.split(USER_DATA_PLACEHOLDER, 1)
+    return head, tail
+
+def start_voting_carousel(game):
+    """Fijar el inicio de la votación de la ronda (una sola vez) y arrancar el carrusel"""
+    if game.voting_started_at is None:
+        # Solo el primero en llegar fija el inicio; el resto usa el mismo calendario
+        Game.query.filter_by(id=game.id, voting_started_at=None).update(
+            {Game.voting_started_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        db.session.refresh(game)
+    
+    def load_memes():
+        if game.large_room:
+            # Cada jugador vota sus propios memes: el carrusel solo marca los turnos
+            memes_count = len(get_voting_round_data(game)['memes'])
+            return [None] * min(current_app.config['LARGE_ROOM_MEMES_PER_VOTER'], memes_count)
+        return get_voting_memes(game)
+    
+    return carousel.start_carousel(
+        game.code,
+        game.current_round,
+        game.voting_started_at,
+        current_app.config['VOTING_SECONDS_PER_MEME'],
+        load_memes
+    )
+
+@game_bp.route("/voting/<code>")
+def voting_phase(code):
+    """Fase de votación - mostrar memes uno por uno"""
+    if "user_id" not in session:
+        return redirect(url_for('auth.show_nickname_form'))
+    
+    room_resume = get_room_resume_point(code)
+    game = Game.query.filter_by(code=code).first_or_404()
+    user = User.query.get(session["user_id"])
+    
+    if game.status != 'started':
+        return redirect(url_for('game.waiting_room', code=code))
+    
+    # Página compartida de la ronda; solo los datos del jugador se generan por petición
+    head, tail = voting_page_cache.get_or_build(get_voting_cache_key(game), lambda: build_voting_page(game))
+    
+    carousel_state = start_voting_carousel(game)
+    
+    # Lleva textos de los jugadores: escapar para poder ir dentro de <script>
+    user_data = htmlsafe_json_dumps({
+        'currentUserId': user.id,
+        'isCreator': game.creator_id == user.id,
+        'roomResume': room_resume,
+        'carousel': carousel_state,
+        # Sala grande: solo los k memes que le tocan a este jugador
+        'assignedMemes': get_voter_assignment(game, user.id) if game.large_room else None
+    })
+    return head + f'<script>window.PAGE_USER = {user_data};</script>' + tail
+
+@game_bp.route("/meme-image/<render_hash>")
+@read_only
+def serve_rendered_meme(render_hash):
+    """Servir la imagen final de un meme renderizado en el servidor"""
+    # El hash identifica el contenido, así que la imagen nunca cambia
+    if render_hash in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(render_hash)
+        return response
+    
+    try:
+        rendered = get_rendered_meme(render_hash)
+        if not rendered:
+            # Render perdido (p. ej. reinicio del servidor): volver a programarlo
+            meme = PlayerTemplate.query.filter_by(render_hash=render_hash).first_or_404()
+            schedule_meme_render(meme, get_meme_texts(meme))
+            rendered = get_rendered_meme(render_hash)
+    except RenderPending:
+        # No se bloquea la petición esperando al pool: el cliente reintenta
+        response = make_response('', 202)
+        response.headers['Retry-After'] = '1'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    except RenderFailed as e:
+        print(f"Error renderizando meme {render_hash}: {str(e.__cause__) if e.__cause__ else 'falló hace poco'}")
+        return "Error renderizando el meme", 500
+    
+    if not rendered:
+        return "Imagen no encontrada", 404
+    
+    response = Response(base64.b64decode(rendered.image_data), mimetype=rendered.image_mimetype)
+    response.set_etag(render_hash)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+def cast_votes(game, voter_id, ballots, requested_round):
+    """
+    Validar la ronda de los votos, registrarlos y hacer commit. Si la partida ya
+    terminó se rehace la clasificación guardada. Devuelve (resultados, None) o
+    (None, respuesta de error).
+    """
+    # Los votos llevan su ronda: pueden llegar después de que el anfitrión avance
+    round_number = votable_round(game, requested_round)
+    if round_number is None:
+        return None, (jsonify({"error": "La ronda de estos votos ya terminó"}), 400)
+    
+    try:
+        results = record_votes(game, voter_id, ballots, round_number)
+        if game.status == 'finished':
+            # Votos de la última ronda llegados tras terminar: rehacer la clasificación
+            store_final_results(game)
+        db.session.commit()
+    except VoteRejected as e:
+        db.session.rollback()
+        return None, (jsonify({"error": str(e)}), 400)
+    except IntegrityError:
+        db.session.rollback()
+        return None, (jsonify({"error": "Ya votaste por uno de estos memes"}), 400)
+    except Exception as e:
+        db.session.rollback()
+        return None, (jsonify({"error": str(e)}), 500)
+    return results, None
 
 @game_bp.route("/vote", methods=["POST"])
 def vote_meme():
@@ -600,119 +1362,140 @@ def vote_meme():
     if "user_id" not in session:
         return jsonify({"error": "No autorizado"}), 401
     
-    data = request.json
+    data = request.get_json(silent=True) or {}
     player_template_id = data.get('player_template_id')
     vote_type = data.get('vote_type')  # 'suave', 'normal', 'me_rei'
     game_code = data.get('game_code')
     
-    # Validaciones
-    if vote_type not in VOTE_POINTS:
-        return jsonify({"error": "Tipo de voto inválido"}), 400
-    
     game = Game.query.filter_by(code=game_code).first_or_404()
-    user = User.query.get(session["user_id"])
-    player_template = PlayerTemplate.query.get_or_404(player_template_id)
+    if type(player_template_id) is not int:
+        return jsonify({"error": "Meme no encontrado en esta ronda"}), 400
     
-    # No permitir votar por tu propio meme
-    if player_template.user_id == user.id:
-        return jsonify({"error": "No puedes votar por tu propio meme"}), 400
+    results, response = cast_votes(game, session["user_id"], [(player_template_id, vote_type)], data.get('round'))
+    if response:
+        return response
     
-    # Verificar si ya votó por este meme
-    existing_vote = Vote.query.filter_by(
-        voter_id=user.id,
-        player_template_id=player_template_id
-    ).first()
+    points, new_total = results[player_template_id]
+    return jsonify({
+        "success": True,
+        "points_given": points,
+        "new_total": new_total
+    })
+
+@game_bp.route("/vote-batch", methods=["POST"])
+def vote_batch():
+    """Registrar todos los votos de un jugador en la ronda en una sola petición"""
+    if "user_id" not in session:
+        return jsonify({"error": "No autorizado"}), 401
     
-    if existing_vote:
-        return jsonify({"error": "Ya votaste por este meme"}), 400
+    # También llega por navigator.sendBeacon al salir de la página (text/plain)
+    data = request.get_json(force=True, silent=True) or {}
+    game_code = data.get('game_code')
+    votes = data.get('votes')
     
-    try:
-        # Crear el voto
-        points = VOTE_POINTS[vote_type]
-        vote = Vote(
-            voter_id=user.id,
-            player_template_id=player_template_id,
-            game_id=game.id,
-            round_number=game.current_round,
-            vote_type=vote_type,
-            points=points
-        )
-        db.session.add(vote)
-        
-        # Actualizar puntos totales del meme
-        player_template.total_points = (player_template.total_points or 0) + points
-        
-        db.session.commit()
-        
-        return jsonify({
-            "success": True,
-            "points_given": points,
-            "new_total": player_template.total_points
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
+    if not isinstance(votes, list) or not all(isinstance(vote, dict) for vote in votes):
+        return jsonify({"error": "Formato de votos inválido"}), 400
+    
+    game = Game.query.filter_by(code=game_code).first_or_404()
+    ballots = [(vote.get('player_template_id'), vote.get('vote_type')) for vote in votes]
+    results, response = cast_votes(game, session["user_id"], ballots, data.get('round'))
+    if response:
+        return response
+    
+    return jsonify({
+        "success": True,
+        "votes_recorded": len(results),
+        "points_given": sum(points for points, _ in results.values())
+    })
 
 @game_bp.route("/podium/<code>")
+@read_only
 def final_podium(code):
     """Mostrar podio final con los mejores memes"""
     if "user_id" not in session:
         return redirect(url_for('auth.show_nickname_form'))
         
     game = Game.query.filter_by(code=code).first_or_404()
-    user = User.query.get(session["user_id"])
     
     if game.status != 'finished':
-        return redirect(url_for('game.waiting_room', code=code))
+        # Todos llegan aquí justo al terminar la partida: la réplica puede no tenerlo aún
+        use_primary()
+        db.session.refresh(game)
+        if game.status != 'finished':
+            return redirect(url_for('game.waiting_room', code=code))
     
-    # Obtener todos los memes del juego ordenados por puntuación
-    all_memes = PlayerTemplate.query.filter_by(
-        game_id=game.id,
-        selected=True
-    ).order_by(PlayerTemplate.total_points.desc()).all()
+    # Resultados materializados al terminar la partida
+    result = GameResult.query.filter_by(game_id=game.id).first()
+    if not result:
+        use_primary()
+        result = GameResult.query.filter_by(game_id=game.id).first()
+    if not result:
+        # Partidas terminadas antes de materializar resultados
+        result = store_final_results(game)
+        db.session.commit()
     
-    # Preparar datos del podio
-    podium_data = []
-    for meme in all_memes:
-        # Determinar la ruta de imagen
-        if meme.template.image_data:
-            image_path = f"/admin/public-image/{meme.template.id}"
-        elif meme.template.image_path:
-            image_path = meme.template.image_path
-        else:
-            image_path = "/static/memes/default.jpg"
-        
-        # Obtener textos del meme
-        texts = []
-        num_boxes = meme.template.num_text_boxes or 2
-        for i in range(1, num_boxes + 1):
-            text_content = getattr(meme, f'text{i}', '') or ''
-            if text_content:
-                texts.append({
-                    'content': text_content,
-                    'x': getattr(meme.template, f'text{i}_x', 50),
-                    'y': getattr(meme.template, f'text{i}_y', 20 if i == 1 else 80),
-                    'size': getattr(meme.template, f'text{i}_size', 24),
-                    'width': getattr(meme.template, f'text{i}_width', 30),
-                    'height': getattr(meme.template, f'text{i}_height', 10)
-                })
+    # El documento no cambia una vez terminada la partida (salvo al desplegar nuevos assets)
+    version = assets_version()
+    etag = f"{result.etag}-{version}" if version else result.etag
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    results = json.loads(result.payload)
+    podium_data = results['memes']
+    winner = podium_data[0] if podium_data else None
+    
+    response = make_response(render_template('game/podium.html',
+                                             game=game,
+                                             memes=podium_data,
+                                             players=results['players'],
+                                             winner=winner,
+                                             page_data={
+                                                 'winner': {
+                                                     'creator_name': winner['creator_name'],
+                                                     'total_points': winner.get('score', winner['total_points'])
+                                                 } if winner else None
+                                             }))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@game_bp.route("/leaderboard")
+@read_only
+def leaderboard():
+    """Ranking global de jugadores (top-N por puntos acumulados)"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    
+    top_players = db.session.query(PlayerStats, User.nickname).join(
+        User, User.id == PlayerStats.user_id
+    ).options(
+        joinedload(PlayerStats.best_meme).joinedload(PlayerTemplate.template)
+    ).order_by(
+        PlayerStats.total_points.desc(), PlayerStats.user_id
+    ).limit(limit).all()
+    
+    leaderboard_data = []
+    for position, (stats, nickname) in enumerate(top_players, start=1):
+        best_meme = None
+        if stats.best_meme:
+            best_meme = {
+                'id': stats.best_meme.id,
+                'template_name': stats.best_meme.template.name if stats.best_meme.template else None,
+                'total_points': stats.best_meme_points
+            }
         
-        meme_data = {
-            'id': meme.id,
-            'creator_name': meme.user.nickname,
-            'image_path': image_path,
-            'template_name': meme.template.name,
-            'texts': texts,
-            'total_points': meme.total_points,
-            'round_number': meme.round_number
-        }
-        podium_data.append(meme_data)
+        leaderboard_data.append({
+            'position': position,
+            'user_id': stats.user_id,
+            'nickname': nickname,
+            'games_played': stats.games_played,
+            'total_points': stats.total_points,
+            'me_rei_count': stats.me_rei_count,
+            'best_meme': best_meme
+        })
     
-    return render_template('game/podium.html',
-                         game=game,
-                         memes=podium_data,
-                         winner=podium_data[0] if podium_data else None)
+    return jsonify({"leaderboard": leaderboard_data})
 
 @game_bp.route("/continue-after-voting/<code>", methods=["POST"])
 def continue_after_voting(code):
@@ -728,14 +1511,23 @@ def continue_after_voting(code):
         return jsonify({"error": "Solo el creador puede continuar"}), 403
         
     if game.current_round >= 3:
-        # Juego terminado
-        game.status = 'finished'
-        db.session.commit()
+        # Juego terminado: calcular la clasificación final una sola vez
+        if game.status != 'finished':
+            game.status = 'finished'
+            bump_game_version(game.id)
+            store_final_results(game)
+            record_finished_game_in_stats(game)
+            db.session.commit()
+        
+        carousel.stop_carousel(code)
         
         # Emitir evento para todos los jugadores de que el juego ha terminado
-        socketio.emit('game_finished', {
+        events.publish(code, 'game_finished', {
+            'status': 'finished',
             'redirect': f"/game/podium/{code}"
-        }, room=code)
+        })
+        # La sala ya no tendrá más eventos: liberar su estado tras las últimas reconexiones
+        events.forget_room_later(code)
         
         return jsonify({"redirect": f"/game/podium/{code}"})
         
@@ -743,10 +1535,11 @@ def continue_after_voting(code):
         # Avanzar a la siguiente ronda
         game.current_round += 1
         game.round_start_time = datetime.utcnow()
+        game.voting_started_at = None
+        bump_game_version(game.id)
         
         # Distribuir nuevas plantillas para la nueva ronda (optimizado)
-        templates = get_active_templates()
-        distribute_templates_optimized(game, templates, game.current_round)
+        distribute_templates_optimized(game, game.current_round)
         
         db.session.commit()
         
@@ -758,14 +1551,13 @@ def continue_after_voting(code):
         
         print(f"Ronda {game.current_round}: Se crearon {created_templates} plantillas para {len(game.players)} jugadores")
         
-        # Emitir evento para todos los jugadores
-        socketio.emit('next_round_started', {
+        carousel.stop_carousel(code)
+        
+        # Emitir evento para todos los jugadores (lleva la ronda y a dónde ir)
+        events.publish(code, 'next_round_started', {
             'round': game.current_round,
             'redirect': f"/game/play/{code}"
-        }, room=code)
-        
-        # También emitir un evento específico para forzar la actualización
-        socketio.emit('force_refresh', room=code)
+        })
         
         return jsonify({"success": True, "redirect": f"/game/play/{code}"})
         
@@ -773,21 +1565,69 @@ def continue_after_voting(code):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+def publish_lobby_update(code):
+    """Enviar la lista de jugadores a la sala mientras la partida está en espera"""
+    game = Game.query.filter_by(code=code).first()
+    if game and game.status == 'waiting':
+        events.publish(code, 'update', build_lobby_state(game), coalesce=True)
+
+def resume_room_events(code, last_seq, epoch):
+    """Enviar solo a este cliente los eventos que se perdió, o 'resync' si ya no están"""
+    missed = events.events_since(code, last_seq, epoch)
+    if missed is not None:
+        for event, payload in missed:
+            emit(event, payload)
+        return
+    
+    # Sin historial suficiente: mandar el estado actual para que el cliente decida
+    game = Game.query.filter_by(code=code).first()
+    snapshot = {"status": game.status if game else "cancelled"}
+    if game:
+        snapshot["round"] = game.current_round
+        if game.status == 'waiting':
+            snapshot.update(build_lobby_state(game))
+        carousel_state = carousel.current_state(code)
+        if carousel_state and carousel_state['round'] == game.current_round:
+            snapshot["carousel"] = carousel_state
+    snapshot.update(get_room_resume_point(code))
+    emit('resync', snapshot)
+
 @socketio.on('join')
 def on_join(data):
     code = data.get('code')
+    if code and not shard_map.is_local(code):
+        # La partida la atiende otro nodo: recargar la página la redirige allí
+        emit('shard_moved', {'url': shard_url(code)})
+        return
     if code:
         join_room(code)
-        emit('update', room=code)
+        last_seq = data.get('last_seq')
+        if isinstance(last_seq, int):
+            resume_room_events(code, last_seq, data.get('epoch'))
+        publish_lobby_update(code)
 
 @socketio.on('leave')
 def on_leave(data):
     code = data.get('code')
     if code:
         leave_room(code)
-        emit('update', room=code)
+        publish_lobby_update(code)
+
+def notify_moved_rooms(previous_ring):
+    """Tras un cambio de nodos, mandar a su nuevo dueño las salas que dejan de ser propias"""
+    for code in events.known_rooms():
+        if not shard_map.is_local(code):
+            events.publish(code, 'shard_moved', {'url': shard_url(code)})
+            carousel.stop_carousel(code)
+            events.forget_room(code)
+    # Volver a cargar el índice de emparejamiento solo con las partidas que ahora son propias
+    matchmaking_index.clear()
+
+shard_map.on_change(notify_moved_rooms)
 
 @game_bp.route("/check-round-status/<code>")
+@rate_limiter.limit()
+@game_version_etag()
 def check_round_status_from_voting(code):
     """Verificar el estado de la ronda desde la fase de votación"""
     if "user_id" not in session:
@@ -836,7 +1676,10 @@ def cleanup_game(code):
             # Si el usuario está en este juego, limpiarlo
             if user.game_id == game.id:
                 user.game_id = None
+                release_seat(game.id)
                 db.session.commit()
+                db.session.refresh(game)
+                refresh_matchmaking(game)
                 
                 # Si el juego ya está terminado, marcarlo como completamente finalizado
                 if game.status == 'finished':
@@ -0,0 +1,90 @@
+"""
+Estadísticas de popularidad de las plantillas (tabla template_stats).
+
+Se actualizan de forma incremental en la misma transacción que el reparto de
+plantillas, el envío de memes y los votos, con un UPDATE agregado por lote; así
+el panel de admin y el reparto ponderado las leen directamente, sin agregar
+player_template ni vote.
+"""
+from datetime import datetime
+from models import db, TemplateStats
+from sqlalchemy import bindparam, insert
+import heapq
+import random
+
+STAT_FIELDS = ('times_offered', 'times_selected', 'total_points', 'vote_count')
+
+# Suavizado de los pesos: cada plantilla parte como si tuviera PRIOR_SELECTIONS
+# envíos con PRIOR_POINTS puntos de media, para que las nuevas también salgan
+PRIOR_SELECTIONS = 5
+PRIOR_POINTS = 5.0
+
+# Segundos que se reutilizan los pesos calculados
+WEIGHTS_TTL = 300
+
+def increment_template_stats(increments):
+    """
+    Sumar contadores a varias plantillas (sin commit).
+    increments: {template_id: {campo: cantidad}} con campos de STAT_FIELDS.
+    """
+    increments = {template_id: fields for template_id, fields in increments.items() if template_id}
+    if not increments:
+        return
+
+    # Crear las filas que falten
+    existing = {template_id for (template_id,) in db.session.query(TemplateStats.template_id).filter(
+        TemplateStats.template_id.in_(increments.keys())
+    )}
+    missing = [template_id for template_id in increments if template_id not in existing]
+    if missing:
+        db.session.execute(insert(TemplateStats), [{'template_id': template_id} for template_id in missing])
+
+    table = TemplateStats.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.template_id == bindparam('stats_template_id'))
+        .values(updated_at=datetime.utcnow(), **{
+            field: table.c[field] + bindparam(f'add_{field}') for field in STAT_FIELDS
+        }),
+        [dict({'stats_template_id': template_id},
+              **{f'add_{field}': fields.get(field, 0) for field in STAT_FIELDS})
+         for template_id, fields in increments.items()]
+    )
+
+_weights = None
+_weights_timestamp = None
+
+def get_template_weights():
+    """
+    Peso de muestreo por plantilla: tasa de selección suavizada por los puntos
+    medios suavizados. Se cachea WEIGHTS_TTL segundos.
+    """
+    global _weights, _weights_timestamp
+    now = datetime.utcnow()
+    if _weights is None or (now - _weights_timestamp).total_seconds() > WEIGHTS_TTL:
+        weights = {}
+        for template_id, offered, selected, points in db.session.query(
+            TemplateStats.template_id, TemplateStats.times_offered,
+            TemplateStats.times_selected, TemplateStats.total_points
+        ):
+            selection_rate = (selected + 1) / (offered + 2)
+            average_points = (points + PRIOR_POINTS * PRIOR_SELECTIONS) / (selected + PRIOR_SELECTIONS)
+            weights[template_id] = selection_rate * average_points
+        _weights = weights
+        _weights_timestamp = now
+    return _weights
+
+def default_weight():
+    """Peso de una plantilla sin estadísticas (el de la distribución previa)"""
+    return 0.5 * PRIOR_POINTS
+
+def weighted_sample(candidates, weights, k, rng=random):
+    """
+    k elementos distintos de candidates con probabilidad proporcional a su peso
+    (Efraimidis-Spirakis: clave u^(1/w), nos quedamos con las k mayores).
+    """
+    fallback = default_weight()
+    return heapq.nlargest(
+        k, candidates,
+        key=lambda candidate: rng.random() ** (1.0 / max(weights.get(candidate, fallback), 1e-9))
+    )
@@ -0,0 +1,61 @@
+"""Página de votación compartida por ronda: se renderiza una vez y se sirve a todos los jugadores"""
+from collections import OrderedDict
+import threading
+
+# Marcador del HTML compartido donde se inyectan los datos propios de cada jugador
+USER_DATA_PLACEHOLDER = '<!--voting-user-data-->'
+
+# Rondas (de distintas partidas) que se mantienen en memoria
+MAX_CACHED_ROUNDS = 256
+
+# Tiempo máximo que una petición espera a que otra termine de construir la página
+BUILD_WAIT_TIMEOUT = 10
+
+class SingleFlightCache:
+    """
+    Caché LRU donde, si varias peticiones piden la misma clave a la vez, solo una
+    construye el valor y las demás esperan su resultado. Si la construcción
+    falla, la siguiente petición en espera lo vuelve a intentar.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._building = {}  # clave -> threading.Event
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                event = self._building.get(key)
+                is_builder = event is None
+                if is_builder:
+                    event = threading.Event()
+                    self._building[key] = event
+
+            if not is_builder:
+                event.wait(BUILD_WAIT_TIMEOUT)
+                continue
+
+            try:
+                value = build()
+                with self._lock:
+                    self._entries[key] = value
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                return value
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+                event.set()
+
+    def __len__(self):
+        return len(self._entries)
+
+voting_page_cache = SingleFlightCache(MAX_CACHED_ROUNDS)
+
+# Memes y votantes de la ronda, para el reparto de las salas grandes
+voting_round_cache = SingleFlightCache(MAX_CACHED_ROUNDS)
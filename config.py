@@ -16,6 +16,12 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Réplica de solo lectura (opcional) para las rutas marcadas con @read_only
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # Segundos tras una escritura de un usuario en los que sus lecturas van al primario
+    REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 5))
+    
     # Redis local para desarrollo (opcional)
     REDIS_URL = os.environ.get(
         "REDIS_URL", 
@@ -27,3 +33,45 @@ class Config:
     SESSION_COOKIE_SAMESITE = "Lax"
     SESSION_COOKIE_SECURE = os.environ.get("FLASK_ENV") == "production"
     PERMANENT_SESSION_LIFETIME = 86400  # 24 horas
+    
+    # Procesos de Pillow para renderizar memes y procesar imágenes (0 = en línea)
+    IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+    # Máximo de píxeles aceptados al decodificar una imagen subida (protección contra decompression bombs)
+    IMAGE_MAX_PIXELS = int(os.environ.get("IMAGE_MAX_PIXELS", 50_000_000))
+    # Formato de los memes renderizados en el servidor (JPEG o WEBP)
+    MEME_RENDER_FORMAT = os.environ.get("MEME_RENDER_FORMAT", "JPEG").upper()
+    
+    # Token bucket de los endpoints de polling (/game/check...): tokens por segundo y ráfaga máxima
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() != "false"
+    RATE_LIMIT_POLL_RATE = float(os.environ.get("RATE_LIMIT_POLL_RATE", 1.0))
+    RATE_LIMIT_POLL_BURST = int(os.environ.get("RATE_LIMIT_POLL_BURST", 5))
+    # "memory" (por proceso) o "redis" (compartido, usa REDIS_URL)
+    RATE_LIMIT_STORAGE = os.environ.get("RATE_LIMIT_STORAGE", "memory").lower()
+    
+    # Segundos que se muestra cada meme en el carrusel de votación
+    VOTING_SECONDS_PER_MEME = float(os.environ.get("VOTING_SECONDS_PER_MEME", 8))
+    
+    # Salas grandes (?large=1): máximo de jugadores y memes que vota cada jugador por ronda
+    LARGE_ROOM_MAX_PLAYERS = int(os.environ.get("LARGE_ROOM_MAX_PLAYERS", 200))
+    LARGE_ROOM_MEMES_PER_VOTER = int(os.environ.get("LARGE_ROOM_MEMES_PER_VOTER", 8))
+    
+    # Repartir las plantillas ponderadas por popularidad (tabla template_stats) en lugar de al azar
+    TEMPLATE_WEIGHTED_SAMPLING = os.environ.get("TEMPLATE_WEIGHTED_SAMPLING", "false").lower() == "true"
+    
+    # Reparto de partidas entre procesos por código de sala (ver sharding.py)
+    SHARD_SELF = os.environ.get("SHARD_SELF")  # URL de este nodo, p. ej. http://127.0.0.1:5001
+    SHARD_NODES = os.environ.get("SHARD_NODES", "")  # URLs de todos los nodos, separadas por comas
+    SHARD_NODES_FILE = os.environ.get("SHARD_NODES_FILE")  # Alternativa: una URL por línea, se relee al cambiar
+    SHARD_VNODES = int(os.environ.get("SHARD_VNODES", 128))
+    
+    # Segundos entre registros de RSS y GC en el log (0 = desactivado, ver profiling.py)
+    MEMORY_LOG_INTERVAL = float(os.environ.get("MEMORY_LOG_INTERVAL", 0))
+    
+    # Consultas lentas: umbral en ms (0 = desactivado), captura del plan y log de cada una (ver slow_queries.py)
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 0))
+    SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() != "false"
+    SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "true").lower() != "false"
+    
+    # Límites de la subida masiva de plantillas
+    BULK_UPLOAD_MAX_FILES = int(os.environ.get("BULK_UPLOAD_MAX_FILES", 200))
+    BULK_UPLOAD_MAX_FILE_BYTES = int(os.environ.get("BULK_UPLOAD_MAX_FILE_BYTES", 20 * 1024 * 1024))
@@ -0,0 +1,106 @@
+"""
+Enrutado de lecturas a una réplica de la base de datos.
+
+Con DATABASE_REPLICA_URL configurada, las rutas marcadas con @read_only leen de
+la réplica (bind "replica"); las escrituras (flush) y todo lo que la petición
+lea después de escribir va siempre al primario. Para que un usuario vea sus
+propios cambios, durante REPLICA_MAX_LAG segundos después de una escritura suya
+sus peticiones también leen del primario.
+"""
+from functools import wraps
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Delete, Insert, Update
+from werkzeug.exceptions import NotFound
+import time
+
+REPLICA_BIND_KEY = 'replica'
+
+# Clave en la sesión de Flask con la hora de la última escritura del usuario
+LAST_WRITE_SESSION_KEY = 'db_last_write'
+
+def _request_flags():
+    """Estado de enrutado de la petición actual (None fuera de una petición)"""
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    return g
+
+class RoutingSession(Session):
+    """Sesión que manda las lecturas de las rutas de solo lectura a la réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _should_read_replica():
+            if not isinstance(clause, (Insert, Update, Delete)):
+                replica = self._db.engines.get(REPLICA_BIND_KEY)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _should_read_replica():
+    flags = _request_flags()
+    return (flags is not None
+            and flags.get('db_read_only', False)
+            and not flags.get('db_use_primary', False))
+
+def use_primary():
+    """Leer del primario durante el resto de la petición (p. ej. antes de modificar datos)"""
+    flags = _request_flags()
+    if flags is not None:
+        flags.db_use_primary = True
+
+def replica_enabled(app):
+    return REPLICA_BIND_KEY in (app.config.get('SQLALCHEMY_BINDS') or {})
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    flags = _request_flags()
+    if flags is not None:
+        # Lo que se lea después de escribir debe ver la escritura
+        flags.db_wrote = True
+        flags.db_use_primary = True
+
+def read_only(view):
+    """
+    Marcar una ruta como de solo lectura: lee de la réplica si está configurada.
+    Si la réplica todavía no tiene el recurso (404), se reintenta en el primario.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        from flask import current_app, g, make_response, session
+        from models import db
+
+        if not replica_enabled(current_app):
+            return view(*args, **kwargs)
+
+        # Read-your-own-writes: el usuario escribió hace poco, la réplica puede no tenerlo
+        last_write = session.get(LAST_WRITE_SESSION_KEY, 0)
+        if time.time() - last_write < current_app.config['REPLICA_MAX_LAG']:
+            return view(*args, **kwargs)
+
+        g.db_read_only = True
+        try:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 404 or g.get('db_use_primary', False):
+                return response
+        except NotFound:
+            if g.get('db_use_primary', False):
+                raise
+
+        db.session.rollback()
+        use_primary()
+        return view(*args, **kwargs)
+    return wrapped
+
+def init_db_routing(app):
+    """Registrar el seguimiento de escrituras por usuario (solo con réplica configurada)"""
+    if not replica_enabled(app):
+        return
+
+    from flask import g, session
+
+    @app.after_request
+    def remember_last_write(response):
+        if g.get('db_wrote'):
+            session[LAST_WRITE_SESSION_KEY] = time.time()
+        return response
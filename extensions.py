@@ -1,5 +1,7 @@
 from flask_socketio import SocketIO
-import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Configuración simple de SocketIO para desarrollo local
 try:
@@ -9,8 +11,6 @@ try:
         engineio_logger=True,  # Habilitar logs de Engine.IO en desarrollo
         cors_allowed_origins="*"
     )
-    print("🚀 SocketIO configurado en modo local (desarrollo)")
 except Exception as e:
-    print(f"⚠️ Error configurando SocketIO: {e}")
-    print("🔧 Continuando sin SocketIO...")
+    logger.warning("Error configurando SocketIO, continuando sin SocketIO: %s", e)
     socketio = None
@@ -0,0 +1,259 @@
+"""
+Procesamiento de imágenes con Pillow fuera del ciclo de las peticiones.
+
+Este módulo no importa Flask ni los modelos para que los procesos del pool
+(arrancados con 'spawn') sean livianos de inicializar.
+"""
+from concurrent.futures import Future
+from functools import lru_cache
+from config import Config
+import threading
+import base64
+import io
+
+# Ancho de referencia (px) con el que se configuran los tamaños de fuente en el editor
+REFERENCE_DISPLAY_WIDTH = 500
+
+# Margen mínimo (ancho intermedio / ancho final) que Image.reduce deja al LANCZOS
+REDUCE_GAP = 1.5
+
+# Fuentes candidatas; si ninguna está instalada se usa la fuente por defecto de Pillow
+FONT_CANDIDATES = (
+    "Roboto-Medium.ttf",
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Pool de procesos compartido para trabajo de imágenes (None si está deshabilitado)"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = Config.IMAGE_WORKERS
+                if workers <= 0:
+                    return None
+                # Se importan aquí: el pool solo se crea con el primer trabajo de imágenes
+                from concurrent.futures import ProcessPoolExecutor
+                import multiprocessing
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+def submit_image_task(fn, *args, **kwargs):
+    """Ejecutar una tarea en el pool de procesos, o en línea si no hay pool"""
+    pool = get_process_pool()
+    if pool is not None:
+        return pool.submit(fn, *args, **kwargs)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def compress_image(image_data, max_width=800, quality=85, max_pixels=None):
+    """
+    Comprime una imagen y la convierte a Base64.
+
+    Las imágenes grandes no se decodifican a resolución completa: los JPEG usan
+    el modo draft (escalado DCT del decodificador) y el resto se reduce con
+    Image.reduce antes del LANCZOS final; la transparencia se aplana después,
+    sobre la imagen ya reducida. Imágenes con más de `max_pixels`
+    píxeles se rechazan antes de decodificarlas (decompression bombs).
+    """
+    from PIL import Image
+
+    if max_pixels is None:
+        max_pixels = Config.IMAGE_MAX_PIXELS
+
+    try:
+        # Abrir imagen desde bytes (solo lee la cabecera)
+        img = Image.open(io.BytesIO(image_data))
+        
+        if img.width * img.height > max_pixels:
+            raise ValueError(
+                f"la imagen tiene {img.width}x{img.height} píxeles (máximo {max_pixels})"
+            )
+        
+        # Decodificar JPEG directamente a escala reducida (1/2, 1/4 o 1/8)
+        if img.format == 'JPEG' and img.width > max_width:
+            target_height = max(int(img.height * max_width / img.width), 1)
+            img.draft('RGB', (max_width, target_height))
+        
+        # Reduce y LANCZOS trabajan con el alfa premultiplicado: se aplana la
+        # transparencia al final, ya a tamaño reducido. Las paletas y modos
+        # raros (CMYK, 16 bits...) no admiten reduce y se convierten antes.
+        if img.mode in ('P', 'PA'):
+            img = img.convert('RGBA' if img.mode == 'PA' or 'transparency' in img.info else 'RGB')
+        elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            img = img.convert('RGB')
+        
+        # Reducción entera rápida dejando al menos REDUCE_GAP veces el ancho final para el LANCZOS
+        factor = int(img.width / (max_width * REDUCE_GAP))
+        if factor >= 2:
+            img = img.reduce(factor)
+        
+        # Redimensionar si es muy grande
+        if img.width > max_width:
+            ratio = max_width / img.width
+            new_height = max(int(img.height * ratio), 1)
+            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+        
+        # Fondo blanco bajo la transparencia (JPEG no tiene alfa)
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img.convert('RGBA'), mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        # Guardar como JPEG comprimido
+        output = io.BytesIO()
+        img.save(output, format='JPEG', quality=quality, optimize=True)
+        compressed_data = output.getvalue()
+        
+        # Convertir a Base64
+        base64_data = base64.b64encode(compressed_data).decode('utf-8')
+        
+        return base64_data, img.width, img.height
+        
+    except Exception as e:
+        raise Exception(f"Error comprimiendo imagen: {str(e)}")
+
+def compute_dhash(image_data, hash_size=8):
+    """
+    Hash perceptual (dHash) de una imagen como entero de hash_size² bits.
+
+    Compara el brillo de píxeles vecinos en una miniatura en escala de grises, así
+    que recompresiones, cambios de tamaño o de calidad dan hashes casi iguales.
+    """
+    from PIL import Image
+    import numpy as np
+
+    img = Image.open(io.BytesIO(image_data))
+    if img.format == 'JPEG':
+        img.draft('L', (hash_size * 8, hash_size * 8))
+    img = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def format_phash(value):
+    """Representación hexadecimal de ancho fijo para guardar en la base de datos"""
+    return f"{value:016x}"
+
+def prepare_template_image(image_data):
+    """Comprimir una plantilla subida y calcular su hash perceptual (apto para el pool)"""
+    base64_data, width, height = compress_image(image_data)
+    phash = compute_dhash(base64.b64decode(base64_data))
+    return base64_data, width, height, format_phash(phash)
+
+@lru_cache(maxsize=64)
+def _load_font(size):
+    from PIL import ImageFont
+
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+def _wrap_text(draw, text, font, max_width):
+    """Partir el texto en líneas que quepan en el ancho de la caja"""
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}".strip()
+            if draw.textlength(candidate, font=font) <= max_width:
+                current = candidate
+                continue
+            if current:
+                lines.append(current)
+            # Palabras más largas que la caja se cortan por caracteres
+            current = ""
+            for char in word:
+                if draw.textlength(current + char, font=font) > max_width and current:
+                    lines.append(current)
+                    current = ""
+                current += char
+        lines.append(current)
+    return lines
+
+def _fit_text(draw, text, base_size, box_width, box_height, min_size):
+    """Reducir el tamaño de fuente hasta que el texto quepa (igual que adjustTextSize en el cliente)"""
+    size = base_size
+    for _ in range(20):
+        font = _load_font(int(size))
+        lines = _wrap_text(draw, text, font, box_width)
+        line_height = int(size * 1.15)
+        if line_height * len(lines) <= box_height or size <= min_size:
+            return font, lines, line_height
+        size = max(size * 0.9, min_size)
+    return font, lines, line_height
+
+def render_meme(image_bytes, texts, output_format="JPEG", quality=85):
+    """
+    Componer los textos de un meme sobre su plantilla y devolver la imagen final.
+
+    `texts` usa el mismo formato que se envía al cliente: content, x, y, width,
+    height (porcentajes) y size (px sobre un ancho de 500px).
+    """
+    from PIL import Image, ImageDraw
+
+    base = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
+    width, height = base.size
+    scale = width / REFERENCE_DISPLAY_WIDTH
+
+    overlay = Image.new("RGBA", base.size, (255, 255, 255, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    for text in texts:
+        left = width * float(text["x"]) / 100
+        top = height * float(text["y"]) / 100
+        box_width = width * float(text["width"]) / 100
+        box_height = height * float(text["height"]) / 100
+
+        # Caja blanca semitransparente como en la vista del juego
+        draw.rounded_rectangle(
+            (left, top, left + box_width, top + box_height),
+            radius=int(6 * scale),
+            fill=(255, 255, 255, 235)
+        )
+
+        pad_x, pad_y = 8 * scale, 6 * scale
+        font, lines, line_height = _fit_text(
+            draw,
+            text["content"],
+            max(float(text["size"]) * scale, 1),
+            max(box_width - 2 * pad_x, 1),
+            max(box_height - 2 * pad_y, 1),
+            10 * scale
+        )
+
+        # Centrar el bloque de texto vertical y horizontalmente
+        y = top + (box_height - line_height * len(lines)) / 2
+        for line in lines:
+            line_width = draw.textlength(line, font=font)
+            draw.text((left + (box_width - line_width) / 2, y), line, font=font, fill=(0, 0, 0, 255))
+            y += line_height
+
+    result = Image.alpha_composite(base, overlay).convert("RGB")
+    output = io.BytesIO()
+    if output_format.upper() == "WEBP":
+        result.save(output, format="WEBP", quality=quality, method=4)
+    else:
+        result.save(output, format="JPEG", quality=quality, optimize=True)
+    return output.getvalue()
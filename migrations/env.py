@@ -72,8 +72,10 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        # SQLite no admite la mayoría de ALTER TABLE: las migraciones usan batch_alter_table
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            render_as_batch=True
         )
 
         with context.begin_transaction():
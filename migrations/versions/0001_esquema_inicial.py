@@ -0,0 +1,194 @@
+"""Esquema inicial
+
+Tablas tal como las creaba db.create_all() antes de usar migraciones. Una base
+de datos ya existente se marca con `flask db stamp 0001` en lugar de aplicarla.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 17:54:34.595374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('game',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=6), nullable=False),
+    sa.Column('is_private', sa.Boolean(), nullable=True),
+    sa.Column('max_players', sa.Integer(), nullable=True),
+    sa.Column('rounds', sa.Integer(), nullable=True),
+    sa.Column('current_round', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('round_start_time', sa.DateTime(), nullable=True),
+    sa.Column('round_duration', sa.Integer(), nullable=True),
+    sa.Column('templates_per_round', sa.Integer(), nullable=True),
+    sa.Column('rounds_completed', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('creator_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_code'), ['code'], unique=True)
+
+    op.create_table('meme_template',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('image_path', sa.String(length=255), nullable=True),
+    sa.Column('image_data', sa.Text(), nullable=True),
+    sa.Column('image_filename', sa.String(length=255), nullable=True),
+    sa.Column('image_mimetype', sa.String(length=100), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('uploaded_by_user', sa.Boolean(), nullable=True),
+    sa.Column('num_text_boxes', sa.Integer(), nullable=True),
+    sa.Column('text1_label', sa.String(length=50), nullable=True),
+    sa.Column('text1_x', sa.Float(), nullable=True),
+    sa.Column('text1_y', sa.Float(), nullable=True),
+    sa.Column('text1_size', sa.Integer(), nullable=True),
+    sa.Column('text1_width', sa.Float(), nullable=True),
+    sa.Column('text1_height', sa.Float(), nullable=True),
+    sa.Column('text2_label', sa.String(length=50), nullable=True),
+    sa.Column('text2_x', sa.Float(), nullable=True),
+    sa.Column('text2_y', sa.Float(), nullable=True),
+    sa.Column('text2_size', sa.Integer(), nullable=True),
+    sa.Column('text2_width', sa.Float(), nullable=True),
+    sa.Column('text2_height', sa.Float(), nullable=True),
+    sa.Column('text3_label', sa.String(length=50), nullable=True),
+    sa.Column('text3_x', sa.Float(), nullable=True),
+    sa.Column('text3_y', sa.Float(), nullable=True),
+    sa.Column('text3_size', sa.Integer(), nullable=True),
+    sa.Column('text3_width', sa.Float(), nullable=True),
+    sa.Column('text3_height', sa.Float(), nullable=True),
+    sa.Column('text4_label', sa.String(length=50), nullable=True),
+    sa.Column('text4_x', sa.Float(), nullable=True),
+    sa.Column('text4_y', sa.Float(), nullable=True),
+    sa.Column('text4_size', sa.Integer(), nullable=True),
+    sa.Column('text4_width', sa.Float(), nullable=True),
+    sa.Column('text4_height', sa.Float(), nullable=True),
+    sa.Column('text5_label', sa.String(length=50), nullable=True),
+    sa.Column('text5_x', sa.Float(), nullable=True),
+    sa.Column('text5_y', sa.Float(), nullable=True),
+    sa.Column('text5_size', sa.Integer(), nullable=True),
+    sa.Column('text5_width', sa.Float(), nullable=True),
+    sa.Column('text5_height', sa.Float(), nullable=True),
+    sa.Column('image_width', sa.Integer(), nullable=True),
+    sa.Column('image_height', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('meme_template', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_meme_template_active'), ['active'], unique=False)
+
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nickname', sa.String(length=50), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=True),
+    sa.Column('game_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['game.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nickname')
+    )
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_game_id'), ['game_id'], unique=False)
+
+    # game y user se referencian mutuamente: la clave de creator_id se añade
+    # cuando ya existen las dos tablas
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_game_creator_id_user', 'user', ['creator_id'], ['id'])
+
+    op.create_table('player_template',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('game_id', sa.Integer(), nullable=True),
+    sa.Column('template_id', sa.Integer(), nullable=True),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('selected', sa.Boolean(), nullable=True),
+    sa.Column('text_top', sa.String(length=200), nullable=True),
+    sa.Column('text_bottom', sa.String(length=200), nullable=True),
+    sa.Column('text1', sa.String(length=200), nullable=True),
+    sa.Column('text2', sa.String(length=200), nullable=True),
+    sa.Column('text3', sa.String(length=200), nullable=True),
+    sa.Column('text4', sa.String(length=200), nullable=True),
+    sa.Column('text5', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('total_points', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['game.id'], ),
+    sa.ForeignKeyConstraint(['template_id'], ['meme_template.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('player_template', schema=None) as batch_op:
+        batch_op.create_index('idx_game_round_selected', ['game_id', 'round_number', 'selected'], unique=False)
+        batch_op.create_index('idx_user_game_round', ['user_id', 'game_id', 'round_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_player_template_game_id'), ['game_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_player_template_round_number'), ['round_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_player_template_selected'), ['selected'], unique=False)
+        batch_op.create_index(batch_op.f('ix_player_template_user_id'), ['user_id'], unique=False)
+
+    op.create_table('vote',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('voter_id', sa.Integer(), nullable=False),
+    sa.Column('player_template_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('round_number', sa.Integer(), nullable=False),
+    sa.Column('vote_type', sa.String(length=20), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['game.id'], ),
+    sa.ForeignKeyConstraint(['player_template_id'], ['player_template.id'], ),
+    sa.ForeignKeyConstraint(['voter_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('voter_id', 'player_template_id', name='unique_vote_per_meme')
+    )
+    with op.batch_alter_table('vote', schema=None) as batch_op:
+        batch_op.create_index('idx_game_round_vote', ['game_id', 'round_number'], unique=False)
+        batch_op.create_index('idx_template_votes', ['player_template_id', 'vote_type'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vote_game_id'), ['game_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vote_player_template_id'), ['player_template_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vote_round_number'), ['round_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vote_voter_id'), ['voter_id'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('vote', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_vote_voter_id'))
+        batch_op.drop_index(batch_op.f('ix_vote_round_number'))
+        batch_op.drop_index(batch_op.f('ix_vote_player_template_id'))
+        batch_op.drop_index(batch_op.f('ix_vote_game_id'))
+        batch_op.drop_index('idx_template_votes')
+        batch_op.drop_index('idx_game_round_vote')
+
+    op.drop_table('vote')
+    with op.batch_alter_table('player_template', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_player_template_user_id'))
+        batch_op.drop_index(batch_op.f('ix_player_template_selected'))
+        batch_op.drop_index(batch_op.f('ix_player_template_round_number'))
+        batch_op.drop_index(batch_op.f('ix_player_template_game_id'))
+        batch_op.drop_index('idx_user_game_round')
+        batch_op.drop_index('idx_game_round_selected')
+
+    op.drop_table('player_template')
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_game_creator_id_user', type_='foreignkey')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_game_id'))
+
+    op.drop_table('user')
+    with op.batch_alter_table('meme_template', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_meme_template_active'))
+
+    op.drop_table('meme_template')
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_game_code'))
+
+    op.drop_table('game')
@@ -0,0 +1,130 @@
+"""Columnas y tablas del rendimiento
+
+Añade los contadores desnormalizados, el estado del muestreo de plantillas,
+la versión de la partida y las tablas de resultados, estadísticas y memes
+renderizados. Las columnas NOT NULL llevan server_default para poder añadirse
+a tablas con filas, y los contadores se rellenan a partir de los datos actuales.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 17:54:39.046135
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tablas nuevas
+    op.create_table('rendered_meme',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('image_data', sa.Text(), nullable=False),
+    sa.Column('image_mimetype', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+    op.create_table('game_result',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('etag', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['game.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game_result', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_result_game_id'), ['game_id'], unique=True)
+
+    op.create_table('template_stats',
+    sa.Column('template_id', sa.Integer(), nullable=False),
+    sa.Column('times_offered', sa.Integer(), nullable=False),
+    sa.Column('times_selected', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('vote_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['template_id'], ['meme_template.id'], ),
+    sa.PrimaryKeyConstraint('template_id')
+    )
+    op.create_table('player_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('me_rei_count', sa.Integer(), nullable=False),
+    sa.Column('best_meme_id', sa.Integer(), nullable=True),
+    sa.Column('best_meme_points', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['best_meme_id'], ['player_template.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.create_index('idx_leaderboard_points', ['total_points', 'user_id'], unique=False)
+
+    # Columnas nuevas en tablas existentes
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seats_taken', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('large_room', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('template_seed', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('template_pool_size', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('template_offset', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('template_epoch', sa.Integer(), nullable=True, server_default='0'))
+        batch_op.add_column(sa.Column('voting_started_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('meme_template', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phash', sa.String(length=16), nullable=True))
+        batch_op.create_index(batch_op.f('ix_meme_template_phash'), ['phash'], unique=False)
+
+    with op.batch_alter_table('player_template', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('vote_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('render_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_player_template_render_hash'), ['render_hash'], unique=False)
+
+    # Rellenar los contadores de las filas existentes
+    op.execute(
+        'UPDATE game SET seats_taken = '
+        '(SELECT COUNT(*) FROM "user" WHERE "user".game_id = game.id)'
+    )
+    op.execute(
+        'UPDATE player_template SET vote_count = '
+        '(SELECT COUNT(*) FROM vote WHERE vote.player_template_id = player_template.id)'
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('player_template', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_player_template_render_hash'))
+        batch_op.drop_column('render_hash')
+        batch_op.drop_column('vote_count')
+
+    with op.batch_alter_table('meme_template', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_meme_template_phash'))
+        batch_op.drop_column('phash')
+
+    with op.batch_alter_table('game', schema=None) as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('voting_started_at')
+        batch_op.drop_column('template_epoch')
+        batch_op.drop_column('template_offset')
+        batch_op.drop_column('template_pool_size')
+        batch_op.drop_column('template_seed')
+        batch_op.drop_column('large_room')
+        batch_op.drop_column('seats_taken')
+
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.drop_index('idx_leaderboard_points')
+
+    op.drop_table('player_stats')
+    op.drop_table('template_stats')
+    with op.batch_alter_table('game_result', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_game_result_game_id'))
+
+    op.drop_table('game_result')
+    op.drop_table('rendered_meme')
@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+# La sesión enruta las lecturas de las rutas @read_only a la réplica (ver db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -16,6 +18,8 @@ class Game(db.Model):
     code = db.Column(db.String(6), unique=True, nullable=False, index=True)
     is_private = db.Column(db.Boolean, default=True)
     max_players = db.Column(db.Integer, default=15)
+    seats_taken = db.Column(db.Integer, default=0, nullable=False)  # Plazas reservadas (se actualiza con UPDATE condicional)
+    large_room = db.Column(db.Boolean, default=False, nullable=False)  # Sala grande: cada jugador vota solo una muestra de memes
     rounds = db.Column(db.Integer, default=3)
     current_round = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -25,6 +29,13 @@ class Game(db.Model):
     templates_per_round = db.Column(db.Integer, default=5)
     rounds_completed = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20), default='waiting')  # waiting, started, finished
+    # Reparto de plantillas sin repetidos: permutación del catálogo definida por semilla
+    template_seed = db.Column(db.Integer, nullable=True)
+    template_pool_size = db.Column(db.Integer, nullable=True)  # Tamaño de la permutación (mayor ID activo + 1 al barajar)
+    template_offset = db.Column(db.Integer, default=0)  # Posiciones de la permutación ya recorridas
+    template_epoch = db.Column(db.Integer, default=0)  # Vueltas completas al catálogo (se rebaraja al agotarse)
+    voting_started_at = db.Column(db.DateTime, nullable=True)  # Inicio del carrusel de votación de la ronda actual
+    version = db.Column(db.Integer, default=0, nullable=False)  # Sube con cada cambio de estado (ETag de los endpoints de polling)
     creator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     # Definir la relación con los jugadores
     players = db.relationship('User', 
@@ -46,6 +57,7 @@ class MemeTemplate(db.Model):
     image_data = db.Column(db.Text, nullable=True)  # Base64 de la imagen comprimida
     image_filename = db.Column(db.String(255), nullable=True)  # Nombre original del archivo
     image_mimetype = db.Column(db.String(100), nullable=True)  # Tipo MIME (image/jpeg, image/png, etc.)
+    phash = db.Column(db.String(16), nullable=True, index=True)  # Hash perceptual (dHash de 64 bits en hex)
     
     name = db.Column(db.String(100))
     active = db.Column(db.Boolean, default=True, index=True)  # Índice para consultas de plantillas activas
@@ -111,6 +123,8 @@ class PlayerTemplate(db.Model):
     text5 = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     total_points = db.Column(db.Integer, default=0)  # Puntos totales recibidos
+    vote_count = db.Column(db.Integer, default=0, nullable=False)  # Votos recibidos (para normalizar en salas grandes)
+    render_hash = db.Column(db.String(64), nullable=True, index=True)  # Hash del meme renderizado en el servidor
     
     # Relaciones
     user = db.relationship('User', backref='player_templates')
@@ -145,3 +159,65 @@ class Vote(db.Model):
         db.Index('idx_game_round_vote', 'game_id', 'round_number'),
         db.Index('idx_template_votes', 'player_template_id', 'vote_type'),
     )
+
+class GameResult(db.Model):
+    __tablename__ = 'game_result'
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False, unique=True, index=True)
+    payload = db.Column(db.Text, nullable=False)  # Documento JSON con la clasificación final
+    etag = db.Column(db.String(64), nullable=False)  # Hash del documento para respuestas 304
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relaciones
+    game = db.relationship('Game', backref=db.backref('result', uselist=False))
+
+class PlayerStats(db.Model):
+    __tablename__ = 'player_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    games_played = db.Column(db.Integer, default=0, nullable=False)
+    total_points = db.Column(db.Integer, default=0, nullable=False)  # Puntos recibidos en todas las partidas
+    me_rei_count = db.Column(db.Integer, default=0, nullable=False)  # Votos 'me_rei' recibidos
+    best_meme_id = db.Column(db.Integer, db.ForeignKey('player_template.id'), nullable=True)
+    best_meme_points = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relaciones
+    user = db.relationship('User', backref=db.backref('stats', uselist=False))
+    best_meme = db.relationship('PlayerTemplate')
+    
+    # Índice para el top-N del ranking global sin recorrer el historial
+    __table_args__ = (
+        db.Index('idx_leaderboard_points', 'total_points', 'user_id'),
+    )
+
+class TemplateStats(db.Model):
+    """Popularidad de cada plantilla, mantenida de forma incremental al repartir, enviar y votar"""
+    __tablename__ = 'template_stats'
+    template_id = db.Column(db.Integer, db.ForeignKey('meme_template.id'), primary_key=True)
+    times_offered = db.Column(db.Integer, default=0, nullable=False)  # Veces repartida a un jugador
+    times_selected = db.Column(db.Integer, default=0, nullable=False)  # Veces enviada como meme
+    total_points = db.Column(db.Integer, default=0, nullable=False)  # Puntos recibidos por sus memes
+    vote_count = db.Column(db.Integer, default=0, nullable=False)  # Votos recibidos por sus memes
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relaciones
+    template = db.relationship('MemeTemplate', backref=db.backref(
+        'stats', uselist=False, cascade='all, delete-orphan'
+    ))
+    
+    @property
+    def selection_rate(self):
+        return self.times_selected / self.times_offered if self.times_offered else 0
+    
+    @property
+    def average_points(self):
+        """Puntos medios por meme enviado con esta plantilla"""
+        return self.total_points / self.times_selected if self.times_selected else 0
+
+class RenderedMeme(db.Model):
+    __tablename__ = 'rendered_meme'
+    # Hash del contenido (plantilla + textos + formato): memes idénticos comparten imagen
+    content_hash = db.Column(db.String(64), primary_key=True)
+    image_data = db.Column(db.Text, nullable=False)  # Base64 de la imagen final
+    image_mimetype = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,206 @@
+"""
+Perfilado de memoria del proceso, para ver por qué crece el RSS de un worker
+que lleva horas en marcha (cadenas Base64 de plantillas, identity maps del ORM,
+cachés a nivel de módulo...).
+
+- tracemalloc se arranca y se para bajo demanda desde el admin; las instantáneas
+  se guardan con nombre y se comparan agrupadas por archivo o línea.
+- El recuento de objetos del ORM recorre el heap (gc.get_objects) solo cuando se
+  pide.
+- Con MEMORY_LOG_INTERVAL > 0 un hilo escribe cada N segundos el RSS, el estado
+  del recolector y el tiempo pasado en pausas de GC.
+
+Desactivado (lo normal) no cuesta nada: tracemalloc no está activo y no hay hilo
+ni callbacks del GC registrados.
+"""
+from collections import OrderedDict
+import gc
+import os
+import threading
+import time
+import tracemalloc
+
+# Instantáneas que se conservan en memoria (cada una puede ocupar varios MB)
+MAX_SNAPSHOTS = 5
+
+# Marcos de pila guardados por reserva al arrancar tracemalloc
+DEFAULT_TRACE_FRAMES = 1
+
+SNAPSHOT_GROUPS = ('filename', 'lineno', 'traceback')
+
+# Reservas del propio perfilado o del arranque del intérprete, que solo meten ruido
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_lock = threading.Lock()
+_snapshots = OrderedDict()  # nombre -> (hora, tracemalloc.Snapshot)
+_snapshot_counter = 0
+
+def get_rss():
+    """Memoria residente del proceso en bytes (None si no se puede leer)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Sin /proc solo está el pico (KB en Linux, bytes en macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def start_tracing(frames=DEFAULT_TRACE_FRAMES):
+    """Arrancar tracemalloc (si ya estaba activo no hace nada)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, frames))
+    return tracemalloc.get_traceback_limit()
+
+def stop_tracing():
+    """Parar tracemalloc y descartar las instantáneas (apuntan a trazas que ya no existen)"""
+    global _snapshot_counter
+    with _lock:
+        _snapshots.clear()
+        _snapshot_counter = 0
+    tracemalloc.stop()
+
+def take_snapshot(name=None):
+    """Tomar una instantánea de las reservas vivas; devuelve su nombre"""
+    global _snapshot_counter
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc no está activo")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    with _lock:
+        _snapshot_counter += 1
+        name = name or str(_snapshot_counter)
+        _snapshots.pop(name, None)
+        _snapshots[name] = (time.time(), snapshot)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return name
+
+def list_snapshots():
+    with _lock:
+        return [{'name': name, 'taken_at': taken_at} for name, (taken_at, _) in _snapshots.items()]
+
+def _get_snapshot(name):
+    with _lock:
+        if name is None and _snapshots:
+            name = next(reversed(_snapshots))
+        entry = _snapshots.get(name)
+    if entry is None:
+        raise KeyError(f"Instantánea no encontrada: {name}")
+    return entry[1]
+
+def _format_trace(traceback):
+    return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+
+def snapshot_top(name=None, group_by='lineno', limit=25):
+    """Mayores consumidores de una instantánea (la última si no se indica)"""
+    stats = _get_snapshot(name).statistics(group_by)
+    return [{
+        'where': _format_trace(stat.traceback),
+        'size': stat.size,
+        'count': stat.count
+    } for stat in stats[:limit]]
+
+def snapshot_diff(old_name=None, new_name=None, group_by='lineno', limit=25):
+    """
+    Diferencias entre dos instantáneas, ordenadas por crecimiento. Sin nombres
+    compara las dos últimas.
+    """
+    with _lock:
+        names = list(_snapshots)
+    if old_name is None and new_name is None:
+        if len(names) < 2:
+            raise KeyError("Hacen falta al menos dos instantáneas")
+        old_name, new_name = names[-2], names[-1]
+    old = _get_snapshot(old_name)
+    new = _get_snapshot(new_name)
+    stats = new.compare_to(old, group_by)
+    return [{
+        'where': _format_trace(stat.traceback),
+        'size': stat.size,
+        'size_diff': stat.size_diff,
+        'count': stat.count,
+        'count_diff': stat.count_diff
+    } for stat in stats[:limit]]
+
+def orm_object_counts(model_base):
+    """
+    Instancias vivas de cada modelo del ORM en todo el proceso (recorre el heap:
+    solo bajo demanda).
+    """
+    classes = {mapper.class_: mapper.class_.__name__ for mapper in model_base.registry.mappers}
+    counts = dict.fromkeys(classes.values(), 0)
+    for obj in gc.get_objects():
+        name = classes.get(type(obj))
+        if name is not None:
+            counts[name] += 1
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+# Pausas del recolector: solo se miden con el registro periódico activo
+_gc_pause = {'total': 0.0, 'max': 0.0, 'collections': 0}
+_gc_started = [None]
+
+def _on_gc(phase, info):
+    if phase == 'start':
+        _gc_started[0] = time.perf_counter()
+    elif _gc_started[0] is not None:
+        pause = time.perf_counter() - _gc_started[0]
+        _gc_started[0] = None
+        _gc_pause['total'] += pause
+        _gc_pause['max'] = max(_gc_pause['max'], pause)
+        _gc_pause['collections'] += 1
+
+def memory_stats():
+    """RSS, estado del GC y de tracemalloc en este momento"""
+    stats = {
+        'rss': get_rss(),
+        'gc_counts': gc.get_count(),
+        'gc_collections': [generation['collections'] for generation in gc.get_stats()],
+        'gc_garbage': len(gc.garbage),
+        'tracing': tracemalloc.is_tracing(),
+    }
+    if _on_gc in gc.callbacks:
+        stats['gc_pause'] = dict(_gc_pause)
+    if stats['tracing']:
+        current, peak = tracemalloc.get_traced_memory()
+        stats['traced_current'] = current
+        stats['traced_peak'] = peak
+    return stats
+
+def _format_bytes(value):
+    return f"{value / (1024 * 1024):.1f} MB" if value is not None else "?"
+
+def _log_memory(interval, sleep):
+    previous_rss = None
+    while True:
+        stats = memory_stats()
+        rss = stats['rss']
+        delta = f" ({(rss - previous_rss) / (1024 * 1024):+.1f} MB)" if rss is not None and previous_rss is not None else ""
+        line = (f"🧠 RSS {_format_bytes(rss)}{delta} · GC {stats['gc_counts']} "
+                f"colecciones {stats['gc_collections']} · pausas {_gc_pause['total'] * 1000:.0f} ms "
+                f"(máx {_gc_pause['max'] * 1000:.1f} ms)")
+        if stats['tracing']:
+            line += f" · tracemalloc {_format_bytes(stats['traced_current'])} (pico {_format_bytes(stats['traced_peak'])})"
+        print(line, flush=True)
+        previous_rss = rss
+        sleep(interval)
+
+def init_profiling(app, socketio=None):
+    """Arrancar el registro periódico de memoria si MEMORY_LOG_INTERVAL > 0"""
+    interval = app.config.get('MEMORY_LOG_INTERVAL', 0)
+    if not interval or interval <= 0:
+        return
+    if _on_gc not in gc.callbacks:
+        gc.callbacks.append(_on_gc)
+    if socketio is not None:
+        socketio.start_background_task(_log_memory, interval, socketio.sleep)
+    else:
+        threading.Thread(target=_log_memory, args=(interval, time.sleep), daemon=True).start()
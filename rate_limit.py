@@ -0,0 +1,200 @@
+"""
+Control de admisión con token bucket para los endpoints que los clientes
+consultan en bucle.
+
+Cada cliente (usuario de la sesión o IP) tiene un bucket por endpoint que se
+recarga a RATE_LIMIT_POLL_RATE tokens/segundo hasta RATE_LIMIT_POLL_BURST. Sin
+tokens, la petición no llega a la base de datos: se responde con el último
+estado que se le devolvió a ese cliente (con su ETag y Cache-Control, o 304 si
+el cliente ya lo tiene) o, si no hay, con 429 y Retry-After.
+
+Los buckets viven en memoria del proceso, o en Redis (compartidos entre
+procesos) con RATE_LIMIT_STORAGE=redis y REDIS_URL.
+"""
+from collections import Counter, OrderedDict
+from functools import wraps
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Clientes distintos recordados en memoria (buckets y última respuesta)
+MAX_TRACKED_CLIENTS = 10000
+
+# Cabeceras de la última respuesta que se repiten al servirla sin tokens
+REPLAYED_HEADERS = ('ETag', 'Cache-Control')
+
+# Actualización atómica del bucket en Redis: devuelve {permitido, tokens restantes}
+REDIS_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class LRUDict:
+    """Diccionario acotado que descarta la entrada usada hace más tiempo"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+class MemoryBucketStore:
+    """Buckets en memoria del proceso"""
+
+    def __init__(self):
+        self._buckets = LRUDict(MAX_TRACKED_CLIENTS)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity):
+        """Consumir un token; devuelve (permitido, tokens restantes)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens, last = bucket
+                tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets.set(key, (tokens, now))
+        return allowed, tokens
+
+class RedisBucketStore:
+    """Buckets en Redis, compartidos por todos los procesos"""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(REDIS_TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, rate, capacity):
+        allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[rate, capacity, time.time()])
+        return bool(allowed), float(tokens)
+
+class RateLimiter:
+    def __init__(self):
+        self._store = None
+        self._store_lock = threading.Lock()
+        self._last_responses = LRUDict(MAX_TRACKED_CLIENTS)
+        self._responses_lock = threading.Lock()
+        self._stats = {}  # endpoint -> Counter(allowed, stale, rejected)
+        self._stats_lock = threading.Lock()
+
+    def _get_store(self, config):
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = self._create_store(config)
+        return self._store
+
+    def _create_store(self, config):
+        if config.get('RATE_LIMIT_STORAGE') == 'redis':
+            try:
+                store = RedisBucketStore(config['REDIS_URL'])
+                logger.info("Rate limiting compartido en Redis")
+                return store
+            except ImportError:
+                logger.warning("Paquete redis no instalado: rate limiting en memoria")
+        return MemoryBucketStore()
+
+    def _count(self, endpoint, outcome):
+        with self._stats_lock:
+            self._stats.setdefault(endpoint, Counter())[outcome] += 1
+
+    def get_stats(self):
+        """Peticiones admitidas, servidas con el último estado y rechazadas, por endpoint"""
+        with self._stats_lock:
+            stats = {endpoint: dict(counter) for endpoint, counter in self._stats.items()}
+        for counter in stats.values():
+            total = sum(counter.values())
+            shed = counter.get('stale', 0) + counter.get('rejected', 0)
+            counter['shed_ratio'] = round(shed / total, 4) if total else 0.0
+        return stats
+
+    def limit(self, rate=None, burst=None):
+        """Decorador: aplicar el token bucket a una ruta (por defecto los límites de polling)"""
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                from flask import current_app, make_response, request, session
+
+                config = current_app.config
+                if not config.get('RATE_LIMIT_ENABLED', True):
+                    return view(*args, **kwargs)
+
+                endpoint = request.endpoint
+                client = f"user:{session['user_id']}" if 'user_id' in session else f"ip:{request.remote_addr}"
+                key = f"{endpoint}:{client}:{request.path}"
+                refill = rate or config['RATE_LIMIT_POLL_RATE']
+                capacity = burst or config['RATE_LIMIT_POLL_BURST']
+
+                try:
+                    allowed, tokens = self._get_store(config).take(key, refill, capacity)
+                except Exception as e:
+                    # Si falla el almacenamiento compartido, no bloquear el juego
+                    logger.warning("Error en rate limiting, se admite la petición: %s", e)
+                    allowed, tokens = True, 0
+
+                if allowed:
+                    self._count(endpoint, 'allowed')
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code == 200 and response.is_json:
+                        headers = {name: response.headers[name] for name in REPLAYED_HEADERS
+                                   if name in response.headers}
+                        with self._responses_lock:
+                            self._last_responses.set(key, (response.get_data(), headers))
+                    return response
+
+                with self._responses_lock:
+                    last = self._last_responses.get(key)
+                if last is not None:
+                    # Sin tokens: repetir el último estado conocido sin tocar la base de datos
+                    self._count(endpoint, 'stale')
+                    last_body, headers = last
+                    response = current_app.response_class(last_body, mimetype='application/json')
+                    response.headers.update(headers)
+                    etag, _ = response.get_etag()
+                    if etag is not None and request.if_none_match.contains_weak(etag):
+                        # El cliente ya tiene ese estado: ni siquiera repetir el cuerpo
+                        response = current_app.response_class(status=304)
+                        response.headers.update(headers)
+                    response.headers['X-RateLimit-Stale'] = '1'
+                    return response
+
+                self._count(endpoint, 'rejected')
+                retry_after = max(1, math.ceil((1 - tokens) / refill))
+                response = make_response({"error": "Demasiadas peticiones"}, 429)
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            return wrapped
+        return decorator
+
+rate_limiter = RateLimiter()
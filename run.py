@@ -1,11 +1,10 @@
 from app import create_app
-import sys
 import os
 
-# Crear la aplicación
-app = create_app()
-
+# En producción: gunicorn "app:create_app()" (importar este módulo no crea la aplicación)
 if __name__ == '__main__':
+    app = create_app()
+
     # Configuración para desarrollo local
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Lanzar varios procesos de la aplicación en una misma máquina, uno por núcleo,
+repartiendo las partidas por código de sala (ver sharding.py).
+
+Escribe la lista de nodos en SHARD_NODES_FILE (por defecto shards.txt): editar
+ese archivo con los procesos en marcha añade o quita nodos sin reiniciarlos.
+
+Uso:
+    python run_shards.py                         # un proceso por núcleo desde el puerto 5001
+    python run_shards.py --workers 4 --base-port 6001
+    python run_shards.py --dev                   # con run.py (servidor de desarrollo)
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_NODES_FILE = os.path.join(ROOT, "shards.txt")
+
+def node_url(host, port):
+    return f"http://{host}:{port}"
+
+def start_node(host, port, nodes_file, dev):
+    env = dict(os.environ,
+               PORT=str(port),
+               SHARD_SELF=node_url(host, port),
+               SHARD_NODES_FILE=nodes_file)
+    if dev:
+        command = [sys.executable, "run.py"]
+    else:
+        command = ["gunicorn", "--worker-class", "eventlet", "-w", "1",
+                   "-b", f"{host}:{port}", "app:create_app()"]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+def main():
+    parser = argparse.ArgumentParser(description="Lanzar un proceso por núcleo con reparto de partidas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=5001)
+    parser.add_argument("--nodes-file", default=DEFAULT_NODES_FILE)
+    parser.add_argument("--dev", action="store_true", help="Usar run.py en lugar de gunicorn")
+    args = parser.parse_args()
+
+    ports = [args.base_port + i for i in range(args.workers)]
+    with open(args.nodes_file, "w") as f:
+        f.write("\n".join(node_url(args.host, port) for port in ports) + "\n")
+
+    processes = [start_node(args.host, port, args.nodes_file, args.dev) for port in ports]
+    print(f"🚀 {len(processes)} nodos: " + ", ".join(node_url(args.host, port) for port in ports))
+    print(f"📝 Nodos en {args.nodes_file} (se relee al cambiar)")
+
+    def stop(*_):
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Si un nodo termina, se detienen todos
+    while all(process.poll() is None for process in processes):
+        time.sleep(1)
+    print("❌ Un nodo terminó; deteniendo el resto")
+    stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Reparto de partidas entre procesos por código de sala (hashing consistente).
+
+Cada proceso (nodo) atiende solo las partidas cuyo código le asigna el anillo:
+las rutas del juego con un código ajeno redirigen al nodo dueño y las páginas
+conectan su socket a ese mismo nodo, así el estado en memoria de la sala
+(eventos, carrusel, límites) vive en un único proceso. La base de datos es
+compartida.
+
+Los nodos se configuran con SHARD_NODES (URLs separadas por comas) o
+SHARD_NODES_FILE (una URL por línea, se relee al cambiar); SHARD_SELF es la URL
+de este nodo. Con nodos virtuales, añadir o quitar un nodo solo mueve ~1/N de
+las partidas; las salas que dejan de ser propias reciben 'shard_moved'.
+Sin configuración todo se atiende en local.
+"""
+from bisect import bisect
+import hashlib
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Puntos por nodo en el anillo: más puntos, reparto más uniforme
+DEFAULT_VNODES = 128
+
+# Cada cuántos segundos se comprueba si cambió SHARD_NODES_FILE
+WATCH_INTERVAL = 2.0
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+def normalize_code(code):
+    return (code or '').strip().upper()
+
+class HashRing:
+    """Anillo de hashing consistente con nodos virtuales"""
+
+    def __init__(self, nodes, vnodes=DEFAULT_VNODES):
+        self.nodes = tuple(sorted(set(nodes)))
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key):
+        if not self._owners:
+            return None
+        index = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+class ShardMap:
+    """Anillo de los nodos configurados y nodo propio"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.configure()
+
+    def configure(self, self_url=None, nodes=None, nodes_file=None, vnodes=DEFAULT_VNODES):
+        self.self_url = (self_url or '').rstrip('/') or None
+        self.nodes_file = nodes_file
+        self.vnodes = vnodes
+        self._file_mtime = None
+        self.ring = HashRing([n.rstrip('/') for n in nodes or []], vnodes)
+        if nodes_file:
+            self.reload()
+
+    @property
+    def enabled(self):
+        return self.self_url is not None and len(self.ring.nodes) > 1
+
+    def owner(self, code):
+        """URL del nodo dueño de la partida (None si no hay reparto)"""
+        if not self.enabled:
+            return None
+        return self.ring.owner(normalize_code(code))
+
+    def is_local(self, code):
+        owner = self.owner(code)
+        return owner is None or owner == self.self_url
+
+    def on_change(self, listener):
+        """Registrar listener(ring_anterior) para cuando cambian los nodos"""
+        self._listeners.append(listener)
+
+    def reload(self):
+        """Releer SHARD_NODES_FILE si cambió; devuelve True si cambió el anillo"""
+        try:
+            mtime = os.path.getmtime(self.nodes_file)
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._file_mtime:
+                return False
+            self._file_mtime = mtime
+            with open(self.nodes_file) as f:
+                nodes = [line.strip().rstrip('/') for line in f
+                         if line.strip() and not line.lstrip().startswith('#')]
+            previous = self.ring
+            if set(nodes) == set(previous.nodes):
+                return False
+            self.ring = HashRing(nodes, self.vnodes)
+
+        logger.info("Nodos del anillo: %s", ', '.join(self.ring.nodes))
+        for listener in self._listeners:
+            try:
+                listener(previous)
+            except Exception:
+                logger.exception("Error notificando el cambio de nodos")
+        return True
+
+    def watch(self, sleep):
+        """Bucle que relee el archivo de nodos (para una tarea en segundo plano)"""
+        while True:
+            sleep(WATCH_INTERVAL)
+            self.reload()
+
+# Sin configuración (p. ej. fuera de create_app) todo es local
+shard_map = ShardMap()
+
+def any_node(view):
+    """Marcar una ruta de partida que cualquier nodo puede atender (solo toca la base de datos)"""
+    view.shard_any_node = True
+    return view
+
+def shard_url(code, path=''):
+    """URL absoluta en el nodo dueño de la partida, o la ruta tal cual si es local"""
+    owner = shard_map.owner(code)
+    if owner is None or owner == shard_map.self_url:
+        return path
+    return owner + path
+
+def init_sharding(app, socketio=None):
+    """Configurar el anillo y registrar la redirección de las rutas de partidas"""
+    from flask import jsonify, redirect, request
+
+    nodes = [n.strip() for n in app.config.get('SHARD_NODES', '').split(',') if n.strip()]
+    shard_map.configure(
+        self_url=app.config.get('SHARD_SELF'),
+        nodes=nodes,
+        nodes_file=app.config.get('SHARD_NODES_FILE'),
+        vnodes=app.config.get('SHARD_VNODES', DEFAULT_VNODES)
+    )
+
+    @app.context_processor
+    def inject_socket_url():
+        # Las plantillas conectan el socket al nodo dueño de la partida
+        return {'socket_url': lambda code: shard_url(code) or None}
+
+    if not shard_map.self_url or not (nodes or shard_map.nodes_file):
+        return
+
+    if shard_map.nodes_file and socketio is not None:
+        socketio.start_background_task(shard_map.watch, socketio.sleep)
+
+    @app.before_request
+    def route_to_owner():
+        if request.blueprint != 'game' or request.method == 'OPTIONS':
+            return None
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, 'shard_any_node', False):
+            return None
+        code = request_game_code()
+        if not code or shard_map.is_local(code):
+            return None
+
+        if request.method in ('GET', 'HEAD'):
+            return redirect(shard_map.owner(code) + request.full_path.rstrip('?'), code=307)
+        # fetch() no envía la cookie de sesión tras una redirección a otro origen
+        return jsonify({
+            "error": "La partida se atiende en otro servidor, recarga la página",
+            "node": shard_map.owner(code)
+        }), 421
+
+    logger.info("Reparto por código activo: %s de %d nodos", shard_map.self_url, len(shard_map.ring.nodes))
+
+def request_game_code():
+    """Código de partida de la petición (URL o cuerpo), o None"""
+    from flask import request
+    code = (request.view_args or {}).get('code')
+    if not code and request.method == 'POST':
+        if request.form:
+            code = request.form.get('code') or request.form.get('game_code')
+        else:
+            data = request.get_json(force=True, silent=True)
+            if isinstance(data, dict):
+                code = data.get('game_code') or data.get('code')
+    return normalize_code(code) if isinstance(code, str) else None
@@ -0,0 +1,225 @@
+"""
+Registro de consultas lentas.
+
+Con SLOW_QUERY_MS > 0 se mide cada sentencia que llega al driver (eventos
+before/after_cursor_execute de los engines, incluida la réplica) y las que
+superan el umbral se agregan por sentencia normalizada: los valores literales
+y las listas de un IN expandido se sustituyen por marcadores, así la misma
+consulta con distintos parámetros cuenta como una sola.
+
+De cada sentencia se guarda el número de veces, el tiempo total y máximo, las
+rutas que la lanzan, los parámetros de la ejecución más lenta y, la primera vez,
+su plan (EXPLAIN QUERY PLAN en SQLite, EXPLAIN en PostgreSQL y MySQL) para ver
+si usa los índices compuestos de player_template y vote. El resumen se consulta
+en /admin/slow-queries.
+"""
+from collections import Counter
+from sqlalchemy import event
+import re
+import threading
+import time
+
+# Sentencias distintas que se conservan (se descartan las de menor tiempo total)
+MAX_STATEMENTS = 500
+
+# Longitud máxima de cada parámetro guardado (las imágenes en Base64 ocupan MB)
+MAX_PARAM_LENGTH = 200
+
+# Rutas distintas que se guardan por sentencia
+MAX_ROUTES = 10
+
+# Solo se pide el plan de las sentencias que no modifican datos al explicarse
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.$])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = r'(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)'
+_PLACEHOLDER_LIST = re.compile(rf'\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)')
+_VALUES_LIST = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\1)+')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_statement(statement):
+    """Sentencia sin literales ni listas de longitud variable, para agruparla"""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(?, ...)', normalized)
+    normalized = _VALUES_LIST.sub(r'\1, ...', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def _truncate(value):
+    text = repr(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + f'... ({len(text)} caracteres)'
+
+def _first_parameters(parameters, executemany):
+    """
+    Parámetros de una sola ejecución: en un executemany llega una lista de
+    conjuntos, salvo en los INSERT de varias filas (insertmanyvalues), que ya
+    vienen aplanados en uno.
+    """
+    if executemany and parameters and isinstance(parameters[0], (list, tuple, dict)):
+        return parameters[0]
+    return parameters
+
+def _format_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: _truncate(value) for key, value in parameters.items()}
+    return [_truncate(value) for value in parameters or ()]
+
+def _current_route():
+    """Endpoint de la petición que lanza la consulta, o el hilo si no hay petición"""
+    from flask import has_request_context, request
+    if has_request_context():
+        return f"{request.method} {request.endpoint or request.path}"
+    return f"hilo {threading.current_thread().name}"
+
+def _explain(connection, statement, parameters):
+    """
+    Plan de la sentencia en un cursor aparte (el de la consulta aún tiene sus
+    filas pendientes). En PostgreSQL va dentro de un savepoint para que un error
+    del EXPLAIN no aborte la transacción de la petición.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif dialect in ('postgresql', 'mysql', 'mariadb'):
+        prefix = 'EXPLAIN '
+    else:
+        return None
+    savepoint = dialect == 'postgresql'
+
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        if savepoint:
+            cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+
+    if dialect == 'sqlite':
+        # (id, padre, -, detalle): se indenta por profundidad del árbol
+        depth = {0: -1}
+        lines = []
+        for node_id, parent_id, _, detail in rows:
+            depth[node_id] = depth.get(parent_id, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return lines
+    return [' | '.join(str(column) for column in row) for row in rows]
+
+class SlowQueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements = {}  # sentencia normalizada -> estadísticas
+        self.threshold_ms = 0
+        self.explain = True
+        self.log = True
+
+    def record(self, connection, statement, parameters, executemany, elapsed_ms):
+        parameters = _first_parameters(parameters, executemany)
+        normalized = normalize_statement(statement)
+        route = _current_route()
+        with self._lock:
+            entry = self._statements.get(normalized)
+            if entry is None:
+                self._evict()
+                entry = self._statements[normalized] = {
+                    'statement': normalized,
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'routes': Counter(),
+                    'slowest_parameters': None,
+                    'plan': None,
+                    'plan_error': None,
+                    'first_seen': time.time(),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['last_seen'] = time.time()
+            if route in entry['routes'] or len(entry['routes']) < MAX_ROUTES:
+                entry['routes'][route] += 1
+            if elapsed_ms >= entry['max_ms']:
+                entry['max_ms'] = elapsed_ms
+                entry['slowest_parameters'] = _format_parameters(parameters)
+            needs_plan = self.explain and entry['plan'] is None and entry['plan_error'] is None
+            if needs_plan:
+                # Marcar antes de soltar el lock para no explicar dos veces a la vez
+                entry['plan'] = []
+
+        if self.log:
+            print(f"🐢 {elapsed_ms:.0f} ms [{route}] {normalized[:300]}")
+
+        if needs_plan and _EXPLAINABLE.match(statement):
+            try:
+                plan = _explain(connection, statement, parameters)
+                error = None
+            except Exception as e:
+                plan, error = None, str(e)
+            with self._lock:
+                entry['plan'] = plan
+                entry['plan_error'] = error
+
+    def _evict(self):
+        if len(self._statements) >= MAX_STATEMENTS:
+            cheapest = min(self._statements, key=lambda key: self._statements[key]['total_ms'])
+            del self._statements[cheapest]
+
+    def summary(self, sort='total_ms', limit=50):
+        """Sentencias lentas, de peor a mejor según sort (total_ms, max_ms, avg_ms o count)"""
+        with self._lock:
+            entries = [dict(entry, routes=dict(entry['routes'].most_common())) for entry in self._statements.values()]
+        for entry in entries:
+            entry['avg_ms'] = entry['total_ms'] / entry['count']
+        entries.sort(key=lambda entry: -entry[sort])
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+
+slow_query_log = SlowQueryLog()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('slow_query_start')
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    if elapsed_ms >= slow_query_log.threshold_ms:
+        try:
+            slow_query_log.record(conn, statement, parameters, executemany, elapsed_ms)
+        except Exception as e:
+            # El registro nunca debe romper la consulta que se está midiendo
+            print(f"Error registrando consulta lenta: {str(e)}")
+
+def _handle_error(exception_context):
+    # La sentencia falló: descartar su hora de inicio
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('slow_query_start'):
+        connection.info['slow_query_start'].pop()
+
+def init_slow_queries(app, db):
+    """Medir las consultas de todos los engines si SLOW_QUERY_MS > 0"""
+    threshold = app.config.get('SLOW_QUERY_MS', 0)
+    if not threshold or threshold <= 0:
+        return
+    slow_query_log.threshold_ms = threshold
+    slow_query_log.explain = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    slow_query_log.log = app.config.get('SLOW_QUERY_LOG', True)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
@@ -0,0 +1,337 @@
+let dragElement = null;
+let isDragging = false;
+let isResizing = false;
+let startX, startY, startLeft, startTop, startWidth, startHeight;
+
+const memeCanvas = document.getElementById('memeCanvas');
+const memeImage = document.getElementById('memeImage');
+const numTextBoxesSelect = document.getElementById('numTextBoxes');
+const textControlsContainer = document.getElementById('textControlsContainer');
+
+// Configuración inicial del template
+const templateData = window.PAGE_DATA.template;
+
+// Establecer número inicial de cajas
+numTextBoxesSelect.value = templateData.num_text_boxes;
+
+// Inicializar cuando la imagen se carga
+memeImage.onload = function() {
+    updateEditor();
+};
+
+// Si la imagen ya está cargada
+if (memeImage.complete) {
+    updateEditor();
+}
+
+// Event listener para cambio en el número de cajas
+numTextBoxesSelect.addEventListener('change', function() {
+    templateData.num_text_boxes = parseInt(this.value);
+    updateEditor();
+});
+
+function updateEditor() {
+    updateTextBoxes();
+    updateControls();
+}
+
+function updateTextBoxes() {
+    // Limpiar cajas existentes
+    const existingBoxes = memeCanvas.querySelectorAll('.text-box');
+    existingBoxes.forEach(box => box.remove());
+
+    // Crear cajas según el número seleccionado
+    for (let i = 0; i < templateData.num_text_boxes; i++) {
+        createTextBox(i);
+    }
+}
+
+function createTextBox(index) {
+    const textBox = document.createElement('div');
+    textBox.className = 'text-box';
+    textBox.id = `textBox${index + 1}`;
+    textBox.setAttribute('data-text', index + 1);
+
+    const config = templateData.textBoxes[index];
+    textBox.textContent = config.label;
+
+    // Aplicar posición y tamaño
+    textBox.style.left = config.x + '%';
+    textBox.style.top = config.y + '%';
+    textBox.style.width = config.width + '%';
+    textBox.style.height = config.height + '%';
+    textBox.style.fontSize = config.size + 'px';
+
+    // Crear resize handle
+    const resizeHandle = document.createElement('div');
+    resizeHandle.className = 'resize-handle';
+    resizeHandle.setAttribute('data-text', index + 1);
+    textBox.appendChild(resizeHandle);
+
+    // Eventos para drag & drop
+    textBox.addEventListener('mousedown', handleMouseDown);
+    resizeHandle.addEventListener('mousedown', function(e) {
+        e.stopPropagation();
+        handleResizeStart(e);
+    });
+
+    memeCanvas.appendChild(textBox);
+}
+
+function updateControls() {
+    textControlsContainer.innerHTML = '';
+
+    for (let i = 0; i < templateData.num_text_boxes; i++) {
+        const controlSection = createControlSection(i);
+        textControlsContainer.appendChild(controlSection);
+    }
+}
+
+function createControlSection(index) {
+    const section = document.createElement('div');
+    section.className = 'control-section';
+
+    const config = templateData.textBoxes[index];
+
+    section.innerHTML = `
+        <h3>
+            📝 Texto ${index + 1}
+        </h3>
+
+        <div class="form-group">
+            <label>Etiqueta:</label>
+            <input type="text" id="text${index + 1}_label" value="${config.label}" data-text="${index + 1}">
+        </div>
+
+        <div class="preview-text">
+            <label>Texto de prueba:</label>
+            <input type="text" id="text${index + 1}_sample" placeholder="Escribe para probar..." data-text="${index + 1}">
+        </div>
+
+        <div class="input-row">
+            <div class="form-group">
+                <label>X (%):</label>
+                <input type="number" id="text${index + 1}_x" value="${config.x}" min="0" max="100" step="0.1" data-text="${index + 1}">
+            </div>
+            <div class="form-group">
+                <label>Y (%):</label>
+                <input type="number" id="text${index + 1}_y" value="${config.y}" min="0" max="100" step="0.1" data-text="${index + 1}">
+            </div>
+        </div>
+
+        <div class="input-row">
+            <div class="form-group">
+                <label>Ancho (%):</label>
+                <input type="number" id="text${index + 1}_width" value="${config.width}" min="5" max="100" step="0.1" data-text="${index + 1}">
+            </div>
+            <div class="form-group">
+                <label>Alto (%):</label>
+                <input type="number" id="text${index + 1}_height" value="${config.height}" min="5" max="100" step="0.1" data-text="${index + 1}">
+            </div>
+        </div>
+
+        <div class="form-group">
+            <label>Tamaño fuente:</label>
+            <input type="number" id="text${index + 1}_size" value="${config.size}" min="8" max="72" data-text="${index + 1}">
+        </div>
+    `;
+
+    return section;
+}
+
+// Event delegation para inputs dinámicos
+document.addEventListener('input', function(e) {
+    if (e.target.hasAttribute('data-text')) {
+        const textNum = parseInt(e.target.getAttribute('data-text'));
+        updateTextBox(textNum);
+
+        // Actualizar configuración local
+        const index = textNum - 1;
+        const fieldName = e.target.id.split('_').slice(1).join('_');
+
+        if (fieldName === 'label') {
+            templateData.textBoxes[index].label = e.target.value;
+        } else if (fieldName === 'x') {
+            templateData.textBoxes[index].x = parseFloat(e.target.value);
+        } else if (fieldName === 'y') {
+            templateData.textBoxes[index].y = parseFloat(e.target.value);
+        } else if (fieldName === 'size') {
+            templateData.textBoxes[index].size = parseInt(e.target.value);
+        } else if (fieldName === 'width') {
+            templateData.textBoxes[index].width = parseFloat(e.target.value);
+        } else if (fieldName === 'height') {
+            templateData.textBoxes[index].height = parseFloat(e.target.value);
+        }
+    }
+});
+
+function updateTextBox(textNum) {
+    const textBox = document.getElementById(`textBox${textNum}`);
+    if (!textBox) return;
+
+    const x = parseFloat(document.getElementById(`text${textNum}_x`).value);
+    const y = parseFloat(document.getElementById(`text${textNum}_y`).value);
+    const width = parseFloat(document.getElementById(`text${textNum}_width`).value);
+    const height = parseFloat(document.getElementById(`text${textNum}_height`).value);
+    const size = parseInt(document.getElementById(`text${textNum}_size`).value);
+    const sample = document.getElementById(`text${textNum}_sample`).value;
+    const label = document.getElementById(`text${textNum}_label`).value;
+
+    // Usar texto de prueba si existe, si no usar etiqueta
+    textBox.textContent = sample || label;
+
+    // Aplicar posición y tamaño
+    textBox.style.left = x + '%';
+    textBox.style.top = y + '%';
+    textBox.style.width = width + '%';
+    textBox.style.height = height + '%';
+    textBox.style.fontSize = size + 'px';
+}
+
+// Funciones de drag & drop (simplificadas)
+function handleMouseDown(e) {
+    if (e.target.classList.contains('resize-handle')) return;
+
+    isDragging = true;
+    dragElement = e.target.closest('.text-box');
+    dragElement.classList.add('dragging');
+
+    const rect = memeCanvas.getBoundingClientRect();
+    startX = e.clientX - rect.left;
+    startY = e.clientY - rect.top;
+
+    const textBoxRect = dragElement.getBoundingClientRect();
+    startLeft = textBoxRect.left - rect.left;
+    startTop = textBoxRect.top - rect.top;
+
+    document.addEventListener('mousemove', handleMouseMove);
+    document.addEventListener('mouseup', handleMouseUp);
+    e.preventDefault();
+}
+
+function handleMouseMove(e) {
+    if (!isDragging && !isResizing) return;
+
+    const rect = memeCanvas.getBoundingClientRect();
+    const currentX = e.clientX - rect.left;
+    const currentY = e.clientY - rect.top;
+
+    if (isDragging && dragElement) {
+        const deltaX = currentX - startX;
+        const deltaY = currentY - startY;
+
+        const newLeft = startLeft + deltaX;
+        const newTop = startTop + deltaY;
+
+        // Convertir a porcentajes
+        const leftPercent = (newLeft / rect.width) * 100;
+        const topPercent = (newTop / rect.height) * 100;
+
+        // Limitar dentro del canvas
+        const clampedLeft = Math.max(0, Math.min(90, leftPercent));
+        const clampedTop = Math.max(0, Math.min(90, topPercent));
+
+        // Actualizar posición visual
+        dragElement.style.left = clampedLeft + '%';
+        dragElement.style.top = clampedTop + '%';
+
+        // Actualizar inputs
+        const textNum = dragElement.getAttribute('data-text');
+        document.getElementById(`text${textNum}_x`).value = clampedLeft.toFixed(1);
+        document.getElementById(`text${textNum}_y`).value = clampedTop.toFixed(1);
+
+        // Actualizar configuración local
+        const index = parseInt(textNum) - 1;
+        templateData.textBoxes[index].x = clampedLeft;
+        templateData.textBoxes[index].y = clampedTop;
+    }
+}
+
+function handleMouseUp() {
+    if (dragElement) {
+        dragElement.classList.remove('dragging');
+    }
+    isDragging = false;
+    isResizing = false;
+    dragElement = null;
+
+    document.removeEventListener('mousemove', handleMouseMove);
+    document.removeEventListener('mouseup', handleMouseUp);
+}
+
+function handleResizeStart(e) {
+    isResizing = true;
+    dragElement = e.target.closest('.text-box');
+
+    const rect = memeCanvas.getBoundingClientRect();
+    const textBoxRect = dragElement.getBoundingClientRect();
+
+    startX = e.clientX - rect.left;
+    startY = e.clientY - rect.top;
+    startWidth = textBoxRect.width;
+    startHeight = textBoxRect.height;
+
+    document.addEventListener('mousemove', handleMouseMove);
+    document.addEventListener('mouseup', handleMouseUp);
+    e.preventDefault();
+}
+
+// Manejar envío del formulario
+document.getElementById('editorForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const saveButton = document.querySelector('.save-button');
+    saveButton.disabled = true;
+    saveButton.textContent = 'Guardando...';
+
+    const formData = {
+        num_text_boxes: templateData.num_text_boxes
+    };
+
+    // Recopilar datos de todas las cajas de texto
+    for (let i = 1; i <= 5; i++) {
+        const labelInput = document.getElementById(`text${i}_label`);
+        const xInput = document.getElementById(`text${i}_x`);
+        const yInput = document.getElementById(`text${i}_y`);
+        const widthInput = document.getElementById(`text${i}_width`);
+        const heightInput = document.getElementById(`text${i}_height`);
+        const sizeInput = document.getElementById(`text${i}_size`);
+
+        if (labelInput) formData[`text${i}_label`] = labelInput.value;
+        if (xInput) formData[`text${i}_x`] = parseFloat(xInput.value);
+        if (yInput) formData[`text${i}_y`] = parseFloat(yInput.value);
+        if (widthInput) formData[`text${i}_width`] = parseFloat(widthInput.value);
+        if (heightInput) formData[`text${i}_height`] = parseFloat(heightInput.value);
+        if (sizeInput) formData[`text${i}_size`] = parseInt(sizeInput.value);
+    }
+
+    try {
+        const response = await fetch(`/admin/meme/${templateData.id}/update`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(formData)
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            saveButton.textContent = '✅ Guardado!';
+            setTimeout(() => {
+                saveButton.disabled = false;
+                saveButton.textContent = '💾 Guardar Configuración';
+            }, 2000);
+        } else {
+            throw new Error(result.error || 'Error desconocido');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('❌ Error al guardar: ' + error.message);
+        saveButton.disabled = false;
+        saveButton.textContent = '💾 Guardar Configuración';
+    }
+});
+
+// Prevenir selección de texto durante el drag
+memeCanvas.addEventListener('selectstart', e => e.preventDefault());
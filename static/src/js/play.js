@@ -0,0 +1,308 @@
+// Datos de la página (los inyecta la plantilla en window.PAGE_DATA)
+const page = window.PAGE_DATA;
+const gameCode = page.gameCode;
+
+// Variables del juego
+let timeLeft = page.roundTimeLeft;
+const timerElement = document.getElementById('timer');
+const submitButton = document.getElementById('submitMeme');
+let hasSubmitted = false;
+
+// Variables para los memes
+const templates = page.templates;
+let currentTemplateIndex = 0;
+let selectedTemplateId = null;
+
+// Verificar estado de la ronda periódicamente
+function checkRoundStatus() {
+    fetch(`/game/check-round/${gameCode}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.roundEnded) {
+                clearInterval(timer);
+                clearInterval(statusChecker);
+                if (!hasSubmitted) {
+                    submitMeme(true);
+                } else {
+                    // Si ya envié mi meme y la ronda terminó, ir a resultados
+                    setTimeout(() => {
+                        window.location.href = `/game/results/${gameCode}`;
+                    }, 1000);
+                }
+            }
+        })
+        .catch(error => console.error('Error checking round status:', error));
+}
+
+// Temporizador
+const timer = setInterval(() => {
+    timeLeft--;
+    timerElement.textContent = timeLeft;
+
+    if (timeLeft <= 10) {
+        timerElement.classList.add('warning');
+    }
+
+    if (timeLeft <= 0) {
+        clearInterval(timer);
+        if (!hasSubmitted) {
+            submitMeme(true);
+        }
+    }
+}, 1000);
+
+// Verificar estado cada 3 segundos
+const statusChecker = setInterval(checkRoundStatus, 3000);
+
+// Función para mostrar el meme actual
+function displayCurrentMeme() {
+    if (templates.length === 0) return;
+
+    const template = templates[currentTemplateIndex];
+    const memeDisplay = document.getElementById('currentMemeDisplay');
+    const textInputsContainer = document.getElementById('textInputsContainer');
+    const currentMemeSpan = document.getElementById('currentMeme');
+
+    // Actualizar contador
+    currentMemeSpan.textContent = currentTemplateIndex + 1;
+
+    // Obtener número de cajas de texto para esta plantilla
+    const numTextBoxes = template.template.num_text_boxes || 2;
+
+    // Crear campos de entrada dinámicamente
+    createTextInputs(template, numTextBoxes);
+
+    // Crear vista previa del meme con texto dinámico
+    createMemePreview(template, numTextBoxes);
+
+    // Actualizar botones de navegación
+    updateNavigationButtons();
+
+    // Actualizar vista previa con texto actual
+    updateMemePreview();
+}
+
+// Función para crear campos de entrada dinámicamente
+function createTextInputs(template, numTextBoxes) {
+    const container = document.getElementById('textInputsContainer');
+    container.innerHTML = ''; // Limpiar contenido anterior
+
+    for (let i = 1; i <= numTextBoxes; i++) {
+        const label = template.template[`text${i}_label`] || `Texto ${i}`;
+
+        const input = document.createElement('input');
+        input.type = 'text';
+        input.id = `text${i}Input`;
+        input.placeholder = `${label}...`;
+        input.className = 'text-input';
+        input.maxLength = 200;
+
+        // Agregar event listener para actualización en tiempo real
+        input.addEventListener('input', updateMemePreview);
+
+        container.appendChild(input);
+    }
+}
+
+// Función para crear vista previa del meme
+function createMemePreview(template, numTextBoxes) {
+    const memeDisplay = document.getElementById('currentMemeDisplay');
+
+    // Crear imagen del meme
+    const img = document.createElement('img');
+    img.src = template.template.image_path;
+    img.alt = template.template.name;
+
+    memeDisplay.innerHTML = '';
+    memeDisplay.appendChild(img);
+
+    // Crear contenedores para texto overlay
+    for (let i = 1; i <= numTextBoxes; i++) {
+        const textOverlay = document.createElement('div');
+        textOverlay.className = 'meme-preview-text';
+        textOverlay.id = `text${i}Overlay`;
+
+        // Posicionar según la configuración del admin
+        const x = template.template[`text${i}_x`] || 50;
+        const y = template.template[`text${i}_y`] || (i === 1 ? 20 : 80);
+        const width = template.template[`text${i}_width`] || 30;
+        const height = template.template[`text${i}_height`] || 10;
+        const size = template.template[`text${i}_size`] || 24;
+
+        textOverlay.style.left = x + '%';
+        textOverlay.style.top = y + '%';
+        textOverlay.style.width = width + '%';
+        textOverlay.style.height = height + '%';
+        textOverlay.style.fontSize = size + 'px';
+
+        memeDisplay.appendChild(textOverlay);
+    }
+}
+
+// Función para actualizar vista previa con texto actual
+function updateMemePreview() {
+    const numTextBoxes = templates[currentTemplateIndex].template.num_text_boxes || 2;
+
+    for (let i = 1; i <= numTextBoxes; i++) {
+        const input = document.getElementById(`text${i}Input`);
+        const overlay = document.getElementById(`text${i}Overlay`);
+
+        if (input && overlay) {
+            const text = input.value || '';
+            overlay.textContent = text;
+
+            // Mostrar caja vacía si no hay texto
+            if (text.trim() === '') {
+                overlay.style.background = 'rgba(255, 255, 255, 0.92)';
+                overlay.style.border = '1px dashed #dfe6e9';
+                overlay.style.color = '#000';
+            } else {
+                overlay.style.background = 'rgba(255, 255, 255, 0.92)';
+                overlay.style.border = 'none';
+                overlay.style.color = '#000';
+            }
+        }
+    }
+}
+
+// Función para actualizar botones de navegación
+function updateNavigationButtons() {
+    const prevButton = document.getElementById('prevMeme');
+    const nextButton = document.getElementById('nextMeme');
+
+    prevButton.disabled = currentTemplateIndex === 0;
+    nextButton.disabled = currentTemplateIndex === templates.length - 1;
+}
+
+// Event listeners para navegación
+document.getElementById('prevMeme').addEventListener('click', () => {
+    if (currentTemplateIndex > 0) {
+        currentTemplateIndex--;
+        displayCurrentMeme();
+    }
+});
+
+document.getElementById('nextMeme').addEventListener('click', () => {
+    if (currentTemplateIndex < templates.length - 1) {
+        currentTemplateIndex++;
+        displayCurrentMeme();
+    }
+});
+
+// Inicializar si hay plantillas
+if (templates.length > 0) {
+    displayCurrentMeme();
+}
+
+// Función para enviar el meme
+function submitMeme(isAutoSubmit = false) {
+    if (hasSubmitted) return;
+
+    // Verificar que hay plantillas disponibles
+    if (templates.length === 0 && !isAutoSubmit) {
+        alert('¡No hay plantillas disponibles!');
+        return;
+    }
+
+    // Obtener datos del meme actual
+    const currentTemplate = templates[currentTemplateIndex];
+    if (!currentTemplate) {
+        console.error('No hay plantilla seleccionada');
+        return;
+    }
+
+    const numTextBoxes = currentTemplate.template.num_text_boxes || 2;
+
+    // Recopilar todos los textos dinámicamente
+    const submission = {
+        template_id: currentTemplate.id,
+        game_code: gameCode,
+        // Mantener compatibilidad con campos antiguos
+        text_top: '',
+        text_bottom: ''
+    };
+
+    // Agregar todos los campos de texto dinámicamente
+    for (let i = 1; i <= Math.max(5, numTextBoxes); i++) {
+        const textInput = document.getElementById(`text${i}Input`);
+        const textValue = textInput ? textInput.value || '' : '';
+        submission[`text${i}`] = textValue;
+
+        // Mantener compatibilidad para los primeros dos campos
+        if (i === 1) submission.text_top = textValue;
+        if (i === 2) submission.text_bottom = textValue;
+    }
+
+    fetch('/game/submit-meme', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(submission)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            hasSubmitted = true;
+            submitButton.disabled = true;
+            submitButton.textContent = '¡Meme Enviado! ✅';
+
+            // Esperar a que todos terminen o redirigir a resultados
+            if (data.allSubmitted) {
+                setTimeout(() => {
+                    window.location.href = `/game/results/${gameCode}`;
+                }, 2000); // Dar tiempo para que otros vean que enviaste
+            }
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al enviar el meme. ¡Inténtalo de nuevo!');
+    });
+}
+
+
+// Manejar envío de meme
+submitButton.addEventListener('click', () => submitMeme(false));
+
+// Escuchar eventos del servidor (cada uno trae el estado necesario)
+const socket = connectToRoom(gameCode, {
+    all_submitted: (data) => {
+        window.location.href = data.redirect || `/game/results/${gameCode}`;
+    },
+    round_ended: (data) => {
+        if (data.round && data.round !== page.currentRound) {
+            return;
+        }
+        clearInterval(timer);
+        if (!hasSubmitted) {
+            submitMeme(true);
+        }
+    },
+    next_round_started: (data) => {
+        if (data.redirect) {
+            window.location.href = data.redirect;
+        } else {
+            window.location.reload();
+        }
+    },
+    game_finished: (data) => {
+        window.location.href = data.redirect || `/game/podium/${gameCode}`;
+    },
+    // Se perdieron eventos que ya no están en el servidor: comparar con el estado actual
+    resync: (data) => {
+        if (data.status === 'finished') {
+            window.location.href = `/game/podium/${gameCode}`;
+        } else if (data.status !== 'started' || data.round !== page.currentRound) {
+            window.location.reload();
+        } else {
+            checkRoundStatus();
+        }
+    }
+}, { url: page.socketUrl }, page.roomResume);
+
+// Limpiar intervalos al salir de la página
+window.addEventListener('beforeunload', () => {
+    clearInterval(timer);
+    clearInterval(statusChecker);
+});
@@ -0,0 +1,116 @@
+// Función para ajustar automáticamente el tamaño de fuente
+function adjustTextSize(element, originalSize) {
+    if (!element) return;
+
+    let fontSize = originalSize;
+    element.style.fontSize = fontSize + 'px';
+
+    // Reducir el tamaño hasta que el texto quepa
+    let attempts = 0;
+    const maxAttempts = 20;
+
+    while (attempts < maxAttempts && (element.scrollHeight > element.offsetHeight || element.scrollWidth > element.offsetWidth)) {
+        fontSize = Math.max(fontSize * 0.9, 10); // No menor a 10px
+        element.style.fontSize = fontSize + 'px';
+        attempts++;
+
+        // Pequeña pausa para permitir que el DOM se actualice
+        if (attempts % 5 === 0) {
+            // Forzar repaint
+            element.offsetHeight;
+        }
+    }
+}
+
+// Función para ajustar todos los textos de memes
+function adjustAllMemeTexts() {
+    // Ajustar textos del podio (top 3)
+    document.querySelectorAll('.podium-place .meme-text-overlay').forEach((element, index) => {
+        const style = window.getComputedStyle(element);
+        const originalSize = parseInt(style.fontSize);
+        adjustTextSize(element, originalSize);
+    });
+
+    // Ajustar textos de la grilla
+    document.querySelectorAll('.meme-preview .meme-text-overlay').forEach((element, index) => {
+        const style = window.getComputedStyle(element);
+        const originalSize = parseInt(style.fontSize);
+        adjustTextSize(element, originalSize);
+    });
+}
+
+// Crear confetti para celebrar
+function createConfetti() {
+    const confettiContainer = document.getElementById('confetti');
+    const colors = ['#ff6b6b', '#feca57', '#48dbfb', '#1dd1a1', '#a55eea'];
+
+    for (let i = 0; i < 50; i++) {
+        const confetti = document.createElement('div');
+        confetti.style.position = 'absolute';
+        confetti.style.width = Math.random() * 10 + 5 + 'px';
+        confetti.style.height = confetti.style.width;
+        confetti.style.background = colors[Math.floor(Math.random() * colors.length)];
+        confetti.style.left = Math.random() * 100 + '%';
+        confetti.style.top = '-10px';
+        confetti.style.borderRadius = '50%';
+        confetti.style.animation = `fall ${Math.random() * 3 + 2}s linear infinite`;
+        confetti.style.animationDelay = Math.random() * 2 + 's';
+
+        confettiContainer.appendChild(confetti);
+    }
+}
+
+// Crear animación de caída
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes fall {
+        0% {
+            transform: translateY(-10px) rotate(0deg);
+            opacity: 1;
+        }
+        100% {
+            transform: translateY(100vh) rotate(360deg);
+            opacity: 0;
+        }
+    }
+`;
+document.head.appendChild(style);
+
+// Inicializar confetti después de un momento
+setTimeout(createConfetti, 1000);
+
+// Memes que aún se renderizan en el servidor (responde 202): reintentar la imagen
+function retryRenderedImages() {
+    document.querySelectorAll('img[data-rendered]').forEach(img => {
+        let attempts = 0;
+        const retry = () => {
+            if (attempts >= 3) return;
+            attempts++;
+            setTimeout(() => { img.src = `${img.dataset.rendered}?retry=${attempts}`; }, 1000);
+        };
+        img.addEventListener('error', retry);
+        // La imagen pudo fallar antes de cargar este script
+        if (img.complete && img.naturalWidth === 0) retry();
+    });
+}
+
+retryRenderedImages();
+
+// Ajustar tamaños de fuente después de que se cargue todo
+setTimeout(() => {
+    adjustAllMemeTexts();
+}, 100);
+
+// Anunciar ganador con sonido (si está disponible)
+const winner = window.PAGE_DATA.winner;
+if (winner) {
+    setTimeout(() => {
+        if ('speechSynthesis' in window) {
+            const utterance = new SpeechSynthesisUtterance(
+                `¡El ganador es ${winner.creator_name} con ${winner.total_points} puntos!`
+            );
+            utterance.lang = 'es-ES';
+            speechSynthesis.speak(utterance);
+        }
+    }, 2000);
+}
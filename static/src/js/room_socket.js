@@ -0,0 +1,59 @@
+// Conexión Socket.IO a la sala de una partida.
+// Los eventos traen el estado que cambió y un número de secuencia por sala:
+// los mensajes repetidos o anteriores al último recibido se descartan.
+// `resume` ({seq, epoch}) es el último evento que la página ya refleja; al
+// (re)conectar el servidor reenvía solo los eventos posteriores, o 'resync' con
+// el estado actual si ya no los tiene.
+// `options.url` es el nodo que atiende la partida (ver sharding.py); si la
+// partida pasa a otro nodo llega 'shard_moved' y la página se recarga allí.
+function connectToRoom(gameCode, handlers, options, resume) {
+    const { url, ...ioOptions } = options || {};
+    const socket = url ? io(url, ioOptions) : io(ioOptions);
+    let lastSeq = resume ? resume.seq : null;
+    let epoch = resume ? resume.epoch : null;
+
+    // Volver a unirse a la sala también tras una reconexión
+    socket.on('connect', () => {
+        const data = { code: gameCode };
+        if (lastSeq !== null) {
+            data.last_seq = lastSeq;
+            data.epoch = epoch;
+        }
+        socket.emit('join', data);
+    });
+
+    socket.on('shard_moved', () => {
+        window.location.reload();
+    });
+
+    socket.on('resync', (data) => {
+        epoch = data.epoch;
+        lastSeq = data.seq;
+        if (handlers.resync) {
+            handlers.resync(data);
+        }
+    });
+
+    Object.entries(handlers).forEach(([event, handler]) => {
+        if (event === 'resync') {
+            return;
+        }
+        socket.on(event, (data) => {
+            data = data || {};
+            if (typeof data.seq === 'number') {
+                // Un servidor reiniciado empieza de nuevo la numeración
+                if (data.epoch !== epoch) {
+                    epoch = data.epoch;
+                    lastSeq = 0;
+                }
+                if (lastSeq !== null && data.seq <= lastSeq) {
+                    return;
+                }
+                lastSeq = data.seq;
+            }
+            handler(data);
+        });
+    });
+
+    return socket;
+}
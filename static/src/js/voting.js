@@ -0,0 +1,434 @@
+// Datos del juego
+const page = window.PAGE_DATA;
+const gameCode = page.gameCode;
+const viewer = window.PAGE_USER;
+const currentUserId = viewer.currentUserId;
+const currentRound = page.currentRound;
+const votePoints = page.votePoints;
+const secondsPerMeme = page.secondsPerMeme;
+// Sala grande: el carrusel marca los turnos y cada jugador vota sus propios memes
+const assignedMemes = viewer.assignedMemes;
+
+// El servidor decide qué meme se muestra y hasta cuándo (ver carousel.py)
+let currentMeme = null;
+let currentMemeIndex = -1;
+let totalMemes = viewer.carousel.total;
+let localDeadline = 0;
+let clockOffset = null;
+let timer = null;
+let hasVotedCurrentMeme = false;
+let votingFinished = false;
+
+// Votos de la ronda: se guardan aquí y se envían juntos al terminar el carrusel
+const pendingVotes = [];
+let votesSent = false;
+
+// Elementos del DOM
+const timerElement = document.getElementById('timer');
+const memeContainer = document.getElementById('memeContainer');
+const currentIndexSpan = document.getElementById('currentIndex');
+const votingButtons = document.getElementById('votingButtons');
+const progressFill = document.getElementById('progressFill');
+const waitingMessage = document.getElementById('waitingMessage');
+const skipInfo = document.getElementById('skipInfo');
+
+// Función para ajustar automáticamente el tamaño de fuente
+function adjustTextSize(elementId, originalSize) {
+    const element = document.getElementById(elementId);
+    if (!element) return;
+
+    let fontSize = originalSize;
+    element.style.fontSize = fontSize + 'px';
+
+    // Reducir el tamaño hasta que el texto quepa
+    let attempts = 0;
+    const maxAttempts = 20;
+
+    while (attempts < maxAttempts && (element.scrollHeight > element.offsetHeight || element.scrollWidth > element.offsetWidth)) {
+        fontSize = Math.max(fontSize * 0.9, 10); // No menor a 10px
+        element.style.fontSize = fontSize + 'px';
+        attempts++;
+
+        // Pequeña pausa para permitir que el DOM se actualice
+        if (attempts % 5 === 0) {
+            // Forzar repaint
+            element.offsetHeight;
+        }
+    }
+}
+
+// Mostrar el estado del carrusel que envió el servidor
+function showCarouselState(state) {
+    if (!state || state.round !== currentRound || votingFinished) return;
+    if (state.finished) {
+        finishVoting();
+        return;
+    }
+    // Eventos reenviados tras una reconexión pueden ser de un meme ya pasado
+    if (state.index < currentMemeIndex) return;
+
+    // Desfase entre el reloj del servidor y el del navegador (se mide una vez)
+    if (clockOffset === null) {
+        clockOffset = Date.now() - state.server_now;
+    }
+    localDeadline = state.deadline + clockOffset;
+    totalMemes = state.total;
+    document.getElementById('totalMemes').textContent = totalMemes;
+
+    if (state.index !== currentMemeIndex) {
+        currentMemeIndex = state.index;
+        currentMeme = assignedMemes ? assignedMemes[state.index] : state.meme;
+        if (!currentMeme) {
+            // Sin más memes asignados para este jugador en la ronda
+            showWaitingMessage();
+            return;
+        }
+        displayMeme(currentMeme);
+    }
+
+    // Precargar la imagen del siguiente meme
+    const next = assignedMemes ? assignedMemes[state.index + 1] : state.next;
+    if (next) {
+        new Image().src = next.rendered_path || next.image_path;
+    }
+
+    startTimer();
+}
+
+function displayMeme(meme) {
+    hasVotedCurrentMeme = false;
+
+    // Actualizar contador
+    currentIndexSpan.textContent = currentMemeIndex + 1;
+
+    // Actualizar barra de progreso
+    const progress = ((currentMemeIndex + 1) / totalMemes) * 100;
+    progressFill.style.width = progress + '%';
+
+    // Textos overlay solo si el servidor no entregó el meme ya renderizado
+    const overlayTexts = meme.rendered_path ? [] : meme.texts;
+
+    // Mostrar meme
+    memeContainer.innerHTML = `
+        <div class="meme-display">
+            <img src="${meme.rendered_path || meme.image_path}" alt="${meme.template_name}">
+            ${buildTextOverlays(overlayTexts)}
+        </div>
+        <div class="creator-info">
+            👤 Creado por: <strong>${meme.creator_name}</strong>
+        </div>
+    `;
+    if (meme.rendered_path) {
+        retryRenderedImage(memeContainer.querySelector('.meme-display img'), meme);
+    }
+
+    // Ajustar tamaño de fuente automáticamente después de cargar el contenido
+    adjustOverlays(overlayTexts);
+
+    // Habilitar/deshabilitar botones de voto
+    updateVotingButtons(meme);
+}
+
+function buildTextOverlays(texts) {
+    return texts.map((text, index) => `
+        <div class="meme-text-overlay" id="textOverlay${index}" style="
+            left: ${text.x}%; 
+            top: ${text.y}%; 
+            width: ${text.width}%;
+            height: ${text.height}%;
+            font-size: ${text.size}px;
+            transform: translate(0, 0);
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            padding: 6px 8px;
+            box-sizing: border-box;
+            white-space: normal;
+            word-break: break-word;
+            hyphens: auto;
+            line-height: 1.15;
+            overflow: hidden;
+        ">${text.content}</div>
+    `).join('');
+}
+
+function adjustOverlays(texts) {
+    setTimeout(() => {
+        texts.forEach((text, index) => {
+            adjustTextSize(`textOverlay${index}`, text.size);
+        });
+    }, 50);
+}
+
+// Mientras el meme se renderiza el servidor responde 202 (la imagen falla):
+// reintentar unas veces y, si no llega, mostrar la plantilla con los textos encima
+const RENDER_RETRIES = 3;
+
+function retryRenderedImage(img, meme) {
+    let attempts = 0;
+    img.onerror = () => {
+        if (attempts < RENDER_RETRIES) {
+            attempts++;
+            setTimeout(() => { img.src = `${meme.rendered_path}?retry=${attempts}`; }, 1000);
+            return;
+        }
+        img.onerror = null;
+        img.src = meme.image_path;
+        img.insertAdjacentHTML('afterend', buildTextOverlays(meme.texts));
+        adjustOverlays(meme.texts);
+    };
+}
+
+function updateVotingButtons(meme) {
+    const buttons = votingButtons.querySelectorAll('.vote-btn');
+
+    // Resetear todos los botones primero
+    buttons.forEach(btn => {
+        btn.disabled = false;
+        btn.classList.remove('voted');
+        // Restaurar el contenido original del botón
+        if (btn.classList.contains('suave')) {
+            btn.innerHTML = '😐 Suave<div class="points-display">+1 punto</div>';
+        } else if (btn.classList.contains('normal')) {
+            btn.innerHTML = '😊 Normal<div class="points-display">+3 puntos</div>';
+        } else if (btn.classList.contains('me-rei')) {
+            btn.innerHTML = '😂 ¡Me reí!<div class="points-display">+10 puntos</div>';
+        }
+    });
+
+    // Si es mi propio meme, deshabilitar botones
+    if (meme.creator_id === currentUserId) {
+        buttons.forEach(btn => {
+            btn.disabled = true;
+            btn.innerHTML = btn.innerHTML.split('<div')[0] + '<div class="points-display">Tu propio meme</div>';
+        });
+        skipInfo.textContent = '❌ No puedes votar por tu propio meme';
+    } else {
+        skipInfo.textContent = `💡 Puedes votar en cualquier momento durante los ${secondsPerMeme} segundos`;
+    }
+}
+
+// Cuenta atrás hasta el fin del turno; el cambio de meme lo manda el servidor
+function startTimer() {
+    if (timer) clearInterval(timer);
+
+    const tick = () => {
+        const timeLeft = Math.max(0, Math.ceil((localDeadline - Date.now()) / 1000));
+        timerElement.textContent = timeLeft;
+
+        if (timeLeft <= 3) {
+            timerElement.classList.add('warning');
+        } else {
+            timerElement.classList.remove('warning');
+        }
+
+        if (timeLeft <= 0) {
+            clearInterval(timer);
+        }
+    };
+    tick();
+    timer = setInterval(tick, 250);
+}
+
+function finishVoting() {
+    if (votingFinished) return;
+    votingFinished = true;
+    showWaitingMessage();
+    sendVotes();
+    checkVotingComplete();
+}
+
+function vote(voteType) {
+    if (hasVotedCurrentMeme) return;
+    if (!currentMeme || votingFinished) return;
+
+    // Verificar que no sea mi propio meme
+    if (currentMeme.creator_id === currentUserId) {
+        alert('¡No puedes votar por tu propio meme!');
+        return;
+    }
+
+    pendingVotes.push({ player_template_id: currentMeme.id, vote_type: voteType });
+    hasVotedCurrentMeme = true;
+
+    // Marcar botón como votado
+    const button = document.querySelector(`.vote-btn.${voteType.replace('_', '-')}`);
+    if (button) {
+        button.classList.add('voted');
+        votingButtons.querySelectorAll('.vote-btn').forEach(btn => {
+            if (btn !== button) btn.disabled = true;
+        });
+    }
+
+    skipInfo.innerHTML = `✅ ¡Votaste "${voteType.replace('_', ' ')}" por ${votePoints[voteType]} puntos!`;
+}
+
+// La ronda viaja con los votos: si el lote llega cuando el anfitrión ya avanzó,
+// el servidor lo valida contra los memes de esa ronda y no lo pierde
+function votesPayload() {
+    return JSON.stringify({ game_code: gameCode, round: currentRound, votes: pendingVotes });
+}
+
+// Enviar todos los votos de la ronda en una sola petición (la promesa se
+// resuelve cuando el servidor contesta, para poder esperar antes de avanzar)
+let votesRequest = null;
+
+function sendVotes() {
+    if (votesRequest) return votesRequest;
+    if (votesSent || pendingVotes.length === 0) return Promise.resolve();
+    votesSent = true;
+
+    votesRequest = fetch('/game/vote-batch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: votesPayload(),
+        keepalive: true
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            console.error('Error registrando votos:', data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        votesSent = false;
+    })
+    .finally(() => {
+        votesRequest = null;
+    });
+    return votesRequest;
+}
+
+function showWaitingMessage() {
+    memeContainer.style.display = 'none';
+    votingButtons.style.display = 'none';
+    skipInfo.style.display = 'none';
+    waitingMessage.style.display = 'block';
+    timerElement.style.display = 'none';
+
+    if (timer) {
+        clearInterval(timer);
+    }
+}
+
+function checkVotingComplete() {
+    // Mostrar botón de continuar para el creador
+    setTimeout(() => {
+        const continueSection = document.getElementById('continueSection');
+        if (viewer.isCreator) {
+            continueSection.style.display = 'block';
+            setupContinueButton();
+        } else if (currentRound >= 3) {
+            waitingMessage.innerHTML = 'Esperando al anfitrión para ver el podio final...';
+        } else {
+            waitingMessage.innerHTML = 'Esperando al anfitrión para continuar a la siguiente ronda...';
+        }
+    }, 3000);
+}
+
+function setupContinueButton() {
+    const continueButton = document.getElementById('continueButton');
+    continueButton.addEventListener('click', () => {
+        continueButton.disabled = true;
+        continueButton.textContent = 'Continuando...';
+
+        // Registrar antes los votos propios que falten y luego usar la lógica del servidor
+        sendVotes()
+        .then(() => fetch(`/game/continue-after-voting/${gameCode}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        }))
+        .then(response => response.json())
+        .then(data => {
+            if (data.success && data.redirect) {
+                window.location.href = data.redirect;
+            } else if (data.redirect) {
+                window.location.href = data.redirect;
+            } else {
+                alert(data.error || 'Error al continuar');
+                continueButton.disabled = false;
+                // Restaurar el texto correcto del botón según la ronda
+                if (currentRound >= 3) {
+                    continueButton.textContent = '🏆 Ver Podio Final';
+                } else {
+                    continueButton.textContent = '▶️ Siguiente Ronda';
+                }
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al continuar a la siguiente ronda');
+            continueButton.disabled = false;
+            // Restaurar el texto correcto del botón según la ronda
+            if (currentRound >= 3) {
+                continueButton.textContent = '🏆 Ver Podio Final';
+            } else {
+                continueButton.textContent = '▶️ Siguiente Ronda';
+            }
+        });
+    });
+}
+
+// Escuchar eventos del servidor (cada uno trae la ronda y a dónde ir)
+const socket = connectToRoom(gameCode, {
+    carousel: (data) => {
+        showCarouselState(data);
+    },
+    voting_finished: (data) => {
+        if (data.round === currentRound) {
+            finishVoting();
+        }
+    },
+    next_round_started: (data) => {
+        console.log('Nueva ronda iniciada:', data);
+        // Enviar los votos pendientes (keepalive sobrevive a la redirección)
+        sendVotes();
+        // Redirigir a la nueva ronda
+        if (data.redirect) {
+            window.location.href = data.redirect;
+        } else {
+            window.location.reload();
+        }
+    },
+    game_finished: (data) => {
+        console.log('Juego terminado, redirigiendo al podio:', data);
+        sendVotes();
+        if (data.redirect) {
+            window.location.href = data.redirect;
+        } else {
+            window.location.href = `/game/podium/${gameCode}`;
+        }
+    },
+    // Se perdieron eventos que ya no están en el servidor: comparar con el estado actual
+    resync: (data) => {
+        if (data.status === 'finished') {
+            window.location.href = `/game/podium/${gameCode}`;
+        } else if (data.status === 'started' && data.round > currentRound) {
+            window.location.href = `/game/play/${gameCode}`;
+        } else if (data.carousel) {
+            showCarouselState(data.carousel);
+        }
+    }
+}, { url: page.socketUrl }, viewer.roomResume);
+
+// Inicializar con el estado del carrusel al cargar la página
+if (viewer.carousel.total === 0) {
+    waitingMessage.textContent = 'No hay memes para votar en esta ronda.';
+}
+showCarouselState(viewer.carousel);
+
+// Limpiar intervalos al salir y no perder los votos si se sale antes del final
+window.addEventListener('beforeunload', () => {
+    if (timer) clearInterval(timer);
+});
+
+window.addEventListener('pagehide', () => {
+    if (!votesSent && pendingVotes.length > 0) {
+        votesSent = navigator.sendBeacon('/game/vote-batch', votesPayload());
+    }
+});
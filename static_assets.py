@@ -0,0 +1,189 @@
+"""
+Bundles estáticos de las páginas: nombres con hash de contenido, variantes
+precomprimidas (gzip/brotli) y manifiesto para resolverlos desde las plantillas.
+
+Construir antes de arrancar el servidor:
+    python static_assets.py
+
+Cada build escribe sus archivos junto a los anteriores y cambia el manifiesto
+de forma atómica: las páginas servidas con el build anterior (p. ej. durante
+un despliegue escalonado) siguen encontrando sus bundles. Se conservan los
+archivos de los últimos KEEP_BUILDS builds y los de menos de MAX_BUILD_AGE
+segundos; el resto se borra.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import time
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+SOURCE_DIR = os.path.join(STATIC_DIR, 'src')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+# Historial de builds (hora y archivos de cada uno) para podar los antiguos
+BUILDS_PATH = os.path.join(DIST_DIR, 'builds.json')
+
+# Builds cuyos archivos se conservan siempre, y edad a partir de la que se borran los demás
+KEEP_BUILDS = 3
+MAX_BUILD_AGE = 24 * 3600
+
+# Los nombres llevan el hash del contenido: se pueden cachear para siempre
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Variantes precomprimidas por orden de preferencia (codificación, extensión)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_manifest_cache = {'mtime': None, 'manifest': {}, 'version': ''}
+
+def _hashed_name(relative_path, content):
+    base, ext = os.path.splitext(relative_path)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f"{base}.{digest}{ext}"
+
+def _write_atomic(path, content):
+    """Escribir un archivo de una vez: quien lo lea ve el anterior o el nuevo, nunca uno a medias"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def _load_builds():
+    try:
+        with open(BUILDS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def _prune_builds(builds, now):
+    """
+    Borrar los archivos de dist que ya no usa ningún build conservado (los
+    últimos KEEP_BUILDS y los de menos de MAX_BUILD_AGE). Los que no aparecen
+    en el historial (builds anteriores a él) se borran por antigüedad.
+    """
+    kept = [build for index, build in enumerate(builds)
+            if index < KEEP_BUILDS or now - build['built_at'] < MAX_BUILD_AGE]
+    in_use = {name for build in kept for name in build['files']}
+    in_use.update(name + ext for name in list(in_use) for _, ext in ENCODINGS)
+
+    removed = 0
+    for root, _, filenames in os.walk(DIST_DIR, topdown=False):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            relative_path = os.path.relpath(path, DIST_DIR).replace(os.sep, '/')
+            if path in (MANIFEST_PATH, BUILDS_PATH) or relative_path in in_use:
+                continue
+            if now - os.path.getmtime(path) < MAX_BUILD_AGE:
+                continue
+            os.remove(path)
+            removed += 1
+        if root != DIST_DIR and not os.listdir(root):
+            os.rmdir(root)
+    return kept, removed
+
+def build_assets():
+    """Generar en static/dist los bundles de static/src (sin borrar los de builds anteriores); devuelve el manifiesto"""
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    manifest = {}
+    for root, _, filenames in os.walk(SOURCE_DIR):
+        for filename in sorted(filenames):
+            source_path = os.path.join(root, filename)
+            relative_path = os.path.relpath(source_path, SOURCE_DIR).replace(os.sep, '/')
+            with open(source_path, 'rb') as f:
+                content = f.read()
+
+            hashed = _hashed_name(relative_path, content)
+            manifest[relative_path] = hashed
+            target_path = os.path.join(DIST_DIR, hashed)
+            if os.path.isfile(target_path):
+                # El nombre lleva el hash: si existe, es el mismo contenido
+                continue
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            # Primero las variantes: el original es el que marca el archivo como completo
+            # mtime=0 para que el resultado sea reproducible entre builds
+            _write_atomic(target_path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if BROTLI_AVAILABLE:
+                _write_atomic(target_path + '.br', brotli.compress(content, quality=11))
+            _write_atomic(target_path, content)
+
+    _write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    now = time.time()
+    builds = [{'built_at': now, 'files': sorted(manifest.values())}] + _load_builds()
+    builds, removed = _prune_builds(builds, now)
+    _write_atomic(BUILDS_PATH, json.dumps(builds, indent=2).encode())
+    if removed:
+        print(f"🧹 {removed} archivos de builds anteriores eliminados")
+    return manifest
+
+def load_manifest():
+    """Manifiesto del último build (se relee si cambia en disco)"""
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        _manifest_cache.update(mtime=None, manifest={}, version='')
+        return {}
+
+    if _manifest_cache['mtime'] != mtime:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+        version = hashlib.sha1(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+        _manifest_cache.update(mtime=mtime, manifest=manifest, version=version)
+    return _manifest_cache['manifest']
+
+def assets_version():
+    """Identificador del build actual ('' sin build): sirve para invalidar ETags de páginas"""
+    load_manifest()
+    return _manifest_cache['version']
+
+def asset_url(path):
+    """URL de un asset: versión con hash si hay build, si no el fuente (desarrollo)"""
+    from flask import current_app, url_for
+
+    hashed = None if current_app.debug else load_manifest().get(path)
+    if hashed:
+        return url_for('serve_asset', filename=hashed)
+    return url_for('static', filename=f'src/{path}')
+
+def init_assets(app):
+    """Registrar el helper asset_url y la ruta de bundles precomprimidos"""
+    from flask import abort, request, send_file
+    from werkzeug.security import safe_join
+
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        path = safe_join(DIST_DIR, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, ext in ENCODINGS:
+            if candidate in request.accept_encodings and os.path.isfile(path + ext):
+                encoding = candidate
+                path = path + ext
+                break
+
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+if __name__ == '__main__':
+    manifest = build_assets()
+    for source, hashed in sorted(manifest.items()):
+        print(f"📦 {source} -> {hashed}")
+    if not BROTLI_AVAILABLE:
+        print("ℹ️ brotli no instalado: solo se generaron variantes gzip")
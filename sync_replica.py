@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Réplica local para desarrollo y pruebas: copia la base de datos SQLite
+principal a un segundo archivo que la aplicación usa como réplica de lectura.
+Con --interval la copia se repite, simulando una réplica con retraso.
+
+Uso:
+    python sync_replica.py                  # copiar una vez
+    python sync_replica.py --interval 2     # copiar cada 2 segundos
+
+    DATABASE_REPLICA_URL=sqlite:///ruta/app_replica.db python run.py
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import BASE_DIR, Config
+
+DEFAULT_REPLICA_PATH = os.path.join(BASE_DIR, "app_replica.db")
+
+def sqlite_path(url):
+    """Ruta del archivo de una URL sqlite:///..."""
+    if not url or not url.startswith("sqlite:///"):
+        return None
+    return url[len("sqlite:///"):]
+
+def sync_replica(source_path, replica_path):
+    """Copiar la base principal con la API de backup (copia consistente aunque haya escrituras)"""
+    source = sqlite3.connect(source_path)
+    replica = sqlite3.connect(replica_path)
+    try:
+        source.backup(replica)
+    finally:
+        replica.close()
+        source.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Copiar la base SQLite principal a la réplica local")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Repetir la copia cada N segundos (0 = una sola vez)")
+    args = parser.parse_args()
+
+    source_path = sqlite_path(Config.SQLALCHEMY_DATABASE_URI)
+    if source_path is None:
+        print("❌ La base de datos principal no es SQLite; configura una réplica real")
+        sys.exit(1)
+    replica_path = sqlite_path(Config.DATABASE_REPLICA_URL) or DEFAULT_REPLICA_PATH
+
+    while True:
+        sync_replica(source_path, replica_path)
+        print(f"🔁 Réplica actualizada: {replica_path}")
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+    if not Config.DATABASE_REPLICA_URL:
+        print(f"💡 Arranca la app con DATABASE_REPLICA_URL=sqlite:///{replica_path}")
+
+if __name__ == "__main__":
+    main()